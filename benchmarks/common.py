@@ -0,0 +1,158 @@
+"""
+Benchmark'lar için ortak yardımcılar: gecikme özetleri, sonuç dosyaları ve
+uygulamayı geçici veritabanları + sahte LLM ile izole çalıştırma.
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+FAKE_QUESTION = {
+    "type": "mcq",
+    "topic": "support_flow",
+    "level": "beginner",
+    "stem": "Destek talebi hangi adımla başlar?",
+    "choices": ["A) Kayıt", "B) Kapanış", "C) Arşiv", "D) Ödeme"],
+    "answer": "A",
+    "answer_index": 0,
+    "expected": "Kayıt",
+    "rationale": "Talep önce kayıt altına alınır.",
+}
+
+
+# -----------------------
+# İstatistik
+# -----------------------
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """En yakın sıra (nearest-rank) yöntemiyle yüzdelik değer."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Saniye cinsinden gecikme listesini p50/p95/p99 ve throughput özetine çevirir."""
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        "count": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def format_row(name: str, s: dict) -> str:
+    return (
+        f"{name:32s} n={s['count']:<6d} err={s['errors']:<4d} "
+        f"p50={s['p50_ms']:>9.3f}ms p95={s['p95_ms']:>9.3f}ms p99={s['p99_ms']:>9.3f}ms "
+        f"{s['throughput_per_s']:>9.2f}/s"
+    )
+
+
+# -----------------------
+# Sonuç dosyaları
+# -----------------------
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(suite: str, results: Dict[str, dict], config: dict, out: Optional[str] = None) -> str:
+    """Sonuçları karşılaştırılabilir JSON olarak yazar ve dosya yolunu döner."""
+    now = datetime.datetime.utcnow()
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{suite}-{now.strftime('%Y%m%dT%H%M%S')}.json")
+    payload = {
+        "suite": suite,
+        "created_at": now.isoformat(timespec="seconds") + "Z",
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return out
+
+
+# -----------------------
+# İzole ortam
+# -----------------------
+def fake_generate(latency: float):
+    """Ollama yerine sabit JSON soru dönen `llm.generate` yerine geçen fonksiyon."""
+    body = json.dumps(FAKE_QUESTION, ensure_ascii=False)
+
+    def generate(prompt, model=None, options=None, stream=False, timeout=None, **extra):
+        time.sleep(latency)
+        return {"model": model, "response": body, "done": True, "eval_count": 60,
+                "eval_duration": int(latency * 1e9) or 1, "prompt_eval_count": len(prompt) // 4}
+
+    return generate
+
+
+@contextmanager
+def isolated_app(tmp: str, llm_latency: float = 0.05, fake_llm: bool = True,
+                 ollama_url: Optional[str] = None):
+    """Uygulama modüllerini geçici DB'lere ve bellek içi Chroma koleksiyonuna yönlendirir.
+
+    `fake_llm=True` iken Ollama çağrıları `fake_generate` ile yanıtlanır; böylece
+    benchmark ağ/model olmadan çalışır. `ollama_url` verilirse gerçek istemci o
+    adrese (ör. simülatör) yönlendirilir. Çıkışta orijinal değerler geri yüklenir.
+    """
+    import chromadb
+
+    from src import admin, auth, evaluate, extract_cache, genlog, llm, question_store, rag, tracing
+
+    saved = [
+        (auth, "DATABASE"), (admin, "DATABASE"), (question_store, "DB_PATH"), (rag, "_collection"),
+        (evaluate, "RAG_ENABLED"), (genlog, "generation_log"), (extract_cache.cache, "enabled"),
+        (tracing.exporter, "path"), (llm, "generate"), (llm, "list_models"), (llm, "OLLAMA_URL"),
+    ]
+    originals = [(mod, attr, getattr(mod, attr)) for mod, attr in saved]
+
+    db = os.path.join(tmp, "quiz.db")
+    auth.DATABASE = admin.DATABASE = db
+    question_store.DB_PATH = os.path.join(tmp, "questions.db")
+    rag.set_collection(chromadb.EphemeralClient().get_or_create_collection(
+        name="bench_" + os.path.basename(tmp), embedding_function=rag.get_embedding_function()
+    ))
+    evaluate.RAG_ENABLED = True
+    extract_cache.cache.enabled = False  # ayrıştırıcılar ölçülür, önbellek isabetleri değil
+    genlog.generation_log = genlog.GenerationLog(os.path.join(tmp, "genlog"))
+    tracing.exporter.path = os.path.join(tmp, "traces.jsonl")
+    if ollama_url:
+        llm.OLLAMA_URL = ollama_url.rstrip("/")
+    if fake_llm:
+        llm.generate = fake_generate(llm_latency)
+        llm.list_models = lambda timeout=2: [llm.DEFAULT_MODEL]
+
+    auth.init_users_db()
+    admin.init_quiz_attempts_table()
+    question_store.init_db()
+    try:
+        yield
+    finally:
+        for mod, attr, value in originals:
+            setattr(mod, attr, value)
@@ -0,0 +1,68 @@
+"""
+İki benchmark sonuç dosyasını karşılaştırır.
+
+Gecikme yüzdelikleri (p50/p95/p99) artışı ve throughput düşüşü `--threshold`
+yüzdesini aşarsa regresyon sayılır ve çıkış kodu 1 olur (CI'da kullanılabilir).
+
+Kullanım:
+    python -m benchmarks.compare benchmarks/results/load-A.json benchmarks/results/load-B.json
+    python -m benchmarks.compare base.json current.json --threshold 15 --metrics p95_ms,p99_ms
+"""
+
+import argparse
+import json
+import sys
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base: dict, current: dict, metrics=LATENCY_METRICS, threshold: float = 10.0):
+    """(satırlar, regresyon listesi) döner; değişimler yüzde cinsindendir."""
+    rows, regressions = [], []
+    for name in sorted(set(base["results"]) & set(current["results"])):
+        b, c = base["results"][name], current["results"][name]
+        deltas = {}
+        for metric in list(metrics) + ["throughput_per_s"]:
+            if not b.get(metric):
+                continue
+            delta = (c[metric] - b[metric]) / b[metric] * 100
+            deltas[metric] = delta
+            worse = -delta if metric == "throughput_per_s" else delta
+            if worse > threshold:
+                regressions.append((name, metric, b[metric], c[metric], delta))
+        rows.append((name, deltas))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sonuçlarını karşılaştır")
+    parser.add_argument("base")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regresyon eşiği (%%)")
+    parser.add_argument("--metrics", default=",".join(LATENCY_METRICS))
+    args = parser.parse_args()
+
+    base, current = _load(args.base), _load(args.current)
+    metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+    rows, regressions = compare(base, current, metrics, args.threshold)
+
+    print(f"base:    {args.base} ({base.get('git_commit')})")
+    print(f"current: {args.current} ({current.get('git_commit')})")
+    for name, deltas in rows:
+        cells = " ".join(f"{m}={d:+7.1f}%" for m, d in deltas.items())
+        print(f"{name:32s} {cells}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regresyon (eşik {args.threshold}%):")
+        for name, metric, b, c, delta in regressions:
+            print(f"  {name} {metric}: {b} → {c} ({delta:+.1f}%)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
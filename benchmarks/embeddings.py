@@ -0,0 +1,130 @@
+"""
+Embedding backend karşılaştırması.
+
+Fixture korpusunun chunk'larını her backend ile kodlar ve şunları raporlar:
+    * toplu kodlama throughput'u (chunk/sn)
+    * tek sorgu gecikmesi (p50/p95/p99)
+    * referans backend'e göre erişim uyumu: top-1 eşleşmesi, recall@k ve
+      aynı chunk için ortalama kosinüs benzerliği ve L2 uzaklığı
+
+Uyum ham (normalize edilmemiş) vektörler üzerinde, Chroma'nın varsayılan
+uzayı olan L2 uzaklığıyla ölçülür; backend'ler arasındaki norm farkı da
+böylece sonuca yansır.
+
+Kullanılamayan backend'ler (eksik paket / dışa aktarılmamış ONNX) atlanır.
+
+Kullanım:
+    python -m benchmarks.embeddings --backends torch,int8,onnx,onnx-int8 --threads 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import fixtures
+from benchmarks.common import format_row, summarize, write_results
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    return m / np.clip(np.linalg.norm(m, axis=1, keepdims=True), 1e-12, None)
+
+
+def _l2_ranking(queries: np.ndarray, docs: np.ndarray, k: int) -> np.ndarray:
+    """Sorgu başına kare L2 uzaklığına göre en yakın `k` doküman indeksi."""
+    distances = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ docs.T + (docs ** 2).sum(axis=1)
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def _queries(chunks, n: int):
+    """Chunk'lardan alınan cümle parçaları sorgu olarak kullanılır."""
+    step = max(1, len(chunks) // n)
+    return [" ".join(c.split()[5:15]) for c in chunks[::step][:n]]
+
+
+def _measure(backend: str, chunks, queries, threads: int, batch_size: int) -> dict:
+    from src import embeddings
+
+    embeddings.EMBED_THREADS = threads
+    embeddings.EMBED_BATCH_SIZE = batch_size
+    t0 = time.perf_counter()
+    fn = embeddings.create_embedding_function(backend)
+    load_s = time.perf_counter() - t0
+    fn(["warmup"])
+
+    t0 = time.perf_counter()
+    doc_vectors = np.asarray(fn(chunks), dtype=np.float32)
+    encode_s = time.perf_counter() - t0
+
+    latencies, query_vectors = [], []
+    start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        query_vectors.append(fn([q])[0])
+        latencies.append(time.perf_counter() - t)
+    stats = summarize(latencies, time.perf_counter() - start)
+    stats.update(
+        load_s=round(load_s, 3),
+        encode_chunks_per_s=round(len(chunks) / encode_s, 2),
+    )
+    return {"stats": stats, "docs": doc_vectors,
+            "queries": np.asarray(query_vectors, dtype=np.float32)}
+
+
+def _agreement(ref: dict, cur: dict, k: int) -> dict:
+    # Referans indeksi (ref docs) bu backend'in sorgularıyla aranır: karışık kullanım senaryosu
+    ref_top = _l2_ranking(ref["queries"], ref["docs"], k)
+    cur_top = _l2_ranking(cur["queries"], ref["docs"], k)
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, cur_top)]
+    cosine = np.sum(_normalize(ref["docs"]) * _normalize(cur["docs"]), axis=1)
+    return {
+        "top1_agreement": round(float(np.mean(ref_top[:, 0] == cur_top[:, 0])), 4),
+        f"recall_at_{k}": round(float(np.mean(overlap)), 4),
+        "mean_doc_cosine": round(float(np.mean(cosine)), 5),
+        "mean_doc_l2": round(float(np.mean(np.linalg.norm(ref["docs"] - cur["docs"], axis=1))), 5),
+        "mean_norm": round(float(np.mean(np.linalg.norm(cur["docs"], axis=1))), 5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend karşılaştırması")
+    parser.add_argument("--backends", default="torch,int8,onnx,onnx-int8")
+    parser.add_argument("--reference", default="torch", help="Uyumun ölçüleceği referans backend")
+    parser.add_argument("--doc-kb", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None, help="Varsayılan: EMBED_THREADS")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--out", help="Sonuç JSON yolu (varsayılan: benchmarks/results/)")
+    args = parser.parse_args()
+
+    from src import embeddings, rag
+
+    threads = args.threads or embeddings.EMBED_THREADS
+    chunks = rag.chunk_text(fixtures.corpus(args.doc_kb))
+    queries = _queries(chunks, args.queries)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if args.reference in backends:
+        backends.remove(args.reference)
+    backends.insert(0, args.reference)
+
+    measured, results = {}, {}
+    for backend in backends:
+        try:
+            measured[backend] = _measure(backend, chunks, queries, threads, args.batch_size)
+        except embeddings.EmbeddingBackendError as e:
+            print(f"{backend:32s} atlandı: {e}")
+            continue
+        results[backend] = measured[backend]["stats"]
+        if args.reference in measured and backend != args.reference:
+            results[backend].update(_agreement(measured[args.reference], measured[backend], args.top_k))
+        print(format_row(backend, results[backend]),
+              f"{results[backend]['encode_chunks_per_s']:.1f} chunk/s",
+              {k: v for k, v in results[backend].items() if k.startswith(("top1", "recall", "mean_"))})
+
+    config = {**vars(args), "threads": threads, "chunks": len(chunks)}
+    print(f"→ {write_results('embeddings', results, config, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
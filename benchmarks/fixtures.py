@@ -0,0 +1,134 @@
+"""
+Benchmark fixture dokümanları.
+
+Dokümanlar çalışma anında deterministik olarak üretilir (repo'ya ikili dosya
+eklenmez). Her format `rag.extract_text_from_file`'ın ilgili dalını çalıştırır.
+"""
+
+import io
+import json
+import random
+from typing import Dict
+
+TOPIC_WORDS = {
+    "product_basics": ["planlama", "rota", "zone", "xDock", "araç", "teslimat", "subzone", "rapor"],
+    "support_flow": ["talep", "kayıt", "eskalasyon", "SLA", "çözüm", "müşteri", "öncelik", "kapanış"],
+    "security_policy": ["erişim", "parola", "yetki", "denetim", "şifreleme", "log", "ihlal", "politika"],
+}
+FILLER = ["sistem", "süreç", "adım", "kullanıcı", "modül", "ekran", "kural", "veri", "işlem", "durum"]
+
+
+def corpus(kb: int = 32, seed: int = 7) -> str:
+    """Yaklaşık `kb` kilobayt uzunluğunda, paragraflara bölünmüş metin üretir."""
+    rng = random.Random(seed)
+    topics = list(TOPIC_WORDS)
+    paragraphs, size = [], 0
+    while size < kb * 1024:
+        words = TOPIC_WORDS[rng.choice(topics)] + FILLER
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(8, 16))).capitalize() + "."
+            for _ in range(rng.randint(3, 6))
+        ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph.encode("utf-8")) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _pdf(text: str) -> bytes:
+    """Harici bağımlılık olmadan, metin katmanlı basit bir PDF üretir."""
+    lines = []
+    for paragraph in text.encode("ascii", "replace").decode().split("\n"):
+        while paragraph:
+            lines.append(paragraph[:95])
+            paragraph = paragraph[95:]
+    pages = [lines[i:i + 60] for i in range(0, len(lines), 60)] or [[""]]
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines]
+        stream = "BT /F1 9 Tf 11 TL 36 806 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _docx(text: str) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    buf = io.BytesIO()
+    document.save(buf)
+    return buf.getvalue()
+
+
+def _pptx(text: str) -> bytes:
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    for paragraph in text.split("\n\n"):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6))
+        box.text_frame.text = paragraph
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def _xlsx(text: str) -> bytes:
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["id", "topic", "text"])
+    for i, paragraph in enumerate(text.split("\n\n")):
+        ws.append([i, "support_flow", paragraph])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _json(text: str) -> bytes:
+    paragraphs = text.split("\n\n")
+    items = [{"q": q, "a": a} for q, a in zip(paragraphs[::2], paragraphs[1::2])]
+    return json.dumps({"items": items}, ensure_ascii=False).encode("utf-8")
+
+
+BUILDERS = {
+    "txt": lambda t: t.encode("utf-8"),
+    "md": lambda t: ("# Fixture\n\n" + t).encode("utf-8"),
+    "json": _json,
+    "pdf": _pdf,
+    "docx": _docx,
+    "pptx": _pptx,
+    "xlsx": _xlsx,
+}
+
+
+def documents(kb: int = 32) -> Dict[str, bytes]:
+    """Format → (dosya adı, içerik) eşlemesi; her format aynı metinden üretilir."""
+    text = corpus(kb)
+    return {fmt: (f"fixture.{fmt}", build(text)) for fmt, build in BUILDERS.items()}
@@ -0,0 +1,167 @@
+"""
+Uçtan uca yük testi.
+
+Senaryolar: /chat, /quiz, /questions/random, /auth/login, /auth/submit-result.
+Her senaryo belirtilen eşzamanlılıkla `--requests` kadar istek gönderir ve
+p50/p95/p99 gecikme ile throughput raporlar.
+
+Varsayılan olarak uygulama süreç içinde (httpx ASGITransport) geçici DB'ler,
+bellek içi Chroma koleksiyonu ve süreç içi sahte LLM (`--llm-latency-ms`) ile
+çalışır; ağ veya Ollama gerekmez. `--llm sim` gerçek HTTP/stream yolunu da
+ölçmek için Ollama simülatörünü (`benchmarks/ollama_sim.py`) başlatır,
+`--ollama-url` ise var olan bir Ollama/simülatör adresini kullanır.
+`--base-url` verilirse çalışan bir sunucu ölçülür.
+
+Kullanım:
+    python -m benchmarks.load --requests 200 --concurrency 16
+    python -m benchmarks.load --scenarios login,questions_random
+    python -m benchmarks.load --llm sim --llm-latency-ms 200 --sim-tps 40
+    python -m benchmarks.load --base-url http://localhost:8000 --username u --password p
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from contextlib import nullcontext
+
+import httpx
+
+from benchmarks import fixtures, ollama_sim
+from benchmarks.common import FAKE_QUESTION, format_row, isolated_app, summarize, write_results
+
+USERNAME = "bench_user"
+PASSWORD = "bench-password-123"
+
+
+def _seed(doc_kb: int):
+    """Soru deposuna ve vektör deposuna örnek veri, users tablosuna bench kullanıcısı ekler."""
+    from src import auth, question_store, rag
+
+    question_store.save_questions(
+        {**FAKE_QUESTION, "topic": topic, "level": level, "stem": f"{FAKE_QUESTION['stem']} {topic}/{level}/{i}"}
+        for topic in ("product_basics", "support_flow", "security_policy")
+        for level in ("beginner", "intermediate", "advanced")
+        for i in range(20)
+    )
+    text = fixtures.corpus(doc_kb)
+    for topic in ("product_basics", "support_flow", "security_policy"):
+        rag.index_doc(f"fixture_{topic}.txt", text, topic=topic)
+
+    conn = auth.get_db()
+    conn.execute(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+        (USERNAME, "bench@example.com", auth.get_password_hash(PASSWORD)),
+    )
+    conn.commit()
+    conn.close()
+
+
+SCENARIOS = {
+    "chat": lambda c, h: c.post("/chat", json={"message": "Destek talebi nasıl eskale edilir?"}),
+    "quiz": lambda c, h: c.post("/quiz", params={"topic": "support_flow", "level": "beginner", "n": 2}),
+    "questions_random": lambda c, h: c.get("/questions/random", params={"topic": "support_flow"}),
+    "login": lambda c, h: c.post("/auth/login", data={"username": USERNAME, "password": PASSWORD}),
+    "submit_result": lambda c, h: c.post("/auth/submit-result", headers=h, json={
+        "topic": "support_flow", "difficulty": "beginner", "total_questions": 2,
+        "correct_answers": 1, "completed_at": "2025-01-01T10:00:00",
+        "questions_attempted": [
+            {"question_id": 1, "user_answer": "A", "correct_answer": "A", "is_correct": True},
+            {"question_id": 2, "user_answer": "B", "correct_answer": "A", "is_correct": False},
+        ],
+    }),
+}
+
+
+async def _scenario(client: httpx.AsyncClient, name: str, headers: dict, requests: int,
+                    concurrency: int) -> dict:
+    send = SCENARIOS[name]
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            t0 = time.perf_counter()
+            try:
+                r = await send(client, headers)
+                if r.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def _run(args, scenarios) -> dict:
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from src.app import app
+
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+        r = await client.post("/auth/login", data={"username": args.username, "password": args.password})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        for name in scenarios:
+            await _scenario(client, name, headers, min(args.warmup, args.requests), args.concurrency)
+            results[name] = await _scenario(client, name, headers, args.requests, args.concurrency)
+            print(format_row(name, results[name]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uçtan uca yük testi")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100, help="Senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--llm", choices=["fake", "sim"], default="fake",
+                        help="fake: süreç içi sahte generate, sim: HTTP simülatörü")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Sahte LLM gecikmesi / simülatör TTFT")
+    parser.add_argument("--sim-tps", type=float, default=200, help="Simülatör token/sn hızı")
+    parser.add_argument("--ollama-url", help="Var olan Ollama (veya simülatör) adresi")
+    parser.add_argument("--doc-kb", type=int, default=16)
+    parser.add_argument("--base-url", help="Süreç içi yerine çalışan sunucuyu ölç")
+    parser.add_argument("--username", default=USERNAME)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--out", help="Sonuç JSON yolu (varsayılan: benchmarks/results/)")
+    args = parser.parse_args()
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Bilinmeyen senaryo: {', '.join(sorted(unknown))}")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sim = None
+    ollama_url = args.ollama_url
+    if args.llm == "sim" and not ollama_url and not args.base_url:
+        sim, ollama_url = ollama_sim.serve_in_thread(
+            ollama_sim.SimConfig(ttft_ms=args.llm_latency_ms, tokens_per_sec=args.sim_tps)
+        )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = nullcontext() if args.base_url else isolated_app(
+                tmp, args.llm_latency_ms / 1000, fake_llm=ollama_url is None, ollama_url=ollama_url,
+            )
+            with env:
+                if not args.base_url:
+                    _seed(args.doc_kb)
+                results = asyncio.run(_run(args, scenarios))
+    finally:
+        if sim is not None:
+            sim.should_exit = True
+
+    path = write_results("load", results, vars(args), args.out)
+    print(f"→ {path}")
+
+
+if __name__ == "__main__":
+    main()
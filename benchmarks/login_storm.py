@@ -0,0 +1,138 @@
+"""
+Login storm benchmark.
+
+Aynı anda çok sayıda /auth/login isteği gönderir ve iki şeyi ölçer:
+  * login throughput (istek/sn)
+  * storm sırasında hafif bir endpoint'in (/ping) gecikmesi — event loop'un
+    bcrypt yüzünden bloklanıp bloklanmadığını gösterir.
+
+"inline" modu eski davranışı (bcrypt doğrudan event loop üzerinde) taklit eder,
+"offload" modu mevcut `auth.login` endpoint'ini kullanır. Ardından önbellekli ve
+önbelleksiz `get_current_user` maliyeti karşılaştırılır.
+
+Kullanım:
+    python -m benchmarks.login_storm --logins 40 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+import src.auth as auth
+
+USERNAME = "bench_user"
+PASSWORD = "bench-password-123"
+
+
+def _setup_db(path: str):
+    auth.DATABASE = path
+    auth.init_users_db()
+    conn = auth.get_db()
+    conn.execute(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+        (USERNAME, "bench@example.com", auth.get_password_hash(PASSWORD)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _build_app(mode: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if mode == "offload":
+        app.include_router(auth.router)
+    else:
+        # Eski davranış: bcrypt doğrulaması event loop üzerinde
+        @app.post("/auth/login")
+        async def login_inline(form_data: OAuth2PasswordRequestForm = Depends()):
+            user = auth.get_user_by_username(form_data.username)
+            if not user or not auth.verify_password(form_data.password, user["hashed_password"]):
+                raise HTTPException(status_code=401)
+            return {"access_token": auth.create_access_token({"sub": user["username"]})}
+
+    return app
+
+
+async def _storm(app: FastAPI, logins: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    sem = asyncio.Semaphore(concurrency)
+    ping_latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one_login():
+            async with sem:
+                r = await client.post(
+                    "/auth/login", data={"username": USERNAME, "password": PASSWORD}
+                )
+                r.raise_for_status()
+
+        async def pinger():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(0.01)
+
+        ping_task = asyncio.create_task(pinger())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(logins)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await ping_task
+
+    ping_latencies.sort()
+    return {
+        "logins_per_sec": round(logins / elapsed, 2),
+        "elapsed_s": round(elapsed, 3),
+        "ping_p50_ms": round(statistics.median(ping_latencies), 2) if ping_latencies else None,
+        "ping_max_ms": round(ping_latencies[-1], 2) if ping_latencies else None,
+        "ping_samples": len(ping_latencies),
+    }
+
+
+def _bench_principal(iterations: int) -> dict:
+    token = auth.create_access_token({"sub": USERNAME}, expires_delta=timedelta(minutes=30))
+    results = {}
+    for label, cached in (("uncached", False), ("cached", True)):
+        auth.principal_cache.clear()
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            if not cached:
+                auth.principal_cache.clear()
+            auth.get_current_user(token)
+        elapsed = time.perf_counter() - t0
+        results[f"get_current_user_{label}_us"] = round(elapsed / iterations * 1e6, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=2000, help="get_current_user tekrar sayısı")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_db(os.path.join(tmp, "bench.db"))
+        for mode in ("inline", "offload"):
+            result = asyncio.run(_storm(_build_app(mode), args.logins, args.concurrency))
+            print(f"{mode:8s} {result}")
+        print(_bench_principal(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Mikro benchmark'lar.
+
+RAG ve soru deposunun sıcak fonksiyonlarını tek tek ölçer:
+    chunk_text, extract_text_from_file (format başına), index_doc, search,
+    context_pack, question_hash, save_question
+
+Tüm çalışma geçici dizinde ve bellek içi Chroma koleksiyonunda yapılır; Ollama
+gerekmez. Embedding modeli (e5) yerel önbellekte bulunmalıdır.
+
+Kullanım:
+    python -m benchmarks.micro --iterations 50 --doc-kb 32
+    python -m benchmarks.micro --only chunk_text,question_hash
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks import fixtures
+from benchmarks.common import FAKE_QUESTION, format_row, isolated_app, summarize, write_results
+
+
+def _run(fn: Callable[[int], object], iterations: int, warmup: int = 2) -> dict:
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def _question(i: int) -> dict:
+    return {**FAKE_QUESTION, "stem": f"{FAKE_QUESTION['stem']} #{i}"}
+
+
+def _cases(doc_kb: int):
+    from src import context_pack, llm, question_store, rag
+
+    text = fixtures.corpus(doc_kb)
+    retrieved = {"documents": [rag.chunk_text(text)[:5]], "metadatas": [[{"doc_id": "bench.txt"}] * 5]}
+    docs = fixtures.documents(doc_kb)
+    query = "destek talebi eskalasyon süreci"
+
+    cases = [("chunk_text", lambda i: rag.chunk_text(text), 20)]
+    for fmt, (filename, raw) in docs.items():
+        cases.append((f"extract_text_from_file[{fmt}]",
+                      lambda i, f=filename, r=raw: rag.extract_text_from_file(f, r), 1))
+    cases += [
+        ("index_doc", lambda i: rag.index_doc(f"bench_{i}.txt", text, topic="support_flow"), 1),
+        ("search", lambda i: rag.search(query, top_k=5), 1),
+        ("context_pack", lambda i: context_pack.pack(retrieved, llm.DEFAULT_MODEL, use="question"), 20),
+        ("question_hash", lambda i: question_store.question_hash(_question(i)), 100),
+        ("save_question", lambda i: question_store.save_question(_question(i)), 4),
+    ]
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikro benchmark'lar")
+    parser.add_argument("--iterations", type=int, default=30, help="Ağır işlemler için tekrar sayısı")
+    parser.add_argument("--doc-kb", type=int, default=32, help="Fixture doküman boyutu (KB)")
+    parser.add_argument("--only", help="Virgülle ayrılmış benchmark adı önekleri")
+    parser.add_argument("--out", help="Sonuç JSON yolu (varsayılan: benchmarks/results/)")
+    args = parser.parse_args()
+    only = [p.strip() for p in args.only.split(",")] if args.only else None
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, isolated_app(tmp):
+        for name, fn, multiplier in _cases(args.doc_kb):
+            if only and not any(name.startswith(p) for p in only):
+                continue
+            results[name] = _run(fn, args.iterations * multiplier)
+            print(format_row(name, results[name]))
+
+    path = write_results("micro", results, vars(args), args.out)
+    print(f"→ {path}")
+
+
+if __name__ == "__main__":
+    main()
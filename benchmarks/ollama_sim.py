@@ -0,0 +1,226 @@
+"""
+Ollama uyumlu simülatör.
+
+Gerçek bir model olmadan deterministik performans testi için `/api/generate`
+(stream ve stream'siz) ile `/api/tags` endpoint'lerini taklit eder. İlk token
+süresi (TTFT), token/sn hızı ve hata oranı ayarlanabilir; JSON istenen
+prompt'lara hazır soru JSON'u, diğerlerine kısa bir sohbet yanıtı döner.
+
+Kullanım:
+    python -m benchmarks.ollama_sim --port 11435 --ttft-ms 200 --tps 40 --error-rate 0.02
+    OLLAMA_BASE_URL=http://127.0.0.1:11435 make dev
+
+Hazır sorular `--payloads sorular.json` (soru sözlüklerinden oluşan liste) ile
+değiştirilebilir; sırayla döndürülür.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_QUESTIONS = [
+    {
+        "type": "mcq",
+        "stem": "Destek talebi ilk olarak hangi adımda kayıt altına alınır?",
+        "choices": ["A) Talep açılışı", "B) Eskalasyon", "C) Kapanış", "D) Raporlama"],
+        "answer": "A",
+        "answer_index": 0,
+        "expected": "Talep açılışı",
+        "rationale": "Her talep açılış adımında sisteme kaydedilir.",
+    },
+    {
+        "type": "truefalse",
+        "stem": "Zone yönetimi teslimat planlamasını etkilemez.",
+        "choices": ["Doğru", "Yanlış"],
+        "answer": False,
+        "answer_index": 1,
+        "expected": "Yanlış",
+        "rationale": "Zone tanımları rota planlamasının girdisidir.",
+    },
+    {
+        "type": "openended",
+        "stem": "Parola politikasının temel amacı nedir?",
+        "choices": [],
+        "answer": "Yetkisiz erişimi önlemek",
+        "answer_index": None,
+        "expected": "Yetkisiz erişimi önlemek",
+        "rationale": "Güçlü parolalar hesapların ele geçirilmesini zorlaştırır.",
+    },
+]
+CHAT_ANSWER = (
+    "Talep önce kayıt altına alınır, ardından öncelik belirlenir ve gerekirse "
+    "ilgili ekibe eskale edilir. Çözüm sonrası müşteri onayı ile kapatılır."
+)
+_FIELD_PATTERNS = {
+    "topic": [r"KONU:\s*([\w-]+)", r'"topic":\s*"([\w-]+)"'],
+    "level": [r"ZORLUK:\s*([\w-]+)", r'"level":\s*"([\w-]+)"', r"(\w+) seviyesinde"],
+    "type": [r'"type":\s*"([\w-]+)"', r"(\w+) (?:formatında|tipi)"],
+}
+
+
+@dataclass
+class SimConfig:
+    ttft_ms: float = 150.0
+    tokens_per_sec: float = 40.0
+    error_rate: float = 0.0
+    jitter: float = 0.0
+    seed: int = 42
+    models: List[str] = field(default_factory=lambda: ["llama3:instruct", "mistral"])
+    questions: List[dict] = field(default_factory=lambda: list(DEFAULT_QUESTIONS))
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\s*\S+", text)
+
+
+def _prompt_field(prompt: str, name: str) -> Optional[str]:
+    for pattern in _FIELD_PATTERNS[name]:
+        m = re.search(pattern, prompt)
+        if m:
+            return m.group(1)
+    return None
+
+
+def create_app(config: Optional[SimConfig] = None) -> FastAPI:
+    config = config or SimConfig()
+    app = FastAPI(title="ollama-sim")
+    rng = random.Random(config.seed)
+    counter = itertools.count(1)
+    questions = itertools.cycle(config.questions)
+    lock = threading.Lock()
+
+    def _delay(base: float) -> float:
+        return max(0.0, base * (1 + rng.uniform(-config.jitter, config.jitter))) if config.jitter else base
+
+    def _completion(prompt: str, wants_json: bool) -> str:
+        if not wants_json:
+            return CHAT_ANSWER
+        with lock:
+            n = next(counter)
+            q = dict(next(questions))
+        for name in ("topic", "level", "type"):
+            value = _prompt_field(prompt, name)
+            if value:
+                q[name] = value
+        q.setdefault("topic", "support_flow")
+        q.setdefault("level", "beginner")
+        q["stem"] = f"{q['stem']} (#{n})"  # hash tekilleştirmesine takılmasın
+        return json.dumps(q, ensure_ascii=False)
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": m, "model": m, "size": 0} for m in config.models]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        model = body.get("model", config.models[0])
+        prompt = body.get("prompt", "")
+        options = body.get("options") or {}
+        wants_json = (
+            body.get("format") == "json" or options.get("format") == "json" or "JSON" in prompt.upper()
+        )
+
+        with lock:
+            failed = rng.random() < config.error_rate
+        if failed:
+            await asyncio.sleep(_delay(config.ttft_ms / 1000))
+            return JSONResponse({"error": "simulated model failure"}, status_code=500)
+
+        tokens = _tokens(_completion(prompt, wants_json))
+        limit = options.get("num_predict") or body.get("num_predict")
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        ttft = _delay(config.ttft_ms / 1000)
+        per_token = 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+        started = time.perf_counter()
+
+        def final_chunk() -> dict:
+            total = time.perf_counter() - started
+            return {
+                "model": model, "response": "", "done": True, "done_reason": "stop",
+                "total_duration": int(total * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": max(1, len(prompt) // 4),
+                "prompt_eval_duration": int(ttft * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(max(total - ttft, 1e-6) * 1e9),
+            }
+
+        if not body.get("stream", True):
+            await asyncio.sleep(ttft + per_token * max(len(tokens) - 1, 0))
+            return {**final_chunk(), "response": "".join(tokens)}
+
+        async def stream():
+            await asyncio.sleep(ttft)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(_delay(per_token))
+                yield json.dumps({"model": model, "response": token, "done": False}, ensure_ascii=False) + "\n"
+            yield json.dumps(final_chunk(), ensure_ascii=False) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def serve_in_thread(config: Optional[SimConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """Simülatörü arka plan thread'inde başlatır; (server, base_url) döner.
+
+    `port=0` boş bir port seçer. Durdurmak için `server.should_exit = True`.
+    """
+    import socket
+
+    import uvicorn
+
+    if port == 0:
+        with socket.socket() as s:
+            s.bind((host, 0))
+            port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="ollama-sim", daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.01)
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama uyumlu simülatör")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=150.0, help="İlk token süresi")
+    parser.add_argument("--tps", type=float, default=40.0, help="Saniyedeki token sayısı")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0–1 arası HTTP 500 oranı")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Gecikmelere ±oran rastgelelik")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--models", default="llama3:instruct,mistral")
+    parser.add_argument("--payloads", help="Hazır soru listesi (JSON dosyası)")
+    args = parser.parse_args()
+
+    config = SimConfig(
+        ttft_ms=args.ttft_ms, tokens_per_sec=args.tps, error_rate=args.error_rate,
+        jitter=args.jitter, seed=args.seed, models=[m for m in args.models.split(",") if m],
+    )
+    if args.payloads:
+        with open(args.payloads, encoding="utf-8") as f:
+            config.questions = json.load(f)
+
+    import uvicorn
+
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Yükleme başına tepe bellek (RSS) benchmark'ı.
+
+Her format ve boyut için `/index`'in ayrıştırma yolu ayrı bir alt süreçte iki
+kipte çalıştırılır ve alt sürecin tepe RSS artışı (`ru_maxrss`, importlardan
+sonraki taban çizgisine göre) raporlanır:
+
+  * buffered: eski davranış — yükleme `read()` ile belleğe alınır, ayrıştırıcılar
+    bytes'tan okur.
+  * spooled:  mevcut davranış — yükleme geçici dosyada kalır, ayrıştırıcılar
+    dosyadan ya da mmap'ten okur.
+
+Embedding ve vektör deposu yazımı ölçüme dahil değildir (chunk'lar yalnızca
+sayılır); ölçülen, yükleme ve ayrıştırmanın bellek maliyetidir.
+
+Kullanım:
+    python -m benchmarks.uploads --mb 16,64 --formats txt,jsonl,json,xlsx
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import write_results
+from benchmarks.fixtures import FILLER, TOPIC_WORDS
+
+WORDS = FILLER + [w for words in TOPIC_WORDS.values() for w in words]
+
+
+# -----------------------
+# Fixture dosyaları
+# -----------------------
+def _line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(12))
+
+
+def build(fmt: str, mb: int, path: str):
+    """Yaklaşık `mb` megabaytlık fixture'ı doğrudan diske yazar (bellekte tutmaz)."""
+    rng = random.Random(7)
+    target = mb * 1024 * 1024
+    if fmt == "xlsx":
+        import openpyxl
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Kayıtlar")
+        ws.append(["id", "konu", "metin"])
+        # xlsx sıkıştırılır; hedef boyut ham hücre metni üzerinden yaklaşık tutulur
+        for i in range(target // 100):
+            ws.append([i, rng.choice(list(TOPIC_WORDS)), _line(rng)])
+        wb.save(path)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "json":
+            f.write('{"items": [')
+        written, i = 0, 0
+        while written < target:
+            if fmt == "txt":
+                line = _line(rng) + "\n"
+            else:
+                record = json.dumps({"id": i, "q": _line(rng), "a": _line(rng)}, ensure_ascii=False)
+                line = (record + "\n") if fmt == "jsonl" else ("," if i else "") + record
+            f.write(line)
+            written += len(line)
+            i += 1
+        if fmt == "json":
+            f.write("]}")
+
+
+# -----------------------
+# Alt süreç ölçümü
+# -----------------------
+def _maxrss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+
+def child(mode: str, fmt: str, path: str):
+    from src import extract_cache, rag
+
+    extract_cache.cache.enabled = False  # iki kip de dosyayı gerçekten ayrıştırsın
+    if fmt == "xlsx":
+        import openpyxl  # noqa: F401 — import maliyeti taban çizgisine girsin
+    filename = f"upload.{fmt}"
+    baseline = _maxrss_mb()
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        source = f.read() if mode == "buffered" else f
+        chunks = rag.extract_chunks(filename, source)
+        if chunks is not None:
+            n = sum(1 for _ in chunks)
+        else:
+            n = len(rag.chunk_text(rag.extract_text_from_file(filename, source)))
+    print(json.dumps({
+        "chunks": n,
+        "seconds": round(time.perf_counter() - start, 3),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_delta_mb": round(_maxrss_mb() - baseline, 1),
+    }))
+
+
+def measure(mode: str, fmt: str, path: str) -> dict:
+    out = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.uploads", "--child", mode, fmt, path], text=True
+    )
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", default="16,64", help="Virgülle ayrılmış dosya boyutları (MB)")
+    parser.add_argument("--formats", default="txt,jsonl,json,xlsx")
+    parser.add_argument("--out", default=None, help="Sonuç JSON yolu (varsayılan: benchmarks/results/)")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.formats.split(","):
+            for mb in (int(x) for x in args.mb.split(",")):
+                path = os.path.join(tmp, f"fixture-{mb}.{fmt}")
+                build(fmt, mb, path)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                for mode in ("buffered", "spooled"):
+                    r = measure(mode, fmt, path)
+                    r["file_mb"] = round(size_mb, 1)
+                    results[f"{fmt}[{mb}MB]/{mode}"] = r
+                    print(f"{fmt + f'[{mb}MB]':14s} {mode:9s} file={size_mb:7.1f}MB "
+                          f"peak_rss=+{r['peak_rss_delta_mb']:7.1f}MB chunks={r['chunks']:<7d} {r['seconds']:.2f}s")
+                os.remove(path)
+
+    path = write_results("uploads", results, {"mb": args.mb, "formats": args.formats}, args.out)
+    print(f"sonuçlar: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# gunicorn.conf.py
+"""
+Pre-fork çok worker'lı çalışma:  gunicorn -c gunicorn.conf.py src.app:app
+
+Uygulama ve embedding modeli master süreçte yüklenir (`preload_app`), worker'lar
+fork ile oluşturulur ve model ağırlıklarını copy-on-write paylaşır. Ayrıntılar
+için bkz. src/workers.py.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))  # LLM çağrıları uzun sürebilir
+
+
+def when_ready(server):
+    from src import workers as app_workers
+
+    app_workers.WEB_CONCURRENCY = workers
+    app_workers.preload()
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, APIRouter, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
@@ -6,13 +7,18 @@ from typing import Optional, List
 import sqlite3
 import bcrypt
 from jose import jwt, JWTError
-from datetime import datetime, timedelta
-import requests
+from datetime import date, datetime, timedelta
 import json
-import chromadb
-from chromadb.utils import embedding_functions
 import re
 import uuid
+from src.auth import attempts_generation, principal_cache, load_principal
+from src import (answers, context_pack, extract_cache, health, http_cache, llm, metrics, profiling,
+                 question_store, rag, scheduler, stats)
+from src.logs import get_logger
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, EXPORT_BATCH_SIZE, MAX_PAGE_SIZE,
+    date_range_clause, encode_cursor, keyset_clause,
+)
 
 # -----------------------
 # Config
@@ -23,18 +29,8 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 DATABASE = "quiz.db"
 USERDB = "quiz.db"
-OLLAMA_URL = "http://localhost:11434"
-
-# ChromaDB Setup
-EMBED_MODEL = "intfloat/multilingual-e5-large"
-client = chromadb.PersistentClient(path="chroma_data")
-sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name=EMBED_MODEL
-)
-collection = client.get_or_create_collection(
-    name="knowledge_bot",
-    embedding_function=sentence_transformer_ef
-)
+OLLAMA_MODEL = llm.DEFAULT_MODEL
+log = get_logger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -51,27 +47,21 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
     payload = decode_token(token)
     username = payload.get("sub")
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    conn = sqlite3.connect(USERDB)
-    c = conn.cursor()
-    c.execute("SELECT id, username, email, is_admin FROM users WHERE username = ?", (username,))
-    user = c.fetchone()
-    conn.close()
-
-    print("👤 User from DB:", user)
+    user = load_principal(username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return {
-        "id": user[0],
-        "username": user[1],
-        "email": user[2],
-        "is_admin": bool(user[3]),
-    }
+    principal_cache.put(token, user, payload.get("exp"))
+    return user
 
 def get_current_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
     if not current_user.get("is_admin"):
@@ -81,29 +71,23 @@ def get_current_admin_user(current_user: dict = Depends(get_current_user)) -> di
 # -----------------------
 # RAG helper
 # -----------------------
-def retrieve_context(topic: str, top_k: int = 3, max_chars: int = 3000) -> str:
+def retrieve_context(topic: str, top_k: int = 3) -> str:
     try:
-        results = collection.query(
-            query_texts=[topic],
-            n_results=top_k,
-            where={"topic": topic},
-        )
-        if not results["documents"][0]:
-            results = collection.query(query_texts=[topic], n_results=top_k)
-
-        chunks = results["documents"][0] if results["documents"] else []
-        context = ""
-        for chunk in chunks:
-            if len(context) + len(chunk) <= max_chars:
-                context += chunk + "\n\n"
-            else:
-                context += chunk[: max_chars - len(context)] + "..."
-                break
-
-        print(f"📚 Retrieved {len(chunks)} chunks for topic: {topic}")
-        return context.strip()
-    except Exception as e:
-        print("❌ Error retrieving context:", e)
+        with metrics.stage("retrieval"):
+            # Vektör deposu ve embedding modeli rag.py'de paylaşılır
+            results = rag.search(topic, top_k=top_k, where={"topic": topic})
+            if not results["documents"][0]:
+                results = rag.search(topic, top_k=top_k)
+
+        # Örtüşen chunk'lar birleştirilir, model profilinin token bütçesine sığdırılır
+        packed = context_pack.pack(results, OLLAMA_MODEL, use="question")
+        log.debug("context retrieved", extra={"topic": topic, "chunks": packed.chunks,
+                                              "tokens": packed.tokens, "saved_tokens": packed.saved_tokens})
+        return packed.text
+    except health.Unavailable:
+        raise  # vektör deposu devresi açık: "doküman yok" yerine 503 + Retry-After
+    except Exception:
+        log.exception("context retrieval failed", extra={"topic": topic})
         return ""
 
 # -----------------------
@@ -155,44 +139,32 @@ FORMAT:
 """
 
     try:
-        response = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": "llama3:instruct",  # Alternatif: "llama3.2"
-                "prompt": prompt,
-                "stream": True,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "num_predict": 800,
-                    "format": "json"  # Yeni Ollama sürümlerinde JSON-only kip
-                },
-            },
+        data = llm.generate(
+            prompt,
+            model=OLLAMA_MODEL,  # Alternatif: "llama3.2"
             stream=True,
-            timeout=None,
+            options={
+                "temperature": 0.3,
+                "top_p": 0.9,
+                "num_predict": 800,
+                "format": "json"  # Yeni Ollama sürümlerinde JSON-only kip
+            },
         )
+        full_text = data.get("response", "")
 
-        full_text = ""
-        for line in response.iter_lines():
-            if line:
-                try:
-                    chunk = json.loads(line)
-                    if "response" in chunk:
-                        full_text += chunk["response"]
-                except Exception:
-                    continue
-
-        print("🟢 Full Ollama response (first 800 chars):")
-        print(full_text[:800])
+        log.debug("ollama response", extra={"payload": full_text[:800], "sample": True})
 
         if not full_text.strip():
-            print("⚠️ Ollama boş çıktı üretti.")
+            log.warning("ollama returned empty output", extra={"topic": topic, "qtype": question_type})
             raise ValueError("Empty response from Ollama")
 
-        return parse_ollama_response(full_text, question_type, topic, level)
+        with metrics.stage("parse"):
+            return parse_ollama_response(full_text, question_type, topic, level)
 
+    except (scheduler.Busy, health.Unavailable):
+        raise
     except Exception as e:
-        print("❌ Ollama error:", str(e))
+        log.error("ollama generation failed: %s", e, extra={"topic": topic, "qtype": question_type})
         raise HTTPException(status_code=500, detail=f"Ollama error: {str(e)}")
 
 
@@ -201,11 +173,10 @@ FORMAT:
 # -----------------------
 def parse_ollama_response(text: str, q_type: str, topic: str, level: str) -> dict:
     """Ollama yanıtını JSON olarak parse eder, fallback oluşturur."""
-    print("📝 Parsing Ollama response...")
     text = text.strip()
 
     if "ERROR_JSON" in text:
-        print("⚠️ Model explicitly returned ERROR_JSON.")
+        log.warning("model returned ERROR_JSON", extra={"topic": topic, "qtype": q_type})
         return {
             "type": q_type,
             "topic": topic,
@@ -221,8 +192,7 @@ def parse_ollama_response(text: str, q_type: str, topic: str, level: str) -> dic
     # JSON gövdesini regex ile ayıkla
     match = re.search(r"\{[\s\S]*\}", text)
     if not match:
-        print("⚠️ No JSON braces found in model output.")
-        print("🔴 Raw model output:\n", repr(text[:500]))
+        log.warning("no JSON object in model output", extra={"payload": text[:500], "topic": topic})
         return {
             "type": q_type,
             "topic": topic,
@@ -236,7 +206,6 @@ def parse_ollama_response(text: str, q_type: str, topic: str, level: str) -> dic
         }
 
     json_text = match.group(0)
-    print("🔍 Extracted JSON snippet:", json_text[:200])
 
     try:
         data = json.loads(json_text)
@@ -251,12 +220,10 @@ def parse_ollama_response(text: str, q_type: str, topic: str, level: str) -> dic
             "expected": data.get("expected", ""),
             "rationale": data.get("rationale", ""),
         }
-        print("✅ Parsed question:", question["stem"][:100])
         return question
 
     except Exception as e:
-        print("❌ JSON parse error:", str(e))
-        print("🔴 Raw model output (parse fail):", repr(text[:500]))
+        log.warning("JSON parse error: %s", e, extra={"payload": text[:500], "topic": topic})
         return {
             "type": q_type,
             "topic": topic,
@@ -274,7 +241,8 @@ def parse_ollama_response(text: str, q_type: str, topic: str, level: str) -> dic
 # Endpoints
 # -----------------------
 @router.post("/generate-random-question", tags=["admin"])
-async def generate_random_question_rag(current_user: dict = Depends(get_current_admin_user)):
+@scheduler.priority("admin")
+def generate_random_question_rag(current_user: dict = Depends(get_current_admin_user)):
     import random
     types = ["mcq", "true_false", "short_answer"]
     topics = ["product_basics", "design_thinking", "user_research", "prototyping"]
@@ -290,95 +258,211 @@ async def generate_random_question_rag(current_user: dict = Depends(get_current_
 
     question_data = generate_with_ollama_rag(q_type, topic, level, context)
 
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute(
-        """
-        INSERT INTO questions (type, topic, level, stem, choices, answer, answer_index, expected, rationale)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            question_data["type"],
-            question_data["topic"],
-            question_data["level"],
-            question_data["stem"],
-            json.dumps(question_data["choices"], ensure_ascii=False),
-            question_data["answer"],
-            question_data["answer_index"],
-            question_data.get("expected", ""),
-            question_data.get("rationale", ""),
-        ),
-    )
-    conn.commit()
-    qid = c.lastrowid
-    conn.close()
-    print(f"💾 Question saved to DB with ID: {qid}")
+    with metrics.stage("sqlite"):
+        qid = question_store.save_question({**question_data, "source_model": OLLAMA_MODEL})
+    log.info("question saved", extra={"question_id": qid, "topic": topic})
 
     return {"status": "success", "question": {"id": qid, **question_data}}
 
 @router.delete("/questions/{qid}", tags=["admin"])
 async def delete_question(qid: int, current_user: dict = Depends(get_current_admin_user)):
     """Veritabanından bir soruyu siler."""
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("SELECT id FROM questions WHERE id = ?", (qid,))
-    row = c.fetchone()
-
-    if not row:
-        conn.close()
+    if not question_store.delete_question(qid):
         raise HTTPException(status_code=404, detail=f"Question with id={qid} not found.")
 
-    c.execute("DELETE FROM questions WHERE id = ?", (qid,))
-    conn.commit()
-    conn.close()
-
-    print(f"🗑️ Question deleted with ID: {qid}")
+    log.info("question deleted", extra={"question_id": qid})
     return {"status": "deleted", "id": qid}
 
+ACTIVITY_COLUMNS = """
+    qa.id AS attempt_id,
+    u.username AS username,
+    qa.user_id,
+    qa.quiz_date,
+    qa.topic,
+    qa.difficulty,
+    qa.total_questions,
+    qa.correct_answers,
+    qa.score,
+    qa.questions_attempted
+"""
+
+def _activity_row(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["attempt_id"],
+        "user_id": row["user_id"],
+        "username": row["username"],
+        "quiz_date": row["quiz_date"],
+        "topic": row["topic"],
+        "difficulty": row["difficulty"],
+        "total_questions": row["total_questions"],
+        "correct_answers": row["correct_answers"],
+        "score": row["score"],
+        "questions_attempted": json.loads(row["questions_attempted"]) if row["questions_attempted"] else []
+    }
+
+def _activity_query(user_id, username, topic, date_from, date_to, cursor):
+    clauses, params = date_range_clause("qa.quiz_date", date_from, date_to)
+    if user_id is not None:
+        clauses.append("qa.user_id = ?")
+        params.append(user_id)
+    if username:
+        clauses.append("qa.user_id = (SELECT id FROM users WHERE username = ?)")
+        params.append(username)
+    if topic:
+        clauses.append("qa.topic = ?")
+        params.append(topic)
+    keyset, keyset_params = keyset_clause(("qa.quiz_date", "qa.id"), cursor)
+    if keyset:
+        clauses.append(keyset)
+        params.extend(keyset_params)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"""
+        SELECT {ACTIVITY_COLUMNS}
+        FROM quiz_attempts qa
+        JOIN users u ON qa.user_id = u.id
+        {where}
+        ORDER BY qa.quiz_date DESC, qa.id DESC
+    """
+    return sql, params
+
+def _stream_activity(sql: str, params: list):
+    """Sonuçları NDJSON olarak parça parça üretir; bellekte tek seferde bir batch tutulur."""
+    conn = sqlite3.connect(DATABASE)
+    conn.row_factory = sqlite3.Row
+    try:
+        c = conn.execute(sql, params)
+        while True:
+            rows = c.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield "".join(json.dumps(_activity_row(r), ensure_ascii=False) + "\n" for r in rows)
+    finally:
+        conn.close()
+
 @router.get("/user-activity")
-async def get_user_activity(current_user: dict = Depends(get_current_admin_user)):
-    """Admin panelinde: tüm kullanıcıların quiz aktivitelerini döner."""
+async def get_user_activity(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın next_cursor değeri"),
+    user_id: Optional[int] = None,
+    username: Optional[str] = None,
+    topic: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: dict = Depends(get_current_admin_user),
+):
+    """Admin panelinde: kullanıcıların quiz aktivitelerini sayfalı döner.
+
+    `format=ndjson` ile filtreye uyan tüm kayıtlar satır satır stream edilir.
+    """
+    not_modified = http_cache.conditional(request, response, attempts_generation)
+    if not_modified:
+        return not_modified
+    sql, params = _activity_query(user_id, username, topic, date_from, date_to, cursor)
+
+    if format == "ndjson":
+        return StreamingResponse(_stream_activity(sql, params), media_type="application/x-ndjson")
+
     conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    c.execute("""
-        SELECT 
-            qa.id AS attempt_id,
-            u.username AS username,
-            qa.user_id,
-            qa.quiz_date,
-            qa.topic,
-            qa.difficulty,
-            qa.total_questions,
-            qa.correct_answers,
-            qa.score,
-            qa.questions_attempted
-        FROM quiz_attempts qa
-        JOIN users u ON qa.user_id = u.id
-        ORDER BY qa.quiz_date DESC
-    """)
-    
-    rows = c.fetchall()
-    conn.close()
-    
-    # Tüm sonuçları JSON olarak döndür
-    results = []
-    for row in rows:
-        results.append({
-            "id": row["attempt_id"],
-            "user_id": row["user_id"],
-            "username": row["username"],
-            "quiz_date": row["quiz_date"],
-            "topic": row["topic"],
-            "difficulty": row["difficulty"],
-            "total_questions": row["total_questions"],
-            "correct_answers": row["correct_answers"],
-            "score": row["score"],
-            "questions_attempted": json.loads(row["questions_attempted"]) if row["questions_attempted"] else []
-        })
-    
-    return results
+    try:
+        rows = conn.execute(sql + " LIMIT ?", params + [limit + 1]).fetchall()
+    finally:
+        conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["quiz_date"], last["attempt_id"])
+
+    return {"items": [_activity_row(r) for r in rows], "next_cursor": next_cursor}
+
+
+@router.get("/stats")
+async def get_dashboard_stats(current_user: dict = Depends(get_current_admin_user)):
+    """Admin paneli için konu bazlı özet istatistikler (rollup tablolarından)."""
+    conn = sqlite3.connect(DATABASE)
+    try:
+        c = conn.cursor()
+        topics = stats.get_topic_stats(c)
+        c.execute("SELECT COUNT(*), COALESCE(SUM(total_quizzes), 0) FROM user_stats")
+        active_users, total_quizzes = c.fetchone()
+    finally:
+        conn.close()
+
+    return {
+        "active_users": active_users,
+        "total_quizzes": total_quizzes,
+        "topics": topics,
+    }
+
+
+@router.get("/extract-cache")
+def get_extract_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    """Çıkarım önbelleği: isabet/ıska, yazılan ve silinen girdiler, diskteki boyut."""
+    return extract_cache.cache.stats()
+
+
+@router.get("/questions/accuracy")
+async def get_question_accuracy(
+    topic: Optional[str] = None,
+    min_attempts: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_admin_user),
+):
+    """Soru bazlı doğruluk oranları (en çok yanlış yapılanlar önce)."""
+    conn = sqlite3.connect(DATABASE)
+    try:
+        return {"items": answers.question_accuracy(conn.cursor(), topic, min_attempts, limit)}
+    finally:
+        conn.close()
+
+@router.get("/questions/{question_id}/answers")
+async def get_answer_distribution(question_id: str, current_user: dict = Depends(get_current_admin_user)):
+    """Bir soruya verilen cevapların dağılımı."""
+    conn = sqlite3.connect(DATABASE)
+    try:
+        return answers.answer_distribution(conn.cursor(), question_id)
+    finally:
+        conn.close()
+
+
+# -----------------------
+# Profiling (admin only)
+# -----------------------
+@router.post("/profile")
+async def start_profile(
+    route: str = Query(..., description="Profillenecek route şablonu, ör. /quiz"),
+    requests: int = Query(10, ge=1, le=1000),
+    mode: str = Query("cpu", pattern="^(cpu|alloc)$"),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    current_user: dict = Depends(get_current_admin_user),
+):
+    """Belirtilen route'un sonraki N isteği için örnekleyici profil oturumu açar."""
+    try:
+        session = profiling.arm(route, requests, mode, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session.summary()
+
+@router.get("/profile/{session_id}")
+async def get_profile(
+    session_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    current_user: dict = Depends(get_current_admin_user),
+):
+    """Profil sonucunu döner; `collapsed` çıktısı flame graph araçlarına verilebilir."""
+    session = profiling.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Profile session '{session_id}' not found.")
+    if format == "json":
+        return session.summary()
+    return PlainTextResponse(session.collapsed())
 
 
 def init_quiz_attempts_table():
@@ -403,7 +487,7 @@ def init_quiz_attempts_table():
     
     conn.commit()
     conn.close()
-    print("✅ quiz_attempts table created/verified")
+    log.debug("quiz_attempts table created/verified")
 
 @router.on_event("startup")
 async def startup_event():
@@ -414,7 +498,8 @@ async def startup_event():
 # 🔹 Generate Question by Topic-Level-Type
 # -----------------------
 @router.post("/generate-question", tags=["admin"])
-async def generate_question_endpoint(
+@scheduler.priority("admin")
+def generate_question_endpoint(
     topic: str,
     level: str,
     qtype: str,
@@ -423,7 +508,7 @@ async def generate_question_endpoint(
     """
     Admin panelinden belirli konu, seviye ve türde soru üretir.
     """
-    print(f"⚙️ Generating question: topic={topic}, level={level}, qtype={qtype}")
+    log.info("generating question", extra={"topic": topic, "level": level, "qtype": qtype})
 
     context = retrieve_context(topic)
     if not context:
@@ -432,31 +517,11 @@ async def generate_question_endpoint(
     # Ollama'dan soru oluştur
     question_data = generate_with_ollama_rag(qtype, topic, level, context)
 
-    # Veritabanına kaydet
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute(
-        """
-        INSERT INTO questions (type, topic, level, stem, choices, answer, answer_index, expected, rationale)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            question_data["type"],
-            question_data["topic"],
-            question_data["level"],
-            question_data["stem"],
-            json.dumps(question_data["choices"], ensure_ascii=False),
-            question_data.get("answer", ""),
-            question_data.get("answer_index", 0),
-            question_data.get("expected", ""),
-            question_data.get("rationale", ""),
-        ),
-    )
-    conn.commit()
-    qid = c.lastrowid
-    conn.close()
+    # Tek soru deposuna kaydet (hash ile tekilleştirilir)
+    with metrics.stage("sqlite"):
+        qid = question_store.save_question({**question_data, "source_model": OLLAMA_MODEL})
 
-    print(f"💾 New question saved with ID {qid}")
+    log.info("question saved", extra={"question_id": qid, "topic": topic})
 
     return {
         "status": "success",
@@ -0,0 +1,189 @@
+# src/answers.py
+"""
+Quiz denemelerindeki cevapların normalize edilmiş (soru başına bir satır) tablosu.
+
+`quiz_attempts.questions_attempted` JSON blob'u geriye dönük uyumluluk için
+korunur; soru bazlı analizler (doğruluk oranı, cevap dağılımı) bu tablo
+üzerinden indeksli SQL ile yapılır.
+
+Mevcut denemeler için tek seferlik doldurma:
+    python -m src.answers backfill [--db quiz.db]
+"""
+import argparse
+import json
+import sqlite3
+from typing import Iterable, List, Optional
+
+from src.logs import get_logger, setup as setup_logging
+
+DATABASE = "quiz.db"
+log = get_logger(__name__)
+BACKFILL_BATCH_SIZE = 1000
+
+# -----------------------
+# Schema
+# -----------------------
+def init_answers_table(cursor: sqlite3.Cursor):
+    """attempt_answers tablosunu ve indekslerini oluşturur; ilk kurulumda doldurur."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='attempt_answers'")
+    fresh = cursor.fetchone() is None
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS attempt_answers (
+        attempt_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        question_id TEXT NOT NULL,
+        user_answer TEXT,
+        is_correct INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (attempt_id, position),
+        FOREIGN KEY (attempt_id) REFERENCES quiz_attempts (id) ON DELETE CASCADE
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attempt_answers_question "
+        "ON attempt_answers (question_id, is_correct)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attempt_answers_question_answer "
+        "ON attempt_answers (question_id, user_answer)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attempt_answers_topic ON attempt_answers (topic, question_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attempt_answers_user ON attempt_answers (user_id)"
+    )
+
+    if fresh:
+        backfill(cursor)
+
+# -----------------------
+# Writes
+# -----------------------
+def _normalize_answer(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+def answer_rows(attempt_id: int, user_id: int, topic: str, items: Iterable) -> List[tuple]:
+    rows = []
+    for position, item in enumerate(items or []):
+        if not isinstance(item, dict) or item.get("question_id") is None:
+            continue
+        rows.append((
+            attempt_id,
+            position,
+            user_id,
+            topic,
+            str(item["question_id"]),
+            _normalize_answer(item.get("user_answer")),
+            1 if item.get("is_correct") else 0,
+        ))
+    return rows
+
+INSERT_SQL = """
+INSERT OR REPLACE INTO attempt_answers
+    (attempt_id, position, user_id, topic, question_id, user_answer, is_correct)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+def insert_answers(cursor: sqlite3.Cursor, attempt_id: int, user_id: int, topic: str, items: Iterable) -> int:
+    """Bir denemenin cevaplarını tek `executemany` ile yazar. Commit çağırana aittir."""
+    rows = answer_rows(attempt_id, user_id, topic, items)
+    if rows:
+        cursor.executemany(INSERT_SQL, rows)
+    return len(rows)
+
+# -----------------------
+# Reads
+# -----------------------
+def question_accuracy(cursor: sqlite3.Cursor, topic: str = None, min_attempts: int = 1,
+                      limit: int = 100) -> list:
+    """Soru bazlı doğruluk oranları; en çok yanlış yapılan sorular önce gelir."""
+    where, params = "", []
+    if topic:
+        where = "WHERE topic = ?"
+        params.append(topic)
+    cursor.execute(f"""
+    SELECT question_id, COUNT(*) AS attempts, SUM(is_correct) AS correct
+    FROM attempt_answers
+    {where}
+    GROUP BY question_id
+    HAVING COUNT(*) >= ?
+    ORDER BY CAST(SUM(is_correct) AS REAL) / COUNT(*) ASC, attempts DESC
+    LIMIT ?
+    """, params + [min_attempts, limit])
+    return [
+        {
+            "question_id": r[0],
+            "attempts": r[1],
+            "correct": r[2],
+            "accuracy": round(r[2] / r[1] * 100, 2),
+        }
+        for r in cursor.fetchall()
+    ]
+
+def answer_distribution(cursor: sqlite3.Cursor, question_id: str) -> dict:
+    cursor.execute("""
+    SELECT user_answer, COUNT(*) AS count, SUM(is_correct) AS correct
+    FROM attempt_answers
+    WHERE question_id = ?
+    GROUP BY user_answer
+    ORDER BY count DESC
+    """, (str(question_id),))
+    answers = [{"user_answer": r[0], "count": r[1], "correct": r[2]} for r in cursor.fetchall()]
+    return {
+        "question_id": str(question_id),
+        "total": sum(a["count"] for a in answers),
+        "answers": answers,
+    }
+
+# -----------------------
+# Backfill
+# -----------------------
+def backfill(cursor: sqlite3.Cursor) -> int:
+    """Henüz normalize edilmemiş denemelerin JSON blob'larını tabloya aktarır."""
+    read = cursor.connection.cursor()
+    read.execute("""
+    SELECT qa.id, qa.user_id, qa.topic, qa.questions_attempted
+    FROM quiz_attempts qa
+    WHERE NOT EXISTS (SELECT 1 FROM attempt_answers aa WHERE aa.attempt_id = qa.id)
+    """)
+    total = 0
+    while True:
+        batch = read.fetchmany(BACKFILL_BATCH_SIZE)
+        if not batch:
+            break
+        rows = []
+        for attempt_id, user_id, topic, blob in batch:
+            try:
+                items = json.loads(blob) if blob else []
+            except (TypeError, ValueError):
+                continue
+            rows.extend(answer_rows(attempt_id, user_id, topic, items if isinstance(items, list) else []))
+        if rows:
+            cursor.executemany(INSERT_SQL, rows)
+            total += len(rows)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz cevap tablosu araçları")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--db", default=DATABASE)
+    args = parser.parse_args()
+    setup_logging(fmt="text")
+
+    conn = sqlite3.connect(args.db)
+    with conn:
+        cursor = conn.cursor()
+        init_answers_table(cursor)
+        inserted = backfill(cursor)
+    conn.close()
+    log.info("%d cevap satırı aktarıldı", inserted)
+
+
+if __name__ == "__main__":
+    main()
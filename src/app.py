@@ -1,5 +1,9 @@
-from fastapi import FastAPI, UploadFile, File, Query
+from fastapi import FastAPI, UploadFile, File, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
+from typing import Optional
 import src.rag as rag
 import src.quiz as quiz
 from src.quiz import generate_quiz
@@ -8,10 +12,13 @@ import src.admin
 from src.auth import router as authrouter, init_users_db
 from src.admin import router as adminrouter
 from src.evaluate import router as evaluaterouter
-import json, os, datetime, traceback, logging, random
+from src.grading import router as gradingrouter
+import json, os, datetime, random, time
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-from src import evaluate
+from src import (evaluate, health, http_cache, logs, metrics, profiling, question_store, scheduler,
+                 tracing, uploads)
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 # ------------------------------
 # ENVIRONMENT SETUP
@@ -23,6 +30,10 @@ load_dotenv()
 # ------------------------------
 app = FastAPI(title="knowledge-bot", version="0.2.1")
 
+# Yükleme boyutu sınırı: büyük dosyalar gövde okunmadan 413 alır (bkz. src/uploads.py).
+# 413 yanıtı CORS başlıklarını da taşısın diye CORS'tan önce (içte) eklenir.
+app.add_middleware(uploads.UploadLimitMiddleware)
+
 # ✅ CORS SETTINGS (frontend için gerekli)
 app.add_middleware(
     CORSMiddleware,
@@ -35,29 +46,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "X-Trace-Id"],
 )
 
+# Büyük JSON yanıtları (arama sonuçları, soru listeleri) sıkıştırılır
+app.add_middleware(GZipMiddleware, minimum_size=http_cache.GZIP_MIN_SIZE, compresslevel=http_cache.GZIP_LEVEL)
+
 # ------------------------------
 # ROUTER REGISTRATION
 # ------------------------------
 app.include_router(authrouter)     # Kullanıcı kayıt & login işlemleri
 app.include_router(adminrouter)    # Admin panel API’leri (Ollama + RAG destekli)
 app.include_router(evaluaterouter) # Cevap değerlendirme API'si
+app.include_router(gradingrouter)  # /evaluate-answer (açık uçlu cevap puanlama)
 
 # ------------------------------
 # STARTUP CONFIG
 # ------------------------------
+_readiness = {"databases": False}
+
 @app.on_event("startup")
 async def startup():
     """Uygulama başlarken veritabanlarını ve tabloları hazırla."""
     init_users_db()
     question.init_db()
-    logging.info("✅ Databases initialized successfully.")
+    _readiness["databases"] = True
+    log.info("databases initialized")
+    # Embedding modeli ve vektör deposu arka planda yüklenir; /ready bunu bekler
+    rag.start_warmup()
+    # Ollama ve vektör deposu arka planda yoklanır (bkz. src/health.py)
+    health.start_monitor()
+
+@app.on_event("shutdown")
+async def shutdown():
+    health.stop_monitor()
 
 # ------------------------------
 # LOGGING
 # ------------------------------
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+logs.setup()
+log = logs.get_logger(__name__)
+
+# ------------------------------
+# METRICS
+# ------------------------------
+def _route_template(scope) -> Optional[str]:
+    """İsteğin eşleşeceği route'un şablon path'ini (ör. `/delete/{doc_id}`) bulur."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Her istek için metrik kaydı, trace span'i ve (açıksa) profil oturumu."""
+    metrics.IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = "500"
+    trace_id = request.headers.get("x-trace-id") or tracing.new_trace_id()
+    profile_route = _route_template(request.scope) if profiling.armed_route() else None
+    try:
+        with tracing.span(f"{request.method} {request.url.path}", trace_id=trace_id) as sp:
+            with profiling.profile_request(profile_route):
+                response = await call_next(request)
+            status = str(response.status_code)
+            sp.set(status=response.status_code)
+        response.headers["X-Trace-Id"] = trace_id
+        return response
+    finally:
+        metrics.IN_FLIGHT.dec()
+        # Şablon path kullanılır (/delete/{doc_id}); eşleşmeyen istekler tek etikette toplanır
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=path)
+        metrics.REQUESTS.inc(method=request.method, route=path, status=status)
+
+@app.exception_handler(scheduler.Busy)
+async def llm_busy(request: Request, exc: scheduler.Busy):
+    """LLM kuyruğu dolu (429) ya da yuva beklenirken süre aşıldı (503)."""
+    return JSONResponse(
+        {"detail": "LLM meşgul, lütfen biraz sonra tekrar deneyin.", "priority": exc.priority,
+         "reason": exc.reason, "retry_after": exc.retry_after},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(health.Unavailable)
+async def backend_unavailable(request: Request, exc: health.Unavailable):
+    """Devre açık: arka uç kapalı, çağrı yapılmadan 503 döner."""
+    return JSONResponse(
+        {"detail": f"{exc.backend} şu anda kullanılamıyor.", "backend": exc.backend,
+         "retry_after": exc.retry_after},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # ------------------------------
 # HEALTH CHECK
@@ -68,8 +155,20 @@ class Health(BaseModel):
 
 @app.get("/health", response_model=Health, tags=["system"])
 def health():
+    """Liveness: süreç ayakta mı? Model/DB yüklenmesini beklemez."""
     return Health()
 
+@app.get("/ready", tags=["system"])
+def ready():
+    """Readiness: veritabanları hazır ve embedding modeli yüklü mü? Değilse 503."""
+    rag_state = rag.readiness()
+    body = {
+        "ready": _readiness["databases"] and rag_state["ready"],
+        "databases": _readiness["databases"],
+        "rag": rag_state,
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
 # ✅ CORS test endpoint'i
 @app.options("/__cors_test__")
 def cors_test():
@@ -79,24 +178,48 @@ def cors_test():
 # FILE INDEXING (RAG)
 # ------------------------------
 @app.post("/index")
-async def index(file: UploadFile = File(...)):
+def index(file: UploadFile = File(...)):
     try:
-        raw = await file.read()
-        text = rag.extract_text_from_file(file.filename, raw)
+        # Yükleme geçici dosyada durur; ayrıştırıcılar oradan okur (belleğe `read()` yok)
+        raw = file.file
+        metrics.INGEST_BYTES.inc(uploads.size_of(raw))
+        chunks = rag.extract_chunks(file.filename, raw)
+        if chunks is not None:
+            # Tablo/JSON (sayfa, satır aralığı, kayıt anahtarı metadata'sıyla) ve düz metin akıtılır
+            n_chunks = rag.index_chunks(file.filename, chunks, "support_flow")
+            if not n_chunks:
+                metrics.INGEST_DOCUMENTS.inc(status="empty")
+                return {"status": "error", "detail": "No text extracted"}
+            metrics.INGEST_DOCUMENTS.inc(status="indexed")
+            return {"status": "indexed", "chunks": n_chunks}
+        with metrics.stage("extract"):
+            text = rag.extract_text_from_file(file.filename, raw)
         if not text.strip():
+            metrics.INGEST_DOCUMENTS.inc(status="empty")
             return {"status": "error", "detail": "No text extracted"}
         n_chunks = rag.index_doc(file.filename, text, topic="support_flow")
+        metrics.INGEST_DOCUMENTS.inc(status="indexed")
         return {"status": "indexed", "chunks": n_chunks}
     except Exception as e:
-        logging.error(traceback.format_exc())
+        metrics.INGEST_DOCUMENTS.inc(status="error")
+        log.exception("request failed")
         return {"status": "error", "detail": str(e)}
 
 # ------------------------------
 # RAG SEARCH & DELETE
 # ------------------------------
 @app.get("/search")
-async def search(q: str):
-    results = rag.search(q)
+def search(
+    q: str,
+    request: Request,
+    response: Response,
+    doc_id: Optional[str] = Query(None, description="Yalnızca bu dokümanda ara"),
+    sheet: Optional[str] = Query(None, description="Yalnızca bu tablo sayfasında ara"),
+):
+    not_modified = http_cache.conditional(request, response, rag.index_generation)
+    if not_modified:
+        return not_modified
+    results = rag.search(q, where=rag.make_where(doc_id=doc_id, sheet=sheet))
     return results
 
 @app.delete("/delete/{doc_id}")
@@ -112,6 +235,7 @@ async def delete_all():
 # QUIZ GENERATION
 # ------------------------------
 @app.post("/quiz")
+@scheduler.priority("user")
 def create_quiz(topic: str, level: str, n: int = 5):
     return generate_quiz(topic, level, n)
 
@@ -119,7 +243,8 @@ def create_quiz(topic: str, level: str, n: int = 5):
 # QUESTION MANAGEMENT
 # ------------------------------
 @app.post("/questions/generate_random")
-async def generate_random_question_endpoint():
+@scheduler.priority("user")
+def generate_random_question_endpoint():
     """Yeni bir rastgele soru üretir (HuggingFace API + RAG context)."""
     topic = random.choice(question.TOPICS)
     level = random.choice(question.LEVELS)
@@ -130,7 +255,8 @@ async def generate_random_question_endpoint():
     return q
 
 @app.post("/questions/generate")
-async def generate_question_endpoint(
+@scheduler.priority("user")
+def generate_question_endpoint(
     topic: str = Query(..., description="Soru konusu (örn: product_basics)"),
     level: str = Query(..., description="Zorluk seviyesi"),
     qtype: str = Query(..., description="Soru tipi: mcq | truefalse | openended | scenario"),
@@ -145,26 +271,48 @@ async def generate_question_endpoint(
 async def random_question(
     topic: str = Query(None, description="İsteğe bağlı: sadece bu topic için"),
     level: str = Query(None, description="İsteğe bağlı: sadece bu zorluk için"),
+    qtype: str = Query(None, description="İsteğe bağlı: sadece bu soru tipi için"),
 ):
     """DB'den rastgele bir soru getirir."""
-    q = question.get_random_question(topic=topic, level=level)
+    q = question.get_random_question(topic=topic, level=level, qtype=qtype)
     if q:
         return q
     return {"status": "error", "detail": "Veritabanında uygun soru bulunamadı"}
 
 @app.get("/questions/all")
-async def list_questions():
-    """DB'deki tüm soruları getirir (debug amaçlı)."""
-    return question.get_all_questions()
+async def list_questions(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın next_cursor değeri"),
+    topic: Optional[str] = None,
+    level: Optional[str] = None,
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """DB'deki soruları sayfalı getirir; `format=ndjson` ile tümünü stream eder."""
+    not_modified = http_cache.conditional(request, response, question_store.generation)
+    if not_modified:
+        return not_modified
+    if format == "ndjson":
+        return StreamingResponse(
+            question.iter_questions_ndjson(topic, level, date_from, date_to, cursor),
+            media_type="application/x-ndjson",
+        )
+    return question.get_all_questions(limit, cursor, topic, level, date_from, date_to)
 
 # ------------------------------
 # TOPICS LIST
 # ------------------------------
 @app.get("/topics")
-async def list_topics():
+async def list_topics(request: Request, response: Response):
     """ChromaDB'de kayıtlı topic’leri döner."""
+    not_modified = http_cache.conditional(request, response, rag.index_generation)
+    if not_modified:
+        return not_modified
     try:
-        data = rag.collection.get()  # tüm chunk’ları al
+        data = rag.get_collection().get()  # tüm chunk’ları al
         topics_count = {}
 
         for meta in data["metadatas"]:
@@ -174,7 +322,9 @@ async def list_topics():
 
         return {"topics": topics_count}
     except Exception as e:
-        logging.error(traceback.format_exc())
-        return {"status": "error", "detail": str(e)}
+        log.exception("request failed")
+        # Response nesnesi döndüğü için `response`'a eklenen ETag taşınmaz: hata önbelleğe alınıp
+        # 304 ile yeniden doğrulanamaz
+        return JSONResponse({"status": "error", "detail": str(e)}, status_code=500)
 if __name__ == "__main__":
     init_users_db()
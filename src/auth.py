@@ -7,12 +7,17 @@ pip install fastapi python-jose[cryptography] passlib[bcrypt] python-multipart
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 import sqlite3
 import json
+import os
+import threading
+import time
+from src import answers, metrics, stats, workers
 
 # Güvenlik ayarları
 SECRET_KEY = "furkan-super-secret-key"  # ÖNEMLİ: Production'da değiştirin!
@@ -67,8 +72,11 @@ def init_users_db():
     )
     """)
 
+    # İstatistik özet tabloları ve quiz_attempts indeksleri
+    stats.init_stats_tables(cursor)
+    # Soru bazlı normalize cevap tablosu
+    answers.init_answers_table(cursor)
 
-    
     conn.commit()
     conn.close()
 
@@ -123,7 +131,123 @@ def get_user_by_username(username: str):
     conn.close()
     return user
 
+def load_principal(username: str) -> Optional[dict]:
+    """Kimlik doğrulamada kullanılan kullanıcı bilgisini (şifre hash'i olmadan) döner."""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id, username, email, is_admin FROM users WHERE username = ?", (username,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return {
+        "id": row["id"],
+        "username": row["username"],
+        "email": row["email"],
+        "is_admin": bool(row["is_admin"]),
+    }
+
+# -----------------------
+# Principal cache
+# -----------------------
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))  # saniye
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))
+
+class PrincipalCache:
+    """Doğrulanmış token → kullanıcı eşlemesini TTL ile bellekte tutar.
+
+    Önbellekte bulunan token için JWT çözme ve DB sorgusu atlanır. Kayıt süresi
+    hem TTL hem de token'ın kendi `exp` değeri ile sınırlıdır. `generation`
+    verilirse bir kullanıcının geçersizleştirilmesi diğer worker'lara da duyurulur;
+    onlar değişikliği görünce önbelleklerini tamamen boşaltır.
+    """
+
+    def __init__(self, ttl: int = PRINCIPAL_CACHE_TTL, max_size: int = PRINCIPAL_CACHE_MAX,
+                 generation: Optional[workers.Generation] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.generation = generation
+        if generation is not None:
+            generation.on_change(self.clear)
+        self._entries = {}   # token -> (expires_at, principal)
+        self._by_user = {}   # username -> {token, ...}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.generation is not None:
+            self.generation.check()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, principal: dict, token_exp: Optional[float] = None):
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, now + (token_exp - time.time()))
+        if expires_at <= now or self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._evict(now)
+            self._entries[token] = (expires_at, principal)
+            self._by_user.setdefault(principal["username"], set()).add(token)
+
+    def invalidate_user(self, username: str):
+        """Kullanıcıya ait tüm önbellek kayıtlarını siler (kullanıcı değiştiğinde çağrılır)."""
+        with self._lock:
+            for token in self._by_user.pop(username, set()):
+                self._entries.pop(token, None)
+        if self.generation is not None:
+            self.generation.bump()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _drop(self, token: str):
+        _, principal = self._entries.pop(token)
+        tokens = self._by_user.get(principal["username"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[principal["username"]]
+
+    def _evict(self, now: float):
+        expired = [t for t, (exp, _) in self._entries.items() if exp <= now]
+        for token in expired:
+            self._drop(token)
+        # Hâlâ doluysa en eski eklenen kayıtları at (dict ekleme sırasını korur)
+        while len(self._entries) >= self.max_size:
+            self._drop(next(iter(self._entries)))
+
+principal_cache = PrincipalCache(generation=workers.Generation("principals"))
+metrics.register_cache("principal", principal_cache.stats)
+
+def invalidate_user(username: str):
+    principal_cache.invalidate_user(username)
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -136,13 +260,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_by_username(username)
-    if user is None:
+
+    principal = load_principal(username)
+    if principal is None:
         raise credentials_exception
-    print("🔍 current_user:", dict(user))
-    return user
-    
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
 
 # Endpoints
 @router.post("/register", response_model=Token)
@@ -156,8 +280,8 @@ async def register(user: UserRegister):
         conn.close()
         raise HTTPException(status_code=400, detail="Kullanıcı adı veya e-posta zaten kullanılıyor")
     
-    # Create user
-    hashed_password = get_password_hash(user.password)
+    # Create user (bcrypt event loop'u bloklamasın diye thread pool'da çalışır)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     cursor.execute(
         "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
         (user.username, user.email, hashed_password)
@@ -176,7 +300,10 @@ async def register(user: UserRegister):
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = get_user_by_username(form_data.username)
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    valid = user is not None and await run_in_threadpool(
+        verify_password, form_data.password, user["hashed_password"]
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Kullanıcı adı veya şifre hatalı",
@@ -203,143 +330,65 @@ class QuizResult(BaseModel):
     completed_at: str
     questions_attempted: Optional[list] = []  # ← Bu satırı ekleyin
 
-@router.post("/submit-result")
-async def submit_result(result: QuizResult, current_user = Depends(get_current_user)):
+# Yeni deneme kaydedildiğinde artırılır (admin aktivite ETag'i, bkz. src/http_cache.py)
+attempts_generation = workers.Generation("attempts")
+
+def record_attempt(user_id: int, topic: str, difficulty: str, total_questions: int,
+                   correct_answers: int, questions_attempted: list) -> int:
+    """Denemeyi, cevap satırlarını ve özet tabloları tek transaction'da yazar; deneme id'sini döner."""
     conn = get_db()
     cursor = conn.cursor()
-    
-    score = round((result.correct_answers / result.total_questions) * 100, 2)
-    cursor.execute("""
-    INSERT INTO quiz_attempts (
-        user_id, quiz_date, topic, difficulty,
-        total_questions, correct_answers, score, questions_attempted
-    ) VALUES (?, datetime('now'), ?, ?, ?, ?, ?, ?)
-    """, (
-    current_user["id"],
-    result.topic,
-    result.difficulty,
-    result.total_questions,
-    result.correct_answers,
-    score,
-    json.dumps(result.questions_attempted, ensure_ascii=False)  # ← Bu satırı değiştirin
-    ))
-    
-    conn.commit()
-    conn.close()
-    
+
+    score = round((correct_answers / total_questions) * 100, 2) if total_questions else 0.0
+    quiz_date = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")  # datetime('now') ile aynı format
+    try:
+        cursor.execute("""
+        INSERT INTO quiz_attempts (
+            user_id, quiz_date, topic, difficulty,
+            total_questions, correct_answers, score, questions_attempted
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+        user_id,
+        quiz_date,
+        topic,
+        difficulty,
+        total_questions,
+        correct_answers,
+        score,
+        json.dumps(questions_attempted, ensure_ascii=False)
+        ))
+        attempt_id = cursor.lastrowid
+        answers.insert_answers(cursor, attempt_id, user_id, topic, questions_attempted)
+        # Özet tablolar denemeyle aynı transaction'da güncellenir
+        stats.apply_attempt(cursor, user_id, topic, total_questions, correct_answers, quiz_date)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    attempts_generation.bump()
+    return attempt_id
+
+@router.post("/submit-result")
+async def submit_result(result: QuizResult, current_user = Depends(get_current_user)):
+    record_attempt(
+        current_user["id"], result.topic, result.difficulty,
+        result.total_questions, result.correct_answers, result.questions_attempted,
+    )
     return {"message": "Sonuç kaydedildi"}
+
 @router.get("/stats", response_model=UserStats)
 async def get_stats(current_user = Depends(get_current_user)):
+    """Kullanıcının quiz istatistiklerini özet tablolardan getirir."""
     conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    SELECT 
-        COUNT(*) as total_quizzes,
-        SUM(total_questions) as total_questions,
-        SUM(correct_answers) as correct_answers,
-        MAX(quiz_date) as last_quiz_date
-    FROM quiz_attempts
-    WHERE user_id = ?
-    """, (current_user["id"],))
-
-    
-    stats = cursor.fetchone()
-    
-    # Topic stats
-    cursor.execute("""
-    SELECT 
-        topic,
-        SUM(correct_answers) as correct,
-        SUM(total_questions) as total
-    FROM quiz_attempts
-    WHERE user_id = ?
-    GROUP BY topic
-    """, (current_user["id"],))
-
-    
-    topic_stats = {}
-    for row in cursor.fetchall():
-        topic_stats[row["topic"]] = {
-            "correct": row["correct"],
-            "total": row["total"]
-        }
-    
-    conn.close()
-    
-    return {
-        "total_quizzes": stats["total_quizzes"] or 0,
-        "total_questions": stats["total_questions"] or 0,
-        "correct_answers": stats["correct_answers"] or 0,
-        "last_quiz_date": stats["last_quiz_date"],
-        "topic_stats": topic_stats
-    }
+    try:
+        return stats.get_user_stats(conn.cursor(), current_user["id"])
+    finally:
+        conn.close()
 
 # Ana FastAPI uygulamanıza ekleyin:
 # app.include_router(router)
 # 
 # Uygulama başlatılırken:
 # init_users_db()
-
-@router.get("/stats")
-async def get_user_stats(current_user: dict = Depends(get_current_user)):
-    """Kullanıcının quiz istatistiklerini getirir."""
-    user_id = current_user["id"]
-    
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    
-    # Toplam quiz sayısı
-    c.execute("SELECT COUNT(*) FROM quiz_attempts WHERE user_id = ?", (user_id,))
-    total_quizzes = c.fetchone()[0]
-    
-    # Toplam soru ve doğru cevap sayısı
-    c.execute("""
-        SELECT 
-            SUM(total_questions) as total_q,
-            SUM(correct_answers) as correct_a
-        FROM quiz_attempts 
-        WHERE user_id = ?
-    """, (user_id,))
-    row = c.fetchone()
-    total_questions = row[0] or 0
-    correct_answers = row[1] or 0
-    
-    # Son quiz tarihi
-    c.execute("""
-        SELECT quiz_date 
-        FROM quiz_attempts 
-        WHERE user_id = ? 
-        ORDER BY quiz_date DESC 
-        LIMIT 1
-    """, (user_id,))
-    last_quiz = c.fetchone()
-    last_quiz_date = last_quiz[0] if last_quiz else None
-    
-    # Konu bazlı istatistikler
-    c.execute("""
-        SELECT 
-            topic,
-            SUM(total_questions) as total,
-            SUM(correct_answers) as correct
-        FROM quiz_attempts 
-        WHERE user_id = ?
-        GROUP BY topic
-    """, (user_id,))
-    
-    topic_stats = {}
-    for row in c.fetchall():
-        topic_stats[row[0]] = {
-            "total": row[1],
-            "correct": row[2]
-        }
-    
-    conn.close()
-    
-    return {
-        "total_quizzes": total_quizzes,
-        "total_questions": total_questions,
-        "correct_answers": correct_answers,
-        "last_quiz_date": last_quiz_date,
-        "topic_stats": topic_stats
-    }
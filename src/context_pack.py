@@ -0,0 +1,236 @@
+# src/context_pack.py
+"""
+Token bütçeli context paketleyici.
+
+`rag.chunk_text` komşu chunk'ları `CHUNK_OVERLAP` karakter örtüşecek şekilde
+böler; aynı dokümandan ardışık chunk'lar geldiğinde bu metin LLM'e iki kez
+gider. `pack()` arama sonuçlarını şu adımlarla prompt context'ine çevirir:
+
+    1. birebir tekrar eden ve başka bir pasajın içinde kalan chunk'ları atar
+    2. aynı dokümanın örtüşen chunk'larını ortak kısmı bir kez yazarak birleştirir
+    3. pasajları alaka sırasıyla, model profilindeki token bütçesi dolana kadar
+       ekler; sığmayan son pasajı kelime sınırında keser
+
+Token sayımı model profilindeki tokenizer ile yapılır
+(`TOKENIZER_DIR/<tokenizer>.json`, `tokenizers` paketi gerekir). Dosya ya da
+paket yoksa profilin `chars_per_token` oranıyla yukarı yuvarlanmış bir tahmin
+kullanılır. Paketlenmeden önceki ve sonraki token sayıları
+`context_*_tokens_total` metriklerine yazılır.
+"""
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src import metrics
+from src.logs import get_logger
+
+TOKENIZER_DIR = os.getenv("TOKENIZER_DIR", "models/tokenizers")
+MIN_OVERLAP = 20  # bundan kısa ortak kısımlar tesadüf sayılır
+MIN_TAIL_TOKENS = 32  # kesilen son pasaj bundan kısa kalacaksa eklenmez
+SEPARATOR = "\n\n"
+
+DEFAULT_PROFILE = {
+    "context_window": 4096,
+    "tokenizer": None,
+    "chars_per_token": 3.0,
+    "budgets": {"chat": 192, "question": 768},
+}
+MODEL_PROFILES = {
+    "llama3:instruct": {**DEFAULT_PROFILE, "context_window": 8192, "tokenizer": "llama3"},
+}
+# Ortam değişkeni ile tüm modeller için bütçe: CONTEXT_BUDGET_CHAT, CONTEXT_BUDGET_QUESTION
+BUDGET_OVERRIDES = {
+    use: int(os.environ[f"CONTEXT_BUDGET_{use.upper()}"])
+    for use in DEFAULT_PROFILE["budgets"]
+    if os.getenv(f"CONTEXT_BUDGET_{use.upper()}")
+}
+
+log = get_logger(__name__)
+
+
+def get_profile(model: str) -> dict:
+    return MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+
+
+def get_budget(model: str, use: str) -> int:
+    profile = get_profile(model)
+    budget = BUDGET_OVERRIDES.get(use, profile["budgets"][use])
+    return min(budget, profile["context_window"] // 2)
+
+
+# -----------------------
+# Token sayımı
+# -----------------------
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+
+def _load_tokenizer(name: Optional[str]):
+    if name is None:
+        return None
+    with _tokenizers_lock:
+        if name not in _tokenizers:
+            path = os.path.join(TOKENIZER_DIR, f"{name}.json")
+            tokenizer = None
+            if os.path.exists(path):
+                try:
+                    from tokenizers import Tokenizer
+
+                    tokenizer = Tokenizer.from_file(path)
+                except ImportError:
+                    log.warning("tokenizers package missing; estimating token counts")
+            _tokenizers[name] = tokenizer
+        return _tokenizers[name]
+
+
+class TokenCounter:
+    """Bir model profili için token sayar ve metni token bütçesine keser."""
+
+    def __init__(self, model: str):
+        profile = get_profile(model)
+        self.chars_per_token = profile["chars_per_token"]
+        self.tokenizer = _load_tokenizer(profile["tokenizer"])
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Metni en fazla `max_tokens` token olacak şekilde, kelime sınırında keser."""
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is not None:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            if len(offsets) <= max_tokens:
+                return text
+            cut = offsets[max_tokens - 1][1]
+        else:
+            cut = int(max_tokens * self.chars_per_token)
+            if cut >= len(text):
+                return text
+        space = text.rfind(" ", 0, cut)
+        return text[: space if space > cut // 2 else cut].rstrip()
+
+
+# -----------------------
+# Paketleme
+# -----------------------
+@dataclass
+class PackedContext:
+    passages: List[str]
+    tokens: int          # paketlenmiş context
+    raw_tokens: int      # aramadan dönen chunk'ların düz birleşimi
+    chunks: int
+    truncated: bool = False
+    exact: bool = False
+    sources: List[dict] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return SEPARATOR.join(self.passages)
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+
+def _overlap(a: str, b: str, max_overlap: int) -> int:
+    """`a`'nın sonu ile `b`'nin başının ortak uzunluğu."""
+    for n in range(min(len(a), len(b), max_overlap), MIN_OVERLAP - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+def merge_overlapping(documents: List[str], metadatas: Optional[List[dict]] = None,
+                      max_overlap: Optional[int] = None) -> List[dict]:
+    """Chunk'ları tekrarsız pasajlara indirger; sonuç alaka sırasındadır.
+
+    Metadata'da `doc_id` varsa yalnızca aynı dokümanın chunk'ları birleştirilir.
+    """
+    if max_overlap is None:
+        from src.rag import CHUNK_OVERLAP
+
+        max_overlap = CHUNK_OVERLAP
+    metadatas = metadatas or [{}] * len(documents)
+    passages = []
+    for rank, (doc, meta) in enumerate(zip(documents, metadatas)):
+        doc = doc.strip()
+        if doc:
+            passages.append({"text": doc, "rank": rank, "doc_id": (meta or {}).get("doc_id")})
+
+    merged = True
+    while merged:
+        merged = False
+        for i, a in enumerate(passages):
+            for j, b in enumerate(passages):
+                if i == j or (a["doc_id"] != b["doc_id"] and None not in (a["doc_id"], b["doc_id"])):
+                    continue
+                if b["text"] in a["text"]:
+                    text = a["text"]
+                else:
+                    n = _overlap(a["text"], b["text"], max_overlap)
+                    if not n:
+                        continue
+                    text = a["text"] + b["text"][n:]
+                a.update(text=text, rank=min(a["rank"], b["rank"]), doc_id=a["doc_id"] or b["doc_id"])
+                del passages[j]
+                merged = True
+                break
+            if merged:
+                break
+    return sorted(passages, key=lambda p: p["rank"])
+
+
+def pack(results: dict, model: str, use: str, budget: Optional[int] = None) -> PackedContext:
+    """Chroma biçimindeki arama sonucunu (`rag.search`) token bütçesine paketler."""
+    documents = (results.get("documents") or [[]])[0] if results else []
+    metadatas = (results.get("metadatas") or [None])[0] if results else None
+    counter = TokenCounter(model)
+    budget = budget if budget is not None else get_budget(model, use)
+    separator_tokens = counter.count(SEPARATOR)
+
+    with metrics.stage("context_pack"):
+        passages = merge_overlapping(documents, metadatas)
+        chosen, sources, used, truncated = [], [], 0, False
+        for p in passages:
+            cost = counter.count(p["text"]) + (separator_tokens if chosen else 0)
+            if used + cost <= budget:
+                chosen.append(p["text"])
+            else:
+                truncated = True
+                remaining = budget - used - (separator_tokens if chosen else 0)
+                if remaining < MIN_TAIL_TOKENS:
+                    break
+                chosen.append(counter.truncate(p["text"], remaining))
+            sources.append({"doc_id": p["doc_id"], "rank": p["rank"]})
+            used += counter.count(chosen[-1]) + (separator_tokens if len(chosen) > 1 else 0)
+            if truncated:
+                break
+
+        packed = PackedContext(
+            passages=chosen,
+            tokens=counter.count(SEPARATOR.join(chosen)),
+            raw_tokens=counter.count(SEPARATOR.join(documents)),
+            chunks=len(documents),
+            truncated=truncated,
+            exact=counter.exact,
+            sources=sources,
+        )
+    metrics.CONTEXT_RETRIEVED_TOKENS.inc(packed.raw_tokens, use=use)
+    metrics.CONTEXT_PACKED_TOKENS.inc(packed.tokens, use=use)
+    log.debug("context packed", extra={
+        "use": use, "model": model, "chunks": packed.chunks, "passages": len(chosen),
+        "tokens": packed.tokens, "raw_tokens": packed.raw_tokens, "budget": budget,
+        "truncated": truncated, "exact": packed.exact,
+    })
+    return packed
@@ -0,0 +1,209 @@
+# src/embeddings.py
+"""
+Takılabilir (pluggable) embedding backend'leri.
+
+`EMBED_BACKEND` ortam değişkeni ile seçilir:
+    torch      → SentenceTransformerEmbeddingFunction (fp32, varsayılan; eski davranış)
+    int8       → aynı model, `torch.quantization.quantize_dynamic` ile int8 Linear katmanlar
+    onnx       → dışa aktarılmış ONNX modeli, onnxruntime ile (torch gerekmez)
+    onnx-int8  → dinamik int8 kuantize edilmiş ONNX modeli
+
+Diğer ayarlar:
+    EMBED_THREADS=<cpu sayısı>   torch / onnxruntime intra-op thread sayısı
+    EMBED_BATCH_SIZE=32          tek seferde kodlanan metin sayısı
+    EMBED_ONNX_DIR=models/e5-onnx
+
+ONNX modeli bir kez dışa aktarılır:
+    python -m src.embeddings export --out models/e5-onnx
+
+Tüm backend'ler aynı modelin birim uzunluklu (L2 normalize) vektörlerini üretir;
+aynı model farklı hassasiyette çalıştığı için mevcut Chroma indeksi yeniden
+oluşturulmadan kullanılabilir. Uyum (ham vektörler, L2 uzaklığı) `python -m
+benchmarks.embeddings` ile ölçülür. Normalizasyondan önce ONNX backend'iyle
+indekslenmiş dokümanlar yeniden indekslenmelidir.
+"""
+import argparse
+import os
+from typing import List, Optional
+
+EMBED_MODEL = "intfloat/multilingual-e5-large"
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", str(os.cpu_count() or 1)))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "models/e5-onnx")
+MAX_SEQ_LENGTH = 512
+
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+
+class EmbeddingBackendError(RuntimeError):
+    """Seçilen backend yüklenemediğinde (eksik paket ya da model dosyası) fırlatılır."""
+
+
+# -----------------------
+# Backends
+# -----------------------
+class QuantizedTorchBackend:
+    """SentenceTransformer modelinin Linear katmanlarını int8'e çevirir (CPU)."""
+
+    name = "int8"
+
+    def __init__(self, model_name: str = EMBED_MODEL, threads: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise EmbeddingBackendError(f"int8 backend requires torch and sentence-transformers: {e}")
+        torch.set_num_threads(threads or EMBED_THREADS)
+        model = SentenceTransformer(model_name, device="cpu")
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.batch_size = batch_size or EMBED_BATCH_SIZE
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            list(input), batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        ).tolist()
+
+
+class OnnxBackend:
+    """onnxruntime + `tokenizers` ile mean-pooling + L2 normalize embedding (torch yüklenmez)."""
+
+    def __init__(self, model_dir: Optional[str] = None, filename: str = ONNX_FILES["onnx"],
+                 threads: Optional[int] = None, batch_size: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise EmbeddingBackendError(f"onnx backend requires onnxruntime and tokenizers: {e}")
+        model_dir = model_dir or EMBED_ONNX_DIR
+        model_path = os.path.join(model_dir, filename)
+        tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+            raise EmbeddingBackendError(
+                f"{model_path} not found; run `python -m src.embeddings export --out {model_dir}`"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or EMBED_THREADS
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size or EMBED_BATCH_SIZE
+        self.name = "onnx-int8" if filename == ONNX_FILES["onnx-int8"] else "onnx"
+
+    def _encode_batch(self, texts: List[str]):
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        # e5: attention maskesine göre ortalama (mean pooling)
+        weights = mask[..., None].astype(hidden.dtype)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        # SentenceTransformer yığınındaki Normalize katmanının karşılığı: torch/int8 ile aynı
+        # birim uzunluklu vektörler, Chroma'nın L2 uzaklıkları backend'ler arasında tutarlı kalır
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        texts = list(input)
+        out = []
+        for i in range(0, len(texts), self.batch_size):
+            out.extend(self._encode_batch(texts[i:i + self.batch_size]).tolist())
+        return out
+
+
+def _as_chroma_function(backend):
+    """Backend'i Chroma'nın `EmbeddingFunction` arayüzüne uyarlar."""
+    from chromadb.api.types import EmbeddingFunction
+
+    class _Adapter(EmbeddingFunction):
+        def __init__(self, fn):
+            self._fn = fn
+
+        def __call__(self, input):
+            return self._fn(input)
+
+    return _Adapter(backend)
+
+
+def create_embedding_function(backend: str = EMBED_BACKEND):
+    """Seçilen backend için Chroma uyumlu bir embedding fonksiyonu döner."""
+    if backend not in BACKENDS:
+        raise EmbeddingBackendError(f"Unknown EMBED_BACKEND {backend!r}; expected one of {BACKENDS}")
+    if backend == "torch":
+        from chromadb.utils import embedding_functions
+
+        try:
+            import torch
+
+            torch.set_num_threads(EMBED_THREADS)
+            return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBED_MODEL)
+        except ImportError as e:
+            raise EmbeddingBackendError(f"torch backend requires sentence-transformers: {e}")
+    if backend == "int8":
+        return _as_chroma_function(QuantizedTorchBackend())
+    return _as_chroma_function(OnnxBackend(filename=ONNX_FILES[backend]))
+
+
+# -----------------------
+# Export
+# -----------------------
+def export_onnx(out_dir: str = EMBED_ONNX_DIR, model_name: str = EMBED_MODEL, quantize: bool = True):
+    """Modeli ONNX'e aktarır; `quantize=True` iken yanına int8 sürümünü de yazar."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["örnek metin"], return_tensors="pt")
+    model_path = os.path.join(out_dir, ONNX_FILES["onnx"])
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "last_hidden_state": dynamic},
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(out_dir)  # tokenizer.json
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_path, os.path.join(out_dir, ONNX_FILES["onnx-int8"]),
+                         weight_type=QuantType.QInt8)
+    return out_dir
+
+
+def main():
+    from src.logs import get_logger, setup as setup_logging
+
+    parser = argparse.ArgumentParser(description="Embedding backend araçları")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--out", default=EMBED_ONNX_DIR)
+    parser.add_argument("--model", default=EMBED_MODEL)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    setup_logging(fmt="text")
+
+    export_onnx(args.out, args.model, quantize=not args.no_quantize)
+    get_logger(__name__).info("ONNX modeli %s dizinine yazıldı", args.out)
+
+
+if __name__ == "__main__":
+    main()
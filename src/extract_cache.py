@@ -0,0 +1,254 @@
+# src/extract_cache.py
+"""
+İçerik adresli çıkarım önbelleği.
+
+Aynı el kitapları `/index`'e tekrar tekrar yüklenir ve her yüklemede PDF/Office
+ayrıştırma ile OCR baştan çalışır. Çıkarılan metin (tablo/JSON için chunk'lar)
+ham dosyanın SHA-256 özeti + çıkarıcı sürümüyle anahtarlanıp `EXTRACT_CACHE_DIR`
+altında gzip'li saklanır; aynı içerik tekrar gelince ayrıştırıcı hiç çalışmaz.
+
+* Anahtar dosya adına değil içeriğe bağlıdır; kapsam (`scope`) çıktı türünü,
+  uzantıyı ve çıkarıcı sürümünü taşır (bkz. `rag.EXTRACTOR_VERSION`).
+* Girdiler geçici dosyaya yazılıp `os.replace` ile atomik yayınlanır; worker'lar
+  aynı dizini paylaşır.
+* Okunan girdinin mtime'ı güncellenir; toplam boyut `EXTRACT_CACHE_MB`'yi aşınca
+  en uzun süredir okunmayan girdiler silinir.
+* Önbellek yazılamazsa (disk dolu vb.) çıkarım yine de sonuç döner.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+from src import metrics, uploads
+from src.logs import get_logger
+
+log = get_logger(__name__)
+
+EXTRACT_CACHE = os.getenv("EXTRACT_CACHE", "1") == "1"
+EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", "data/extract_cache")
+EXTRACT_CACHE_BYTES = int(float(os.getenv("EXTRACT_CACHE_MB", "512")) * 1024 * 1024)
+EXTRACT_CACHE_LEVEL = int(os.getenv("EXTRACT_CACHE_LEVEL", "6"))  # gzip sıkıştırma düzeyi
+
+SUFFIX = ".gz"
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+_CORRUPT = (OSError, EOFError, UnicodeDecodeError, ValueError, zlib.error)
+
+Chunk = Tuple[str, dict]
+
+
+class ExtractionCache:
+    def __init__(self, directory: str = EXTRACT_CACHE_DIR, max_bytes: int = EXTRACT_CACHE_BYTES,
+                 enabled: bool = EXTRACT_CACHE, level: int = EXTRACT_CACHE_LEVEL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.level = level
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # -----------------------
+    # Anahtarlar
+    # -----------------------
+    def key(self, raw: uploads.Source, scope: str) -> str:
+        """Ham içeriğin SHA-256'sı + kapsam; dosya mmap'ten özetlenir, belleğe okunmaz."""
+        digest = hashlib.sha256()
+        with uploads.mapped(raw) as buf:
+            digest.update(buf)
+        return f"{digest.hexdigest()}.{_UNSAFE.sub('_', scope)}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    # -----------------------
+    # Metin
+    # -----------------------
+    def get_text(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                text = gzip.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return self._miss()
+        except _CORRUPT:
+            self._discard(path)
+            return self._miss()
+        self._hit(path)
+        return text
+
+    def put_text(self, key: str, text: str):
+        path = self._path(key)
+        tmp = self._tmp(path)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(tmp, "wb", compresslevel=self.level) as f:
+                f.write(text.encode("utf-8"))
+            self._publish(tmp, path)
+        except OSError as e:
+            self._discard(tmp)
+            log.warning("extract cache write failed: %s", e)
+
+    # -----------------------
+    # Chunk'lar (tablo/JSON)
+    # -----------------------
+    def get_chunks(self, key: str) -> Optional[Iterator[Chunk]]:
+        """Girdi varsa (metin, metadata) üreteci, yoksa None."""
+        path = self._path(key)
+        try:
+            f = gzip.open(path, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            return self._miss()
+        self._hit(path)
+        return self._read_chunks(f, path)
+
+    def _read_chunks(self, f, path: str) -> Iterator[Chunk]:
+        try:
+            with f:
+                for line in f:
+                    text, meta = json.loads(line)
+                    yield text, meta
+        except _CORRUPT:
+            # Bozuk girdi silinir; bir sonraki yükleme yeniden ayrıştırır
+            self._discard(path)
+            raise
+
+    def store_chunks(self, key: str, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        """Chunk'ları olduğu gibi verir, bir yandan önbelleğe yazar.
+
+        Girdi yalnızca üreteç sonuna kadar tüketilirse yayınlanır; yarıda kalan
+        (ör. gömme hatası) ya da ayrıştırıcısı hata veren yükleme saklanmaz.
+        """
+        path = self._path(key)
+        tmp = self._tmp(path)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            f = gzip.open(tmp, "wt", encoding="utf-8", compresslevel=self.level)
+        except OSError as e:
+            log.warning("extract cache write failed: %s", e)
+            yield from chunks
+            return
+
+        completed = False
+        try:
+            for text, meta in chunks:
+                if f is not None:
+                    try:
+                        f.write(json.dumps([text, meta], ensure_ascii=False) + "\n")
+                    except OSError as e:
+                        log.warning("extract cache write failed: %s", e)
+                        f = self._abandon(f, tmp)
+                yield text, meta
+            completed = True
+        finally:
+            if f is not None:
+                try:
+                    f.close()
+                    if completed:
+                        self._publish(tmp, path)
+                except OSError as e:
+                    log.warning("extract cache write failed: %s", e)
+                self._discard(tmp)  # yayınlandıysa zaten yok
+
+    # -----------------------
+    # Yardımcılar
+    # -----------------------
+    def _tmp(self, path: str) -> str:
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _abandon(self, f, tmp: str):
+        try:
+            f.close()
+        except OSError:
+            pass
+        self._discard(tmp)
+        return None
+
+    def _publish(self, tmp: str, path: str):
+        os.replace(tmp, path)
+        with self._lock:
+            self.stores += 1
+        self.evict()
+
+    def _discard(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _hit(self, path: str):
+        try:
+            os.utime(path)  # eviction sırası: en uzun süredir okunmayan önce gider
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _entries(self):
+        try:
+            scan = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        entries = []
+        for entry in scan:
+            if not entry.name.endswith(SUFFIX):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue  # başka worker sildi
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        """Toplam boyut `max_bytes`'ı aşıyorsa en eski girdileri siler."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+            removed += 1
+        if removed:
+            with self._lock:
+                self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "size": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+cache = ExtractionCache()
+metrics.register_cache("extraction", cache.stats)
+
+
+def _collect():
+    yield ("extract_cache_bytes", "gauge", "Compressed bytes held in the extraction cache.", {},
+           cache.stats()["bytes"])
+
+
+metrics.register_collector(_collect)
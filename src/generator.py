@@ -1,9 +1,13 @@
 import argparse
 import random
 import time
-from src import question
+from src import health, question, scheduler
+from src.logs import get_logger, setup as setup_logging
+
+log = get_logger(__name__)
 
 def main(total: int = 150, mistral_ratio: float = 0.5):
+    setup_logging(fmt="text")
     question.init_db()
 
     # hangi modelleri kullanacağız
@@ -19,19 +23,25 @@ def main(total: int = 150, mistral_ratio: float = 0.5):
         level = random.choice(question.LEVELS)
         qtype = random.choice(question.QUESTION_TYPES)
 
-        print(f"🔄 {topic} | {level} | {qtype} | {generated+1}/{total} | model={model}")
+        log.info("%s | %s | %s | %d/%d | model=%s", topic, level, qtype, generated + 1, total, model)
 
-        # soru üret
-        q = question.generate_question_from_context(topic, level, qtype, model=model)
+        # soru üret (bulk sınıfı: sohbet ve kullanıcı istekleri için yuva bırakır)
+        try:
+            with scheduler.priority("bulk"):
+                q = question.generate_question_from_context(topic, level, qtype, model=model)
+        except (scheduler.Busy, health.Unavailable) as e:
+            log.warning("LLM meşgul, %d sn sonra tekrar denenecek", e.retry_after)
+            time.sleep(e.retry_after)
+            continue
         ""
         if "error" not in q:
-            print(f"✅ Soru eklendi: {q.get('stem')[:60]}...")
+            log.info("Soru eklendi: %s...", q.get("stem")[:60])
             generated += 1
         else:
-            print(f"❌ Hata: {q}")
+            log.error("Hata: %s", q)
             time.sleep(3)  # API aşırı yüklenmesin diye küçük gecikme
 
-    print(f"\n🎉 Tamamlandı! Toplam {generated} soru üretildi.")
+    log.info("Tamamlandı! Toplam %d soru üretildi.", generated)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
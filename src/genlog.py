@@ -0,0 +1,259 @@
+# src/genlog.py
+"""
+Üretilen sorular için tamponlu, yalnızca-ekleme (append-only) log.
+
+Dosya açık tutulur; kayıtlar bellekte biriktirilip `GENLOG_BATCH_SIZE` kayıtta
+bir ya da `GENLOG_FLUSH_INTERVAL` saniyede bir topluca yazılır. Dosyalar gün
+değişince veya `GENLOG_MAX_BYTES` aşılınca döner (rotate):
+
+    data/questions/logs/2025-01-14.json
+    data/questions/logs/2025-01-14.1.json     (boyut nedeniyle yeni segment)
+    data/questions/logs/2025-01-13.json.gz    (GENLOG_COMPRESS=1 ise kapanan segment)
+
+Worker'lar aynı günün segmentine yazar. Yazma, döndürme ve sıkıştırma log
+dizinindeki `genlog.lock` (`workers.file_lock`) altında yapılır; başka bir
+worker'ın döndürdüğü ya da sıkıştırdığı segmenti tutan yazıcı, sonraki flush'ta
+güncel segmente geçer. Böylece kayıt kaybolmaz, satırlar birbirine karışmaz.
+
+Geçmiş logları belleğe almadan okumak/filtrelemek için:
+    python -m src.genlog cat --from 2025-01-01 --topic user_research
+"""
+import argparse
+import atexit
+import datetime
+import gzip
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from typing import Iterator, List, Optional
+
+from src import workers
+from src.logs import get_logger
+
+LOG_DIR = os.getenv("GENLOG_DIR", "data/questions/logs")
+BATCH_SIZE = int(os.getenv("GENLOG_BATCH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("GENLOG_FLUSH_INTERVAL", "1.0"))
+MAX_BYTES = int(os.getenv("GENLOG_MAX_BYTES", str(64 * 1024 * 1024)))
+COMPRESS = os.getenv("GENLOG_COMPRESS", "0") == "1"
+LOCK_NAME = "genlog"
+
+_SEGMENT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.json(\.gz)?$")
+log = get_logger(__name__)
+
+
+def _segment_name(day: str, index: int) -> str:
+    return f"{day}.json" if index == 0 else f"{day}.{index}.json"
+
+
+def list_segments(log_dir: str = LOG_DIR) -> List[tuple]:
+    """(gün, segment no, yol) listesini kronolojik sırada döner."""
+    if not os.path.isdir(log_dir):
+        return []
+    segments = []
+    for name in os.listdir(log_dir):
+        m = _SEGMENT_RE.match(name)
+        if m:
+            segments.append((m.group(1), int(m.group(2) or 0), os.path.join(log_dir, name)))
+    return sorted(segments)
+
+
+def _compress(path: str):
+    try:
+        with workers.file_lock(LOCK_NAME, os.path.dirname(path)):
+            if not os.path.exists(path):
+                return  # başka bir worker zaten sıkıştırdı
+            # Okuyucu yarım .gz görmesin diye önce geçici dosyaya yaz
+            with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            os.remove(path)
+    except OSError:
+        log.exception("generation log compression failed", extra={"path": path})
+
+
+# -----------------------
+# Writer
+# -----------------------
+class GenerationLog:
+    def __init__(self, log_dir: str = LOG_DIR, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_bytes: int = MAX_BYTES,
+                 compress: bool = COMPRESS):
+        self.log_dir = log_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._day: Optional[str] = None
+        self._index = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            os.makedirs(self.log_dir, exist_ok=True)
+            with workers.file_lock(LOCK_NAME, self.log_dir):
+                self._rotate_if_needed()
+                self._file.write("".join(lines))
+                self._file.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            if self._file is not None and self._stale():
+                self._release()
+            self._close_segment()
+
+    # -------- internals --------
+    def _after_fork_in_child(self):
+        # Ebeveynin tamponu ve flush thread'i çocuğa ait değil; segment yeniden açılır
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stop = threading.Event()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _ensure_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="genlog-flush", daemon=True)
+                self._flusher.start()
+                atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                log.exception("generation log flush failed")
+
+    def _rotate_if_needed(self):
+        """`file_lock` altında çağrılır; boyut diskteki dosyadan okunur (tüm worker'ların yazdığı)."""
+        today = datetime.date.today().isoformat()
+        if self._file is not None and self._stale():
+            self._release()  # başka worker döndürdü/sıkıştırdı; güncel segmente geçilir
+        elif self._file is not None and self._day != today:
+            self._close_segment()
+        if self._file is None:
+            self._day = today
+            self._index = self._last_index(today)
+            self._open()
+        if os.fstat(self._file.fileno()).st_size >= self.max_bytes:
+            self._close_segment()
+            self._index += 1
+            self._open()
+
+    def _open(self):
+        self._file = open(
+            os.path.join(self.log_dir, _segment_name(self._day, self._index)), "a", encoding="utf-8"
+        )
+
+    def _stale(self) -> bool:
+        """Tutulan segment silinmiş (sıkıştırılmış) ya da yerine yenisi açılmış mı?"""
+        if os.fstat(self._file.fileno()).st_nlink == 0:
+            return True
+        following = os.path.join(self.log_dir, _segment_name(self._day, self._index + 1))
+        return os.path.exists(following) or os.path.exists(following + ".gz")
+
+    def _release(self):
+        """Segmenti sıkıştırmadan bırakır (döndüren worker sıkıştırır)."""
+        self._file.close()
+        self._file = None
+
+    def _last_index(self, day: str) -> int:
+        """Yeniden başlatmada günün son segmentine devam eder (sıkıştırılmışsa yenisini açar)."""
+        indexes = [(i, path.endswith(".gz")) for d, i, path in list_segments(self.log_dir) if d == day]
+        if not indexes:
+            return 0
+        index, compressed = max(indexes)
+        return index + 1 if compressed else index
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        path = self._file.name
+        self._file.close()
+        self._file = None
+        if self.compress:
+            threading.Thread(target=_compress, args=(path,), name="genlog-gzip", daemon=True).start()
+
+
+generation_log = GenerationLog()
+# `generation_log` testlerde/benchmark'larda değiştirilebildiği için modül üzerinden okunur
+os.register_at_fork(after_in_child=lambda: generation_log._after_fork_in_child())
+
+
+# -----------------------
+# Reader
+# -----------------------
+def iter_records(log_dir: str = LOG_DIR, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                 **filters) -> Iterator[dict]:
+    """Log kayıtlarını satır satır akış halinde okur.
+
+    `date_from`/`date_to` (YYYY-MM-DD) segment adına göre dosya eler; `filters`
+    (ör. topic="x", level="beginner") alan eşitliği ile kayıt eler.
+    """
+    filters = {k: v for k, v in filters.items() if v is not None}
+    for day, _, path in list_segments(log_dir):
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            f = opener(path, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            continue  # arada sıkıştırılıp silinmiş olabilir
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # yarım kalmış son satır
+                if all(record.get(k) == v for k, v in filters.items()):
+                    yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soru üretim logu araçları")
+    parser.add_argument("command", choices=["cat", "count"])
+    parser.add_argument("--dir", default=LOG_DIR)
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--topic")
+    parser.add_argument("--level")
+    parser.add_argument("--type", dest="qtype")
+    args = parser.parse_args()
+
+    records = iter_records(args.dir, args.date_from, args.date_to,
+                           topic=args.topic, level=args.level, type=args.qtype)
+    out = sys.stdout
+    if args.command == "count":
+        out.write(f"{sum(1 for _ in records)}\n")
+        return
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
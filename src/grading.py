@@ -0,0 +1,386 @@
+# src/grading.py
+"""
+Açık uçlu / senaryo cevapları için kademeli puanlama (`POST /evaluate-answer`) ve
+tüm quiz denemesinin tek istekte puanlanıp kaydedilmesi (`POST /evaluate-quiz`).
+
+    1. boş cevap → 1, `expected` ile normalize edilmiş birebir eşleşme → 5
+    2. e5 embedding benzerliği: cevap ↔ `expected` ve (varsa) `rationale`
+       (en yüksek kosinüs) 1-5 puana doğrusal olarak eşlenir
+    3. benzerlik doğru/yanlış sınırına yakın belirsiz banttaysa
+       (`GRADE_BAND_LOW` ≤ s < `GRADE_BAND_HIGH`) Ollama'ya hakem olarak sorulur
+
+Kararlar (soru, normalize cevap) çiftine göre bellekte önbelleklenir. Kademe
+sayıları `grading_requests_total{tier}`, LLM'e yükseltme oranı
+`grading_escalation_ratio` metriğinde yayınlanır.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import requests
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+
+from src import health, llm, metrics, question_store, rag, scheduler
+from src.auth import get_current_user, record_attempt
+from src.logs import get_logger
+
+GRADER_MODEL = os.getenv("GRADER_MODEL", llm.DEFAULT_MODEL)
+# Kosinüs benzerliğinin 1 ve 5 puana karşılık gelen değerleri (e5 benzerlikleri dar bir aralıkta toplanır)
+GRADE_SIM_FLOOR = float(os.getenv("GRADE_SIM_FLOOR", "0.75"))
+GRADE_SIM_CEIL = float(os.getenv("GRADE_SIM_CEIL", "0.95"))
+GRADE_BAND_LOW = float(os.getenv("GRADE_BAND_LOW", "0.84"))
+GRADE_BAND_HIGH = float(os.getenv("GRADE_BAND_HIGH", "0.90"))
+GRADE_CACHE_MAX = int(os.getenv("GRADE_CACHE_MAX", "10000"))
+PASS_SCORE = 4
+
+router = APIRouter(tags=["grading"])
+log = get_logger(__name__)
+
+
+class EvaluateAnswerRequest(BaseModel):
+    question: str
+    expected: str
+    user_answer: str
+    rationale: Optional[str] = None
+    question_id: Optional[int] = None
+
+
+class EvaluateAnswerResponse(BaseModel):
+    score: int
+    is_correct: bool
+    feedback: Optional[str] = None
+    similarity: Optional[float] = None
+    tier: str
+
+
+# -----------------------
+# Verdict cache
+# -----------------------
+class VerdictCache:
+    """(soru anahtarı, normalize cevap) → karar; LRU, boyut sınırlı."""
+
+    def __init__(self, max_size: int = GRADE_CACHE_MAX):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[dict]:
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, key: Tuple[str, str], verdict: dict):
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+verdict_cache = VerdictCache()
+metrics.register_cache("grading_verdict", verdict_cache.stats)
+
+
+def _escalation_ratio():
+    escalated = sum(metrics.GRADING_REQUESTS.value(tier=t) for t in ("llm", "llm_failed"))
+    total = escalated + sum(metrics.GRADING_REQUESTS.value(tier=t) for t in ("exact", "embedding"))
+    ratio = escalated / total if total else 0.0
+    yield ("grading_escalation_ratio", "gauge",
+           "Share of uncached gradings escalated to the LLM judge.", {}, ratio)
+
+
+metrics.register_collector(_escalation_ratio)
+
+
+# -----------------------
+# Helpers
+# -----------------------
+def normalize_answer(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def question_key(req: EvaluateAnswerRequest) -> str:
+    """Önbellek anahtarı her zaman referans metinlerini (expected/rationale) içerir;
+    istemcinin gönderdiği bir referans, aynı id'li sorunun kararlarını etkilemez."""
+    reference = f"{req.expected}\x00{req.rationale or ''}"
+    if req.question_id is not None:
+        return f"id:{req.question_id}:{hashlib.sha1(reference.encode('utf-8')).hexdigest()}"
+    return hashlib.sha1(f"{req.question}\x00{reference}".encode("utf-8")).hexdigest()
+
+
+def _embed(texts):
+    with metrics.stage("embedding"):
+        vectors = np.asarray(rag.get_embedding_function()(list(texts)), dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+@lru_cache(maxsize=1024)
+def _reference_vectors(expected: str, rationale: str) -> np.ndarray:
+    # Aynı sorunun referans metinleri her cevapta yeniden kodlanmaz
+    return _embed([t for t in (expected, rationale) if t])
+
+
+def similarity(answer: str, expected: str, rationale: str = "") -> float:
+    refs = _reference_vectors(expected, rationale or "")
+    return float(np.max(refs @ _embed([answer])[0]))
+
+
+def score_from_similarity(sim: float) -> int:
+    span = (sim - GRADE_SIM_FLOOR) / (GRADE_SIM_CEIL - GRADE_SIM_FLOOR)
+    return int(round(1 + 4 * min(1.0, max(0.0, span))))
+
+
+def llm_judge(question: str, expected: str, answer: str, rationale: str = "") -> Optional[dict]:
+    """Ollama'dan 1-5 puan ve kısa geri bildirim ister; yanıt çözülemezse None."""
+    prompt = f"""Bir quiz cevabını puanla. Yalnızca JSON döndür: {{"score": 1-5, "feedback": "..."}}
+5 = beklenen cevapla anlamca aynı, 1 = ilgisiz ya da yanlış.
+
+Soru: {question}
+Beklenen cevap: {expected}
+{f"Açıklama: {rationale}" if rationale else ""}
+Kullanıcı cevabı: {answer}"""
+    try:
+        data = llm.generate(prompt, model=GRADER_MODEL, format="json", timeout=60,
+                            options={"temperature": 0, "num_predict": 120})
+        verdict = json.loads(data.get("response", ""))
+        score = int(verdict["score"])
+    except (llm.LLMError, scheduler.Busy, health.Unavailable, requests.RequestException,
+            ValueError, KeyError, TypeError) as e:
+        log.warning("llm judge failed", extra={"error": str(e)})
+        return None
+    return {"score": min(5, max(1, score)), "feedback": str(verdict.get("feedback") or "") or None}
+
+
+# -----------------------
+# Grading
+# -----------------------
+def resolve_reference(req: EvaluateAnswerRequest) -> EvaluateAnswerRequest:
+    """`question_id` depodaki bir açık uçlu soruysa expected/rationale depodan gelir,
+    istemcinin değerleri yok sayılır; değilse id düşürülür."""
+    if req.question_id is None:
+        return req
+    stored = question_store.get_question(req.question_id)
+    if not stored or not stored.get("expected"):
+        return req.model_copy(update={"question_id": None})
+    return req.model_copy(update={
+        "question": stored.get("stem") or req.question,
+        "expected": stored["expected"],
+        "rationale": stored.get("rationale"),
+    })
+
+
+def _cached_or_exact(req: EvaluateAnswerRequest):
+    """(önbellek anahtarı, hazır karar ya da None) döner; embedding gerekmeyen durumlar."""
+    answer = normalize_answer(req.user_answer)
+    key = (question_key(req), answer)
+    cached = verdict_cache.get(key)
+    if cached is not None:
+        metrics.GRADING_REQUESTS.inc(tier="cache")
+        return key, {**cached, "tier": "cache"}
+    if not answer or answer == normalize_answer(req.expected):
+        verdict = {"score": 5 if answer else 1, "feedback": None, "similarity": None,
+                   "tier": "exact", "is_correct": bool(answer)}
+        metrics.GRADING_REQUESTS.inc(tier="exact")
+        verdict_cache.put(key, verdict)
+        return key, verdict
+    return key, None
+
+
+def _verdict_from_similarity(req: EvaluateAnswerRequest, key, sim: float, rationale: str) -> dict:
+    verdict = {"score": score_from_similarity(sim), "feedback": None,
+               "similarity": round(sim, 4), "tier": "embedding"}
+    if GRADE_BAND_LOW <= sim < GRADE_BAND_HIGH:
+        judged = llm_judge(req.question, req.expected, req.user_answer, rationale or "")
+        if judged is None:
+            # Hakem başarısız: embedding puanı döner ama önbelleğe alınmaz
+            metrics.GRADING_REQUESTS.inc(tier="llm_failed")
+            return {**verdict, "is_correct": verdict["score"] >= PASS_SCORE}
+        verdict.update(judged, tier="llm")
+
+    verdict["is_correct"] = verdict["score"] >= PASS_SCORE
+    metrics.GRADING_REQUESTS.inc(tier=verdict["tier"])
+    verdict_cache.put(key, verdict)
+    return verdict
+
+
+def grade(req: EvaluateAnswerRequest) -> dict:
+    req = resolve_reference(req)
+    key, verdict = _cached_or_exact(req)
+    if verdict is not None:
+        return verdict
+    sim = similarity(req.user_answer, req.expected, req.rationale or "")
+    return _verdict_from_similarity(req, key, sim, req.rationale)
+
+
+def grade_open_ended_batch(reqs: List[EvaluateAnswerRequest]) -> List[dict]:
+    """`grade` ile aynı sonuç; önbellekte olmayan tüm cevaplar tek embedding çağrısıyla kodlanır."""
+    verdicts: List[Optional[dict]] = [None] * len(reqs)
+    pending = []
+    for i, req in enumerate(reqs):
+        key, verdicts[i] = _cached_or_exact(req)
+        if verdicts[i] is None:
+            pending.append((i, key))
+    if not pending:
+        return verdicts
+
+    texts, slots = [], []
+    for i, _ in pending:
+        req = reqs[i]
+        refs = [t for t in (req.expected, req.rationale) if t]
+        slots.append((len(texts), len(refs)))
+        texts += [req.user_answer] + refs
+    vectors = _embed(texts)
+    for (i, key), (start, n_refs) in zip(pending, slots):
+        sim = float(np.max(vectors[start + 1:start + 1 + n_refs] @ vectors[start]))
+        verdicts[i] = _verdict_from_similarity(reqs[i], key, sim, reqs[i].rationale)
+    return verdicts
+
+
+@router.post("/evaluate-answer", response_model=EvaluateAnswerResponse)
+@scheduler.priority("interactive")
+def evaluate_answer(req: EvaluateAnswerRequest, current_user: dict = Depends(get_current_user)):
+    """Açık uçlu cevabı 1-5 arası puanlar (embedding önce, belirsizse LLM)."""
+    with metrics.stage("grading"):
+        return grade(req)
+
+
+# -----------------------
+# Quiz (toplu) değerlendirme
+# -----------------------
+CHOICE_TYPES = {"mcq"}
+BOOLEAN_TYPES = {"truefalse", "true_false"}
+TRUE_WORDS = {"true", "doğru", "dogru", "evet", "d", "t", "1"}
+FALSE_WORDS = {"false", "yanlış", "yanlis", "hayır", "hayir", "y", "f", "0"}
+
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    user_answer: Union[str, int, bool, None] = None
+    # Soru depoda yoksa istemcinin gönderdiği alanlar kullanılır
+    type: Optional[str] = None
+    stem: Optional[str] = None
+    expected: Optional[str] = None
+    rationale: Optional[str] = None
+
+
+class QuizSubmission(BaseModel):
+    topic: str
+    difficulty: str
+    completed_at: Optional[str] = None
+    answers: List[QuizAnswer]
+    persist: bool = True
+
+
+def _choice_letter(text: str) -> str:
+    match = re.match(r"\s*([A-Za-z])\s*[\).:]", text or "")
+    return match.group(1).upper() if match else ""
+
+
+def check_choice(question: dict, user_answer) -> bool:
+    """MCQ: harf ("B"), indeks (1) ya da şık metniyle verilen cevabı kontrol eder."""
+    choices = question.get("choices") or []
+    index = question.get("answer_index")
+    letter = (question.get("answer") or "").strip()[:1].upper()
+    if index is None and letter:
+        index = ord(letter) - ord("A")
+    if isinstance(user_answer, bool) or user_answer is None:
+        return False
+    if isinstance(user_answer, int):
+        return user_answer == index
+    text = user_answer.strip()
+    if len(text) == 1:
+        return text.upper() == chr(ord("A") + index) if index is not None else False
+    if _choice_letter(text):
+        return _choice_letter(text) == chr(ord("A") + index) if index is not None else False
+    if index is not None and 0 <= index < len(choices):
+        correct = re.sub(r"^\s*[A-Za-z]\s*[\).:]\s*", "", choices[index])
+        return normalize_answer(text) == normalize_answer(correct)
+    return False
+
+
+def check_boolean(question: dict, user_answer) -> bool:
+    expected = question.get("answer")
+    if isinstance(expected, str):
+        expected = normalize_answer(expected) in TRUE_WORDS
+    if isinstance(user_answer, str):
+        word = normalize_answer(user_answer)
+        if word not in TRUE_WORDS | FALSE_WORDS:
+            return False
+        user_answer = word in TRUE_WORDS
+    return isinstance(user_answer, (bool, int)) and bool(user_answer) == bool(expected)
+
+
+def grade_quiz(answers: List[QuizAnswer]) -> List[dict]:
+    """Tüm cevapları tek geçişte puanlar: şıklı sorular sunucuda, açık uçlular toplu embedding ile."""
+    stored = question_store.get_questions(a.question_id for a in answers)
+    results: List[Optional[dict]] = [None] * len(answers)
+    open_ended = []
+    for i, a in enumerate(answers):
+        q = {**{k: v for k, v in a.model_dump().items() if v is not None}, **stored.get(a.question_id, {})}
+        qtype = q.get("type")
+        item = {"question_id": a.question_id, "type": qtype, "user_answer": a.user_answer}
+        if qtype in CHOICE_TYPES or qtype in BOOLEAN_TYPES:
+            correct = check_choice(q, a.user_answer) if qtype in CHOICE_TYPES else check_boolean(q, a.user_answer)
+            results[i] = {**item, "is_correct": correct, "score": 5 if correct else 1, "tier": "exact",
+                          "feedback": None, "correct_answer": q.get("answer")}
+            metrics.GRADING_REQUESTS.inc(tier="exact")
+        elif q.get("expected"):
+            open_ended.append((i, item, EvaluateAnswerRequest(
+                question=q.get("stem") or "", expected=q["expected"],
+                user_answer="" if a.user_answer is None else str(a.user_answer),
+                rationale=q.get("rationale"), question_id=a.question_id if a.question_id in stored else None,
+            )))
+        else:
+            results[i] = {**item, "is_correct": False, "score": None, "tier": "ungraded",
+                          "feedback": "Soru bulunamadı", "correct_answer": None}
+
+    verdicts = grade_open_ended_batch([req for _, _, req in open_ended])
+    for (i, item, req), verdict in zip(open_ended, verdicts):
+        results[i] = {**item, **{k: verdict[k] for k in ("is_correct", "score", "tier", "feedback")},
+                      "correct_answer": req.expected}
+    return results
+
+
+@router.post("/evaluate-quiz")
+@scheduler.priority("interactive")
+def evaluate_quiz(submission: QuizSubmission, current_user: dict = Depends(get_current_user)):
+    """Bir quiz denemesinin tüm cevaplarını tek istekte puanlar ve (persist=True) kaydeder."""
+    with metrics.stage("grading"):
+        items = grade_quiz(submission.answers)
+    correct = sum(1 for item in items if item["is_correct"])
+    attempt_id = None
+    if submission.persist:
+        attempt_id = record_attempt(
+            current_user["id"], submission.topic, submission.difficulty, len(items), correct,
+            [{"question_id": item["question_id"], "user_answer": item["user_answer"],
+              "correct_answer": item["correct_answer"], "is_correct": item["is_correct"]}
+             for item in items],
+        )
+    return {
+        "attempt_id": attempt_id,
+        "total_questions": len(items),
+        "correct_answers": correct,
+        "score": round(correct / len(items) * 100, 2) if items else 0.0,
+        "items": items,
+    }
@@ -0,0 +1,217 @@
+# src/health.py
+"""
+Arka uç sağlığı: önbelleklenmiş durum, arka plan yoklaması ve devre kesici.
+
+Ollama ve vektör deposu her `HEALTH_INTERVAL` saniyede bir arka plan thread'inde
+yoklanır; istekler ağ turu yapmadan önbellekteki durumu okur (`/chat/health`,
+`evaluate.check_ollama_connection`).
+
+Her arka ucun bir `Breaker`'ı vardır. Art arda `BREAKER_FAILURES` hata (yoklama
+ya da gerçek çağrı) devreyi açar; açıkken çağrılar beklemeden `Unavailable`
+(503 + Retry-After) alır. Yoklama başarılı olunca devre kapanır. Monitör
+çalışmıyorsa (ör. `generator.py`) `BREAKER_COOLDOWN` sonunda tek bir deneme
+çağrısına izin verilir (half-open).
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src import metrics
+from src.logs import get_logger
+
+log = get_logger(__name__)
+
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "10"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "15"))
+HEALTH_MONITOR = os.getenv("HEALTH_MONITOR", "1") == "1"
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class Unavailable(Exception):
+    """Devre açık: arka uç kapalı kabul ediliyor, çağrı yapılmadı."""
+
+    status_code = 503
+
+    def __init__(self, backend: str, retry_after: int):
+        super().__init__(f"{backend} unavailable (circuit open)")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+# -----------------------
+# Devre kesici
+# -----------------------
+class Breaker:
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._count = 0
+        self._opened_at = 0.0
+        self._trial_at = None  # half-open deneme çağrısının başladığı an
+
+    def allow(self):
+        """Çağrıdan önce: devre açıksa `Unavailable` fırlatır."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self.state == OPEN and elapsed >= self.cooldown:
+                self._set(HALF_OPEN)
+            now = time.monotonic()
+            # Tek deneme çağrısı; diğerleri sonucu beklemeden reddedilir. Sonucu hiç
+            # bildirilmeyen (ör. kuyrukta reddedilen) deneme cooldown sonunda yenilenir.
+            if self.state == HALF_OPEN and (self._trial_at is None or now - self._trial_at >= self.cooldown):
+                self._trial_at = now
+                return
+            retry_after = max(1, int(self.cooldown - elapsed + 0.999)) if self.state == OPEN else 1
+        raise Unavailable(self.name, retry_after)
+
+    def success(self):
+        with self._lock:
+            self._count = 0
+            self._trial_at = None
+            if self.state != CLOSED:
+                self._set(CLOSED)
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            self._trial_at = None
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._count >= self.failures):
+                self._opened_at = time.monotonic()
+                self._set(OPEN)
+
+    def _set(self, state: str):
+        self.state = state
+        metrics.BREAKER_TRANSITIONS.inc(backend=self.name, state=state)
+        log.log(logging.WARNING if state == OPEN else logging.INFO, "circuit %s", state,
+                extra={"backend": self.name})
+
+
+# -----------------------
+# Arka uçlar
+# -----------------------
+class Backend:
+    def __init__(self, name: str, probe: Callable[[], Optional[dict]]):
+        self.name = name
+        self.probe = probe  # başarıda ayrıntı sözlüğü (ya da None = henüz yüklenmedi) döner
+        self.breaker = Breaker(name)
+        self._status = {"status": "unknown", "checked_at": None, "latency_ms": None,
+                        "error": None, "details": {}}
+
+    def available(self) -> bool:
+        """İstek yolunda ağ turu yapmadan: devre açık değilse True."""
+        return self.breaker.state != OPEN
+
+    def check(self):
+        start = time.perf_counter()
+        try:
+            details = self.probe()
+        except Exception as e:
+            self.breaker.failure()
+            self._update("down", start, error=f"{type(e).__name__}: {e}")
+            return
+        if details is None:
+            self._update("loading", start)
+            return
+        self.breaker.success()
+        self._update("up", start, details=details)
+
+    def _update(self, status: str, start: float, error: str = None, details: dict = None):
+        self._status = {
+            "status": status,
+            "checked_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "error": error,
+            "details": details or {},
+        }
+
+    def status(self) -> dict:
+        return {**self._status, "breaker": self.breaker.state}
+
+
+def _probe_ollama():
+    from src import llm
+
+    return {"models": llm.list_models(timeout=HEALTH_PROBE_TIMEOUT)}
+
+
+def _probe_vector_store():
+    from src import rag
+
+    if not rag.readiness()["ready"]:
+        return None  # yükleme warmup'ın işi; yoklama modeli yüklemeye başlatmaz
+    return {"count": rag.get_collection().count()}
+
+
+ollama = Backend("ollama", _probe_ollama)
+vector_store = Backend("vector_store", _probe_vector_store)
+BACKENDS: Dict[str, Backend] = {b.name: b for b in (ollama, vector_store)}
+
+
+def status() -> dict:
+    return {name: b.status() for name, b in BACKENDS.items()}
+
+
+def _collect():
+    for name, b in BACKENDS.items():
+        labels = {"backend": name}
+        yield ("backend_up", "gauge", "Last health probe succeeded (1) or not (0).", labels,
+               1 if b.status()["status"] == "up" else 0)
+        yield ("circuit_breaker_state", "gauge", "Circuit state (0 closed, 1 half-open, 2 open).", labels,
+               _STATE_VALUES[b.breaker.state])
+
+
+metrics.register_collector(_collect)
+
+
+# -----------------------
+# Monitör
+# -----------------------
+_monitor = {"thread": None, "stop": threading.Event()}
+
+
+def _run(stop: threading.Event):
+    while True:
+        for backend in BACKENDS.values():
+            backend.check()
+        if stop.wait(HEALTH_INTERVAL):
+            return
+
+
+def start_monitor() -> bool:
+    """Startup'ta çağrılır; her worker kendi monitör thread'ini çalıştırır."""
+    if not HEALTH_MONITOR or _monitor["thread"] is not None:
+        return False
+    _monitor["stop"] = stop = threading.Event()
+    _monitor["thread"] = threading.Thread(target=_run, args=(stop,), name="health-monitor", daemon=True)
+    _monitor["thread"].start()
+    return True
+
+
+def stop_monitor():
+    thread = _monitor["thread"]
+    if thread is not None:
+        _monitor["stop"].set()
+        thread.join(timeout=HEALTH_PROBE_TIMEOUT + 1)
+        _monitor["thread"] = None
+
+
+def _after_fork_in_child():
+    # Thread fork'a dayanmaz; worker startup'ta yeniden başlatır
+    _monitor["thread"] = None
+    for backend in BACKENDS.values():
+        backend.breaker._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,60 @@
+# src/http_cache.py
+"""
+HTTP önbellekleme: sürüm sayacı tabanlı ETag'ler ve koşullu GET.
+
+Okuma endpoint'leri verinin bağlı olduğu `workers.Generation` sayaçlarından
+(indeks, sorular, denemeler) bir ETag üretir. Sayaçlar veri değiştiğinde
+artırıldığı için ETag veriyi okumadan hesaplanır; `If-None-Match` eşleşirse
+sorgu ve JSON serileştirme hiç yapılmadan 304 döner.
+
+    @app.get("/topics")
+    def list_topics(request: Request, response: Response):
+        not_modified = http_cache.conditional(request, response, rag.index_generation)
+        if not_modified:
+            return not_modified
+        ...
+
+Sıkıştırma `GZipMiddleware` ile yapılır (bkz. app.py, `GZIP_MIN_SIZE`).
+"""
+import hashlib
+import os
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.workers import Generation
+
+# Yanıt biçimi değiştiğinde artırılır; eski ETag'ler geçersiz olur
+ETAG_SCHEMA = "1"
+CACHE_CONTROL = "private, no-cache"
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+
+def make_etag(request: Request, *generations: Generation, vary: str = "") -> str:
+    versions = "-".join(f"{g.name}{g.current()}" for g in generations)
+    digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{vary}".encode("utf-8")).hexdigest()
+    return f'W/"{ETAG_SCHEMA}-{versions}-{digest[:12]}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Zayıf karşılaştırma: W/ öneki yok sayılır
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def conditional(request: Request, response: Response, *generations: Generation,
+                vary: str = "") -> Optional[Response]:
+    """ETag'i yanıta ekler; istemcinin kopyası güncelse 304 yanıtı döner."""
+    etag = make_etag(request, *generations, vary=vary)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
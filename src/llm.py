@@ -0,0 +1,115 @@
+# src/llm.py
+"""
+Ortak Ollama istemcisi.
+
+`question.py`, `quiz.py`, `admin.py` ve `evaluate.py` LLM çağrılarını buradan
+yapar; böylece süre, token sayısı ve token/sn metrikleri tek noktada toplanır.
+Her çağrı Ollama'ya gitmeden önce `src/scheduler.py` üzerinden sınıfına göre bir
+yuva alır.
+
+Sunucu adresi `OLLAMA_BASE_URL` ile değiştirilebilir (ör. test ve benchmark'larda
+`python -m benchmarks.ollama_sim` simülatörüne yönlendirmek için).
+"""
+import json
+import os
+import time
+from typing import Optional
+
+import requests
+from dotenv import load_dotenv
+
+from src import health, metrics, scheduler, singleflight
+
+load_dotenv()
+
+OLLAMA_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+DEFAULT_MODEL = "llama3:instruct"
+# (bağlantı, okuma) sn; stream'de okuma süresi iki parça arasındaki en uzun bekleme
+DEFAULT_TIMEOUT = (float(os.getenv("LLM_CONNECT_TIMEOUT", "5")), float(os.getenv("LLM_READ_TIMEOUT", "120")))
+
+
+class LLMError(Exception):
+    """Ollama 200 dışı bir durum kodu döndüğünde fırlatılır."""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Ollama error: {status_code}")
+        self.status_code = status_code
+        self.body = body
+
+
+_flight = singleflight.Group("llm")
+
+
+def generate(prompt: str, model: str = DEFAULT_MODEL, options: Optional[dict] = None,
+             stream: bool = False, timeout=DEFAULT_TIMEOUT, **extra) -> dict:
+    """`/api/generate` çağrısı yapar ve son Ollama yanıtını döner.
+
+    `stream=True` iken parçalar birleştirilir; dönen sözlükte `response` tam
+    metni, diğer alanlar (eval_count, eval_duration, ...) son parçayı içerir.
+    Aynı model/prompt/ayarlarla ve aynı öncelik sınıfında eşzamanlı gelen çağrılar
+    tek Ollama isteğini paylaşır; sohbet isteği toplu bir işin kuyruğuna katılmaz.
+    Ollama devresi açıksa (bkz. src/health.py) istek yapılmadan `health.Unavailable` fırlatılır.
+    """
+    key = singleflight.make_key(scheduler.current_priority(), model, prompt, options, stream, extra)
+    return _flight.do(key, _generate, prompt, model, options, stream, timeout, **extra)
+
+
+def _generate(prompt: str, model: str, options: Optional[dict], stream: bool, timeout,
+              **extra) -> dict:
+    payload = {"model": model, "prompt": prompt, "stream": stream, **extra}
+    if options:
+        payload["options"] = options
+
+    health.ollama.breaker.allow()
+    # Kuyrukta beklenen süre "llm" aşamasına sayılmaz; reddedilen çağrı Ollama'ya hiç gitmez
+    with scheduler.llm_slot():
+        status = "error"
+        try:
+            with metrics.stage("llm"):
+                start = time.perf_counter()
+                res = requests.post(
+                    f"{OLLAMA_URL}/api/generate", json=payload, stream=stream, timeout=timeout,
+                )
+                if res.status_code != 200:
+                    raise LLMError(res.status_code, res.text)
+
+                ttft = None
+                if stream:
+                    parts, data = [], {}
+                    for line in res.iter_lines():
+                        if not line:
+                            continue
+                        try:
+                            chunk = json.loads(line)
+                        except ValueError:
+                            continue
+                        if chunk.get("response"):
+                            if ttft is None:
+                                ttft = time.perf_counter() - start
+                            parts.append(chunk["response"])
+                        if chunk.get("done"):
+                            data = chunk
+                    data = {**data, "response": "".join(parts)}
+                else:
+                    data = res.json()
+            status = "ok"
+        except (requests.ConnectionError, requests.Timeout):
+            health.ollama.breaker.failure()
+            raise
+        except LLMError as e:
+            if e.status_code >= 500:
+                health.ollama.breaker.failure()
+            raise
+        finally:
+            metrics.LLM_REQUESTS.inc(model=model, status=status)
+    health.ollama.breaker.success()
+
+    metrics.record_llm_response(model, data, ttft)
+    return data
+
+
+def list_models(timeout: float = 2) -> list:
+    """`/api/tags` ile yüklü model adlarını döner (Ollama ulaşılamazsa hata fırlatır)."""
+    res = requests.get(f"{OLLAMA_URL}/api/tags", timeout=timeout)
+    res.raise_for_status()
+    return [m["name"] for m in res.json().get("models", [])]
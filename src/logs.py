@@ -0,0 +1,179 @@
+# src/logs.py
+"""
+Bloklamayan, yapılandırılmış loglama.
+
+İstek yolundaki log çağrıları yalnızca bir kuyruğa kayıt bırakır; biçimlendirme ve
+stdout/dosya yazımı arka plandaki `QueueListener` thread'inde yapılır.
+
+Kullanım:
+    from src.logs import get_logger
+    log = get_logger(__name__)
+
+    log.info("question saved", extra={"question_id": qid})
+    log.debug("raw model output", extra={"payload": text[:800], "sample": True})
+
+`extra` içindeki alanlar JSON çıktısına eklenir; aktif trace id otomatik eklenir.
+`sample=True` işaretli (büyük gövdeli) kayıtlar `LOG_SAMPLE_RATE` oranında tutulur.
+
+Ayarlar (ortam değişkenleri):
+    LOG_LEVEL=INFO          minimum seviye
+    LOG_FORMAT=json         json | text
+    LOG_SAMPLE_RATE=0.01    sample=True kayıtlarının tutulma oranı
+    LOG_FILE=               boş değilse stdout yerine bu dosyaya yazılır
+    LOG_QUEUE_SIZE=10000    kuyruk dolarsa yeni kayıtlar düşürülür
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+from src import tracing
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# LogRecord'un kendi alanları; geri kalanlar `extra` ile gelmiştir
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+_plain = logging.Formatter()
+_listener = None
+_lock = threading.Lock()
+
+
+# -----------------------
+# Formatter / Filter
+# -----------------------
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satırlık bir JSON nesnesine çevirir."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Kayda aktif trace id'yi ekler ve `sample=True` kayıtlarını örnekler.
+
+    Kuyruğa girmeden önce (çağıran thread'de) çalışır; trace context'i ancak
+    burada okunabilir ve düşürülen kayıtlar hiç biçimlendirilmez.
+    """
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False) and random.random() >= self.sample_rate:
+            return False
+        if not hasattr(record, "trace_id"):
+            trace_id = tracing.current_trace_id()
+            if trace_id:
+                record.trace_id = trace_id
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Kuyruk doluysa isteği bekletmek yerine kaydı düşürür."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Mesajı burada birleştir; traceback ayrı alan olarak kalsın
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _plain.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# -----------------------
+# Setup
+# -----------------------
+def setup(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, path: str = LOG_FILE):
+    """Root logger'ı kuyruk + arka plan listener ile yapılandırır (idempotent)."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            target = logging.FileHandler(path, encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stdout)
+        if fmt == "json":
+            target.setFormatter(JsonFormatter())
+        else:
+            target.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s"))
+
+        handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def shutdown():
+    """Kuyrukta bekleyen kayıtları yazar ve listener thread'ini durdurur."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _after_fork_in_child():
+    """Listener thread'i fork'ta çocuğa geçmez: yeni kuyruk ve listener ile yeniden başlat."""
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    handler = next(h for h in logging.getLogger().handlers if isinstance(h, _DroppingQueueHandler))
+    handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(handler.queue, *_listener.handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,292 @@
+# src/metrics.py
+"""
+Hafif, bağımlılıksız Prometheus uyumlu metrikler.
+
+Kullanım:
+    from src import metrics
+
+    with metrics.stage("retrieval"):
+        ...
+
+    metrics.REQUESTS.inc(method="GET", route="/health", status="200")
+
+`render()` tüm metrikleri Prometheus text formatında (0.0.4) döner; `/metrics`
+endpoint'i bunu yayınlar.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src import tracing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400)
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+_lock = threading.Lock()
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: dict) -> tuple:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _lock:
+            _registry.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(self.labelnames, labels))
+        return state[-1] if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+# -----------------------
+# Collectors (scrape anında okunan değerler)
+# -----------------------
+def register_collector(fn: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+    """`fn()` → (name, kind, help, labels, value) demetleri üretir."""
+    with _lock:
+        _collectors.append(fn)
+
+
+def register_cache(name: str, stats_fn: Callable[[], dict]):
+    """`stats_fn()` içinde `hits`, `misses` (ve opsiyonel `size`) dönen bir önbelleği kaydeder."""
+
+    def collect():
+        s = stats_fn()
+        labels = {"cache": name}
+        yield ("cache_hits_total", "counter", "Cache hits.", labels, s.get("hits", 0))
+        yield ("cache_misses_total", "counter", "Cache misses.", labels, s.get("misses", 0))
+        total = s.get("hits", 0) + s.get("misses", 0)
+        ratio = s.get("hits", 0) / total if total else 0.0
+        yield ("cache_hit_ratio", "gauge", "Cache hit ratio since start.", labels, ratio)
+        if "size" in s:
+            yield ("cache_entries", "gauge", "Current cache entries.", labels, s["size"])
+
+    register_collector(collect)
+
+
+def _render_collectors() -> List[str]:
+    grouped: Dict[str, Tuple[str, str, List[str]]] = {}
+    for fn in list(_collectors):
+        try:
+            samples = list(fn())
+        except Exception:
+            continue
+        for name, kind, doc, labels, value in samples:
+            _, _, lines = grouped.setdefault(name, (kind, doc, []))
+            lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    out = []
+    for name, (kind, doc, lines) in grouped.items():
+        out += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"] + lines
+    return out
+
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry):
+        samples = metric.render()
+        if samples:
+            lines += metric.header() + samples
+    lines += _render_collectors()
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Uygulama metrikleri
+# -----------------------
+REQUESTS = Counter("http_requests_total", "HTTP requests.", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+STAGE_LATENCY = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Latency of pipeline stages (retrieval, embedding, llm, parse, sqlite, ...).",
+    ("stage",),
+)
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Pipeline stage failures.", ("stage",))
+
+LLM_REQUESTS = Counter("llm_requests_total", "LLM calls.", ("model", "status"))
+LLM_PROMPT_TOKENS = Counter("llm_prompt_tokens_total", "Prompt tokens sent to the LLM.", ("model",))
+LLM_COMPLETION_TOKENS = Counter(
+    "llm_completion_tokens_total", "Tokens generated by the LLM.", ("model",)
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second", "LLM generation speed.", ("model",), buckets=TOKENS_PER_SECOND_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed token.", ("model",)
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total", "Calls through single-flight groups (coalesced = shared a running call).",
+    ("group", "role"),
+)
+
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "LLM calls waiting for an Ollama slot.", ("priority",))
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time LLM calls waited for an Ollama slot.", ("priority",)
+)
+LLM_SLOTS_IN_USE = Gauge("llm_slots_in_use", "Ollama slots held by this process.", ("priority",))
+LLM_SCHEDULER_REJECTIONS = Counter(
+    "llm_scheduler_rejections_total", "LLM calls rejected by admission control (queue_full, timeout).",
+    ("priority", "reason"),
+)
+
+BREAKER_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes.", ("backend", "state")
+)
+
+GRADING_REQUESTS = Counter(
+    "grading_requests_total", "Answer gradings by tier (cache, exact, embedding, llm, llm_failed).",
+    ("tier",),
+)
+
+CONTEXT_RETRIEVED_TOKENS = Counter(
+    "context_retrieved_tokens_total", "Tokens in retrieved chunks before packing.", ("use",)
+)
+CONTEXT_PACKED_TOKENS = Counter(
+    "context_packed_tokens_total", "Context tokens sent to the LLM after packing.", ("use",)
+)
+
+INGEST_DOCUMENTS = Counter("ingest_documents_total", "Documents indexed.", ("status",))
+INGEST_BYTES = Counter("ingest_bytes_total", "Raw bytes received for indexing.")
+INGEST_CHARS = Counter("ingest_chars_total", "Characters extracted from documents.")
+INGEST_CHUNKS = Counter("ingest_chunks_total", "Chunks written to the vector store.")
+UPLOADS_REJECTED = Counter(
+    "uploads_rejected_total", "Uploads rejected for exceeding MAX_UPLOAD_MB.", ("reason",)
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Bir pipeline aşamasının süresini (ve hata sayısını) kaydeder; aynı zamanda bir trace span'i açar."""
+    start = time.perf_counter()
+    try:
+        with tracing.span(name):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=name)
+
+
+def record_llm_response(model: str, data: dict, ttft: Optional[float] = None):
+    """Ollama yanıtındaki `prompt_eval_count`, `eval_count`, `eval_duration` alanlarını işler."""
+    LLM_PROMPT_TOKENS.inc(data.get("prompt_eval_count") or 0, model=model)
+    eval_count = data.get("eval_count") or 0
+    LLM_COMPLETION_TOKENS.inc(eval_count, model=model)
+    eval_duration = data.get("eval_duration") or 0  # nanosaniye
+    if eval_count and eval_duration:
+        LLM_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9), model=model)
+    if ttft is not None:
+        LLM_TIME_TO_FIRST_TOKEN.observe(ttft, model=model)
@@ -0,0 +1,56 @@
+# src/pagination.py
+"""
+Keyset (cursor) sayfalama yardımcıları.
+
+Cursor, son döndürülen satırın sıralama anahtarını (ör. `(quiz_date, id)`) taşır;
+bir sonraki sayfa `WHERE (col1, col2) < (?, ?)` ile indeks üzerinden okunur,
+OFFSET taraması yapılmaz.
+"""
+import base64
+import json
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Cursor'u çözer; bozuk veya beklenmeyen uzunlukta ise 400 döner."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_clause(columns: Tuple[str, ...], cursor: Optional[str]) -> Tuple[str, list]:
+    """Azalan sıralama için `(a, b) < (?, ?)` koşulunu üretir."""
+    if not cursor:
+        return "", []
+    values = decode_cursor(cursor, len(columns))
+    placeholders = ", ".join("?" for _ in columns)
+    return f"({', '.join(columns)}) < ({placeholders})", values
+
+
+def date_range_clause(column: str, date_from: Optional[date], date_to: Optional[date]) -> Tuple[List[str], list]:
+    """`date_from` ve `date_to` (her ikisi de dahil) için koşulları döner."""
+    clauses, params = [], []
+    if date_from:
+        clauses.append(f"{column} >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        clauses.append(f"{column} < ?")
+        params.append((date_to + timedelta(days=1)).isoformat())
+    return clauses, params
@@ -0,0 +1,187 @@
+# src/profiling.py
+"""
+İsteğe bağlı (on-demand) örnekleyici profil oturumları.
+
+Admin bir route için oturum açar; sonraki N istek profillenir ve sonuç
+flame graph araçlarının (flamegraph.pl, speedscope, inferno) doğrudan okuyabildiği
+"collapsed stack" formatında döner:
+
+    app.py:index;rag.py:extract_text_from_file;PyPDF2/...:extract_text 42
+
+Modlar:
+    cpu    → arka plan thread'i `sys._current_frames()` ile periyodik örnek alır
+    alloc  → istek süresince `tracemalloc` ile ayrılan bellek (byte) izlenir
+
+Aynı anda yalnızca tek bir oturum aktif olabilir.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 32
+# Boşta bekleyen thread'lerin en içteki çerçeveleri (örnek sayılmaz)
+IDLE_FUNCTIONS = {"select", "poll", "wait", "_wait_for_tstate_lock", "get", "accept", "run_forever",
+                  "_worker", "_run_once", "sleep"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame) -> Optional[str]:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    if not labels or labels[0].rsplit(":", 1)[-1] in IDLE_FUNCTIONS:
+        return None
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    def __init__(self, route: str, requests: int, mode: str, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.route = route
+        self.mode = mode
+        self.interval = interval
+        self.requested = requests
+        self.completed = 0
+        self.active_requests = 0
+        self.samples: Counter = Counter()
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._alloc_start = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    # -------- cpu --------
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = _collapse(frame)
+                if stack:
+                    with self._lock:
+                        self.samples[stack] += 1
+
+    # -------- lifecycle --------
+    def begin_request(self) -> bool:
+        with self._lock:
+            if self.done or self.completed + self.active_requests >= self.requested:
+                return False
+            self.active_requests += 1
+            first = self.active_requests == 1
+        if first:
+            if self.mode == "cpu":
+                self._stop.clear()
+                self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._sampler.start()
+            else:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._alloc_start = tracemalloc.take_snapshot()
+        return True
+
+    def end_request(self):
+        with self._lock:
+            self.active_requests -= 1
+            self.completed += 1
+            last = self.active_requests == 0
+            finished = self.completed >= self.requested
+        if last:
+            if self.mode == "cpu":
+                self._stop.set()
+                if self._sampler is not None:
+                    self._sampler.join()
+            else:
+                self._collect_allocations()
+        if finished:
+            if self.mode == "alloc" and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.finished_at = time.time()
+
+    def _collect_allocations(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        for stat in snapshot.compare_to(self._alloc_start, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            labels = [
+                f"{os.path.basename(f.filename)}:{f.lineno}" for f in reversed(stat.traceback)
+            ]
+            with self._lock:
+                self.samples[";".join(labels)] += stat.size_diff
+
+    # -------- output --------
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.samples.items(), key=lambda kv: kv[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "mode": self.mode,
+            "requested": self.requested,
+            "completed": self.completed,
+            "done": self.done,
+            "unit": "samples" if self.mode == "cpu" else "bytes",
+            "stacks": len(self.samples),
+        }
+
+
+_sessions: Dict[str, ProfileSession] = {}
+_active: Optional[ProfileSession] = None
+_lock = threading.Lock()
+
+
+def arm(route: str, requests: int = 10, mode: str = "cpu", interval: float = 0.005) -> ProfileSession:
+    """`route` (şablon path, ör. `/quiz`) için yeni bir profil oturumu başlatır."""
+    global _active
+    if mode not in ("cpu", "alloc"):
+        raise ValueError("mode must be 'cpu' or 'alloc'")
+    with _lock:
+        if _active is not None and not _active.done:
+            raise RuntimeError(f"Profile session {_active.id} is still running")
+        _active = ProfileSession(route, requests, mode, interval)
+        _sessions[_active.id] = _active
+        return _active
+
+
+def get_session(session_id: str) -> Optional[ProfileSession]:
+    return _sessions.get(session_id)
+
+
+def armed_route() -> Optional[str]:
+    session = _active
+    return session.route if session is not None and not session.done else None
+
+
+@contextmanager
+def profile_request(route: Optional[str]):
+    """Route aktif oturumla eşleşiyorsa isteği profiller; aksi halde hiçbir şey yapmaz."""
+    session = _active
+    if session is None or session.done or route != session.route or not session.begin_request():
+        yield
+        return
+    try:
+        yield
+    finally:
+        session.end_request()
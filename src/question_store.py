@@ -0,0 +1,346 @@
+# src/question_store.py
+"""
+Tek soru deposu (question repository).
+
+`question.py` (RAG ile üretilen sorular) ve `admin.py` (admin panelinden üretilen
+sorular) aynı tabloyu kullanır: hash ile tekilleştirme, `answer`/`expected`
+alanları ve `source_model` tek şemada toplanır.
+
+Eski `quiz.db` içindeki `questions` tablosunu bu depoya taşımak için:
+    python -m src.question_store migrate [--quiz-db quiz.db]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+from typing import Iterable, Optional
+
+from src import tracing, workers
+from src.logs import get_logger, setup as setup_logging
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, EXPORT_BATCH_SIZE, date_range_clause, encode_cursor, keyset_clause,
+)
+
+DB_PATH = "data/questions/questions.db"
+LEGACY_DB_PATH = "quiz.db"
+log = get_logger(__name__)
+
+# Soru eklendiğinde/silindiğinde artırılır (ETag'ler, bkz. src/http_cache.py)
+generation = workers.Generation("questions")
+
+QUESTION_COLUMNS = (
+    "id, type, topic, level, stem, choices, answer, answer_index, expected, rationale, "
+    "source_model, created_at"
+)
+
+INSERT_SQL = """
+INSERT OR IGNORE INTO questions
+    (hash, type, topic, level, stem, choices, answer, answer_index, expected, rationale, source_model)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# -----------------------
+# Database Setup
+# -----------------------
+def connect():
+    return sqlite3.connect(DB_PATH)
+
+def init_db():
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        hash TEXT UNIQUE,
+        type TEXT,
+        topic TEXT,
+        level TEXT,
+        stem TEXT,
+        choices TEXT,
+        answer TEXT,
+        answer_index INTEGER,
+        expected TEXT,
+        rationale TEXT,
+        source_model TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    # Eski şemadan gelen depolarda eksik kolonları ekle
+    existing = {row[1] for row in c.execute("PRAGMA table_info(questions)")}
+    for column in ("answer", "expected"):
+        if column not in existing:
+            c.execute(f"ALTER TABLE questions ADD COLUMN {column} TEXT")
+
+    # Filtreli örnekleme ve listeleme indeksleri
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_topic_level_type ON questions (topic, level, type)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_questions_created ON questions (created_at, id)")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_questions_topic_created ON questions (topic, created_at)"
+    )
+    conn.commit()
+    conn.close()
+
+# -----------------------
+# Helpers
+# -----------------------
+def question_hash(q: dict) -> str:
+    raw = json.dumps({
+        "type": q.get("type"),
+        "topic": q.get("topic"),
+        "level": q.get("level"),
+        "stem": q.get("stem")
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+def _insert_params(q: dict) -> tuple:
+    answer = q.get("answer")
+    if answer is not None and not isinstance(answer, str):
+        answer = json.dumps(answer, ensure_ascii=False)  # true/false soruları bool taşır
+    return (
+        q.get("hash") or question_hash(q),
+        q.get("type"),
+        q.get("topic"),
+        q.get("level"),
+        q.get("stem"),
+        json.dumps(q.get("choices") or [], ensure_ascii=False),
+        answer,
+        q.get("answer_index"),
+        q.get("expected"),
+        q.get("rationale"),
+        q.get("source_model", "ollama"),
+    )
+
+def _row_to_question(r) -> dict:
+    answer = r[6]
+    if answer in ("true", "false"):
+        answer = answer == "true"
+    return {
+        "id": r[0],
+        "type": r[1],
+        "topic": r[2],
+        "level": r[3],
+        "stem": r[4],
+        "choices": json.loads(r[5]) if r[5] else [],
+        "answer": answer,
+        "answer_index": r[7],
+        "expected": r[8],
+        "rationale": r[9],
+        "source_model": r[10],
+        "created_at": r[11],
+    }
+
+# -----------------------
+# Writes
+# -----------------------
+@tracing.traced()
+def save_question(q: dict) -> Optional[int]:
+    """Soruyu kaydeder ve id'sini döner. Aynı hash'li soru varsa mevcut id döner."""
+    params = _insert_params(q)
+    conn = connect()
+    try:
+        c = conn.cursor()
+        c.execute(INSERT_SQL, params)
+        conn.commit()
+        if c.rowcount == 1:
+            generation.bump()
+            return c.lastrowid
+        log.info("duplicate question skipped", extra={"stem": (q.get("stem") or "")[:50]})
+        row = c.execute("SELECT id FROM questions WHERE hash = ?", (params[0],)).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+def save_questions(questions: Iterable[dict]) -> int:
+    """Soruları tek transaction'da `executemany` ile ekler; eklenen satır sayısını döner."""
+    rows = [_insert_params(q) for q in questions]
+    if not rows:
+        return 0
+    conn = connect()
+    try:
+        before = conn.total_changes
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+        inserted = conn.total_changes - before
+        if inserted:
+            generation.bump()
+        return inserted
+    finally:
+        conn.close()
+
+def delete_question(qid: int) -> bool:
+    conn = connect()
+    try:
+        with conn:
+            cur = conn.execute("DELETE FROM questions WHERE id = ?", (qid,))
+        if cur.rowcount > 0:
+            generation.bump()
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+# -----------------------
+# Reads
+# -----------------------
+def _filters(topic=None, level=None, qtype=None):
+    clauses, params = [], []
+    for column, value in (("topic", topic), ("level", level), ("type", qtype)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return clauses, params
+
+def get_question(qid: int) -> Optional[dict]:
+    conn = connect()
+    try:
+        row = conn.execute(f"SELECT {QUESTION_COLUMNS} FROM questions WHERE id = ?", (qid,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_question(row) if row else None
+
+def get_questions(ids: Iterable[int]) -> dict:
+    """id → soru eşlemesi döner (tek sorgu)."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return {}
+    placeholders = ", ".join("?" for _ in ids)
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f"SELECT {QUESTION_COLUMNS} FROM questions WHERE id IN ({placeholders})", ids
+        ).fetchall()
+    finally:
+        conn.close()
+    return {r[0]: _row_to_question(r) for r in rows}
+
+def get_random_question(topic: str = None, level: str = None, qtype: str = None) -> Optional[dict]:
+    """Filtreye uyan rastgele bir soru döner.
+
+    `ORDER BY RANDOM()` tüm tabloyu sıralar; bunun yerine eşleşen satır sayısı
+    (topic, level, type) indeksinden sayılır ve rastgele bir offset okunur.
+    """
+    clauses, params = _filters(topic, level, qtype)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = connect()
+    try:
+        c = conn.cursor()
+        count = c.execute(f"SELECT COUNT(*) FROM questions {where}", params).fetchone()[0]
+        if not count:
+            return None
+        c.execute(
+            f"SELECT {QUESTION_COLUMNS} FROM questions {where} LIMIT 1 OFFSET ?",
+            params + [random.randrange(count)],
+        )
+        row = c.fetchone()
+    finally:
+        conn.close()
+    return _row_to_question(row) if row else None
+
+def _list_query(topic=None, level=None, date_from=None, date_to=None, cursor=None, qtype=None):
+    clauses, params = _filters(topic, level, qtype)
+    date_clauses, date_params = date_range_clause("created_at", date_from, date_to)
+    clauses += date_clauses
+    params += date_params
+    keyset, keyset_params = keyset_clause(("created_at", "id"), cursor)
+    if keyset:
+        clauses.append(keyset)
+        params.extend(keyset_params)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {QUESTION_COLUMNS} FROM questions {where} ORDER BY created_at DESC, id DESC", params
+
+def list_questions(limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, topic: str = None,
+                   level: str = None, date_from=None, date_to=None, qtype: str = None) -> dict:
+    """Soruları yeniden eskiye keyset sayfalama ile döner."""
+    sql, params = _list_query(topic, level, date_from, date_to, cursor, qtype)
+    conn = connect()
+    try:
+        rows = conn.execute(sql + " LIMIT ?", params + [limit + 1]).fetchall()
+    finally:
+        conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][11], rows[-1][0])
+    return {"items": [_row_to_question(r) for r in rows], "next_cursor": next_cursor}
+
+def iter_questions_ndjson(topic: str = None, level: str = None, date_from=None, date_to=None,
+                          cursor: str = None, qtype: str = None):
+    """Filtreye uyan soruları NDJSON satırları olarak batch'ler halinde üretir."""
+    sql, params = _list_query(topic, level, date_from, date_to, cursor, qtype)
+    conn = connect()
+    try:
+        c = conn.execute(sql, params)
+        while True:
+            rows = c.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield "".join(json.dumps(_row_to_question(r), ensure_ascii=False) + "\n" for r in rows)
+    finally:
+        conn.close()
+
+# -----------------------
+# Migration
+# -----------------------
+def _legacy_choices(raw) -> list:
+    try:
+        return json.loads(raw) if raw else []
+    except ValueError:
+        return [raw]
+
+def migrate_legacy(quiz_db: str = LEGACY_DB_PATH) -> dict:
+    """quiz.db'deki eski `questions` tablosunu bu depoya taşır.
+
+    Sorular hash ile tekilleştirilir; taşınan tablo `questions_legacy` olarak
+    yeniden adlandırılır, böylece komut tekrar çalıştırılabilir.
+    """
+    init_db()
+    legacy = sqlite3.connect(quiz_db)
+    try:
+        exists = legacy.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='questions'"
+        ).fetchone()
+        if not exists:
+            return {"read": 0, "inserted": 0}
+
+        c = legacy.execute("""
+        SELECT type, topic, level, stem, choices, answer, answer_index, expected, rationale
+        FROM questions
+        """)
+        read = inserted = 0
+        while True:
+            batch = c.fetchmany(EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            read += len(batch)
+            inserted += save_questions(
+                {
+                    "type": r[0], "topic": r[1], "level": r[2], "stem": r[3],
+                    "choices": _legacy_choices(r[4]),
+                    "answer": r[5], "answer_index": r[6], "expected": r[7], "rationale": r[8],
+                    "source_model": "admin",
+                }
+                for r in batch
+            )
+        with legacy:
+            legacy.execute("ALTER TABLE questions RENAME TO questions_legacy")
+        return {"read": read, "inserted": inserted}
+    finally:
+        legacy.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soru deposu araçları")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--quiz-db", default=LEGACY_DB_PATH)
+    args = parser.parse_args()
+    setup_logging(fmt="text")
+
+    result = migrate_legacy(args.quiz_db)
+    log.info("%d soru okundu, %d yeni soru eklendi", result["read"], result["inserted"])
+
+
+if __name__ == "__main__":
+    main()
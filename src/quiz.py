@@ -1,8 +1,8 @@
-import requests, json, re, os, datetime, uuid , random
+import json, re, datetime, uuid , random
 import src.question as question
+from src import genlog, health, llm, metrics, scheduler
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3:instruct"
+MODEL = llm.DEFAULT_MODEL
 
 LEVEL_GUIDE = """
 BEGINNER → Temel tanım / doğrudan pasajdan bilgi.
@@ -15,15 +15,14 @@ ADVANCED → Neden–sonuç, politika yorumu, soyutlama, çok adımlı düşünm
 # -------------------
 def _call_ollama(prompt: str):
     try:
-        res = requests.post(
-            OLLAMA_URL,
-            json={"model": MODEL, "prompt": prompt, "stream": False, "options": {"num_ctx": 8192}},
-        )
-        data = res.json()
+        data = llm.generate(prompt, model=MODEL, options={"num_ctx": 8192})
         raw = data.get("response", "")
-        cleaned = raw.strip().replace("```json", "").replace("```", "")
-        match = re.search(r"\{[\s\S]*\}", cleaned)
-        q = json.loads(match.group(0)) if match else {"error": "JSON yok", "raw": raw}
+        with metrics.stage("parse"):
+            cleaned = raw.strip().replace("```json", "").replace("```", "")
+            match = re.search(r"\{[\s\S]*\}", cleaned)
+            q = json.loads(match.group(0)) if match else {"error": "JSON yok", "raw": raw}
+    except (scheduler.Busy, health.Unavailable):
+        raise
     except Exception as e:
         q = {"error": f"Ollama hata: {str(e)}"}
 
@@ -38,6 +37,8 @@ def generate_quiz(topic: str, level: str, n: int = 5):
     for i in range(n):
         qtype = random.choice(question.QUESTION_TYPES)  # rastgele tip seç
         q = question.generate_question_from_context(topic, level, qtype)
+        if "error" not in q:
+            log_question(q)
         quiz.append(q)
     return {"topic": topic, "level": level, "items": quiz}
 
@@ -155,9 +156,5 @@ def generate_scenario(passage: str, topic: str, level: str = "intermediate"):
 # Loglama
 # -------------------
 def log_question(q: dict):
-    """Her üretilen soruyu günlük JSON dosyasına logla"""
-    log_dir = "data/questions/logs"
-    os.makedirs(log_dir, exist_ok=True)
-    today = datetime.date.today().isoformat()
-    with open(f"{log_dir}/{today}.json", "a", encoding="utf-8") as f:
-        f.write(json.dumps(q, ensure_ascii=False) + "\n")
+    """Her üretilen soruyu günlük JSON loguna ekler (tamponlu, bkz. `src/genlog.py`)"""
+    genlog.generation_log.write(q)
@@ -1,35 +1,166 @@
 import io
 import mimetypes
-import json
+import os
+import sys
+import threading
+import time
 from typing import List
-from PyPDF2 import PdfReader
-import docx
-from pptx import Presentation
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_bytes
-import openpyxl
-import chromadb
-from chromadb.utils import embedding_functions
+from src import embeddings, extract_cache, health, metrics, singleflight, structured, uploads, workers
+from src.logs import get_logger
 
 # -----------------------
 # Config
 # -----------------------
 CHUNK_SIZE = 1200
 CHUNK_OVERLAP = 200
-EMBED_MODEL = "intfloat/multilingual-e5-large"
+EXTRACTOR_VERSION = "1"  # ayrıştırıcı çıktısı değişince artırılır; eski önbellek girdileri kullanılmaz
+INDEX_BATCH = int(os.getenv("INDEX_BATCH", "64"))  # tek seferde gömülüp yazılan chunk sayısı
+EMBED_MODEL = embeddings.EMBED_MODEL
+CHROMA_PATH = "chroma_data"
+COLLECTION_NAME = "knowledge_bot"
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")  # chroma | mmap (bkz. src/vector_store.py)
+RAG_WARMUP = os.getenv("RAG_WARMUP", "1") == "1"
+
+log = get_logger(__name__)
 
 # -----------------------
-# Model & Vector Store
+# Model & Vector Store (lazy)
 # -----------------------
-client = chromadb.PersistentClient(path="chroma_data")  # kalıcı depolama
-sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name=EMBED_MODEL
-)
-collection = client.get_or_create_collection(
-    name="knowledge_bot",
-    embedding_function=sentence_transformer_ef
-)
+# chromadb ve sentence-transformers ilk kullanımda yüklenir; uygulama importu ve
+# /health bunları beklemez. admin.py, evaluate.py ve question.py aynı
+# örnekleri kullanır (tek embedding modeli).
+_client = None
+_embedder = None
+_collection = None
+_lock = threading.RLock()
+_warmup = {"state": "idle", "error": None, "seconds": None}
+
+# İndeks her değiştiğinde artırılır; diğer worker'lar vektör deposu
+# tutamaçlarını yeniden açar (bkz. src/workers.py).
+index_generation = workers.Generation("index")
+
+
+@index_generation.on_change
+def _drop_handles():
+    """Başka bir worker indeksi değiştirdi: Chroma istemcisini yeniden aç."""
+    global _client, _collection
+    from src.vector_store import MmapVectorStore
+
+    with _lock:
+        if isinstance(_collection, MmapVectorStore):
+            return  # mmap deposu sidecar'dan kendini günceller
+        _client = _collection = None
+        if "chromadb" in sys.modules:
+            # PersistentClient aynı yol için süreç içinde önbelleklenir (HNSW bellekte)
+            from chromadb.api.client import SharedSystemClient
+
+            SharedSystemClient.clear_system_cache()
+
+
+def _after_fork_in_child():
+    """Fork sonrası: paylaşılmayacak tutamaçları bırak, embedding modelini koru."""
+    global _client, _collection, _lock
+    _lock = threading.RLock()
+    _client = _collection = None
+    _warmup.update(state="idle", error=None, seconds=None)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(embeddings.EMBED_THREADS)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                import chromadb
+
+                _client = chromadb.PersistentClient(path=CHROMA_PATH)  # kalıcı depolama
+    return _client
+
+
+def get_embedding_function():
+    """`EMBED_BACKEND` ile seçilen embedding fonksiyonu (bkz. src/embeddings.py)."""
+    global _embedder
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                _embedder = embeddings.create_embedding_function()
+    return _embedder
+
+
+def get_chroma_collection():
+    return get_client().get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=get_embedding_function()
+    )
+
+
+def get_collection():
+    """`VECTOR_STORE` ile seçilen vektör deposu (Chroma koleksiyonu ya da mmap deposu)."""
+    global _collection
+    index_generation.check()
+    if _collection is None:
+        with _lock:
+            if _collection is None:
+                if VECTOR_STORE == "mmap":
+                    from src.vector_store import MmapVectorStore
+
+                    _collection = MmapVectorStore()
+                else:
+                    _collection = get_chroma_collection()
+    return _collection
+
+
+def set_collection(collection):
+    """Koleksiyonu değiştirir (testler ve benchmark'lar için)."""
+    global _collection
+    _collection = collection
+
+
+def __getattr__(name):
+    # Eski `rag.collection` / `rag.client` / `rag.sentence_transformer_ef` erişimleri
+    getters = {
+        "collection": get_collection,
+        "client": get_client,
+        "sentence_transformer_ef": get_embedding_function,
+    }
+    if name in getters:
+        return getters[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warmup():
+    """Embedding modelini ve vektör deposunu yükler (startup'ta arka planda çağrılır)."""
+    _warmup["state"] = "loading"
+    start = time.perf_counter()
+    try:
+        with metrics.stage("warmup"):
+            get_collection()
+            get_embedding_function()(["warmup"])
+        _warmup.update(state="ready", error=None)
+    except Exception as e:
+        _warmup.update(state="failed", error=f"{type(e).__name__}: {e}")
+        log.exception("rag warmup failed")
+    finally:
+        _warmup["seconds"] = round(time.perf_counter() - start, 3)
+
+
+def start_warmup() -> bool:
+    if not RAG_WARMUP or _warmup["state"] != "idle":
+        return False
+    _warmup["state"] = "loading"
+    threading.Thread(target=warmup, name="rag-warmup", daemon=True).start()
+    return True
+
+
+def readiness() -> dict:
+    return {
+        "ready": _collection is not None and _embedder is not None,
+        "warmup": dict(_warmup),
+    }
 
 # -----------------------
 # Helpers
@@ -44,99 +175,227 @@ def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP)
         start += size - overlap
     return chunks
 
+
+def iter_text_chunks(stream, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+    """`chunk_text` ile aynı pencereler; UTF-8 metin dosyadan parça parça okunur."""
+    reader = io.TextIOWrapper(stream, encoding="utf-8", errors="ignore")
+    buf = ""
+    try:
+        while True:
+            piece = reader.read(size * 64)
+            buf += piece
+            while buf and (len(buf) >= size or not piece):
+                yield buf[:size]
+                buf = buf[size - overlap:]
+            if not piece:
+                return
+    finally:
+        reader.detach()  # yüklemenin dosyası açık kalsın
+
 # -----------------------
 # Dosya Parsing
 # -----------------------
-def extract_text_from_file(filename: str, raw: bytes) -> str:
-    """PDF, Word, PPTX, Excel, JSON, TXT vb. dosyalardan metin çıkarır."""
+CACHED_MIME_TYPES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+)
+
+
+def _cache_key(filename: str, raw: uploads.Source, output: str):
+    """Ayrıştırması pahalı dosyalar için önbellek anahtarı; düz metinde None."""
+    if not extract_cache.cache.enabled:
+        return None
+    if mimetypes.guess_type(filename)[0] not in CACHED_MIME_TYPES and not structured.kind(filename):
+        return None
+    ext = os.path.splitext(filename.lower())[1]
+    scope = f"{output}-v{EXTRACTOR_VERSION}{ext}"
+    if structured.kind(filename):
+        scope += f"-{CHUNK_SIZE}"  # tablo/JSON çıktısı chunk boyutuna bağlı
+    with metrics.stage("extract_hash"):
+        return extract_cache.cache.key(raw, scope)
+
+
+def extract_text_from_file(filename: str, raw: uploads.Source) -> str:
+    """PDF, Word, PPTX, Excel, JSON, TXT vb. dosyalardan metin çıkarır.
+
+    `raw` bytes ya da (yüklemenin geçici dosyası gibi) ikili dosya nesnesi olabilir;
+    ayrıştırıcılar dosyadan ya da mmap'ten okur, içerik belleğe kopyalanmaz.
+    Aynı içerik daha önce ayrıştırıldıysa metin önbellekten gelir (OCR dahil
+    hiçbir ayrıştırıcı çalışmaz; bkz. src/extract_cache.py).
+    """
+    key = _cache_key(filename, raw, "text")
+    if key is not None:
+        cached = extract_cache.cache.get_text(key)
+        if cached is not None:
+            return cached
+    try:
+        text = _parse(filename, raw).strip()
+    except Exception as e:
+        return f"[extract_text_from_file error: {str(e)}]"
+    if key is not None:
+        extract_cache.cache.put_text(key, text)
+    return text
+
+
+def _parse(filename: str, raw: uploads.Source) -> str:
     text = ""
     mime_type, _ = mimetypes.guess_type(filename)
 
-    try:
-        if mime_type == "application/pdf":
-            try:
-                pdf = PdfReader(io.BytesIO(raw))
-                text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            except Exception:
-                images = convert_from_bytes(raw)
-                for img in images:
-                    text += pytesseract.image_to_string(img, lang="tur") + "\n"
-
-        elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            doc = docx.Document(io.BytesIO(raw))
-            for p in doc.paragraphs:
-                text += p.text + "\n"
-            for rel in doc.part.rels.values():
-                if "image" in rel.target_ref:
-                    image_data = rel.target_part.blob
-                    img = Image.open(io.BytesIO(image_data))
-                    text += pytesseract.image_to_string(img, lang="tur") + "\n"
-
-        elif mime_type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
-            prs = Presentation(io.BytesIO(raw))
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-                    if shape.shape_type == 13:  # Picture
-                        image = Image.open(io.BytesIO(shape.image.blob))
-                        text += pytesseract.image_to_string(image, lang="tur") + "\n"
-
-        elif mime_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" or filename.endswith(".xls"):
-            wb = openpyxl.load_workbook(io.BytesIO(raw), data_only=True)
-            for sheet in wb.worksheets:
-                text += f"\n# {sheet.title}\n"
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) for cell in row if cell is not None])
-                    if row_text.strip():
-                        text += row_text + "\n"            
-
-        elif filename.endswith(".json"):
-            data = json.loads(raw.decode("utf-8", errors="ignore"))
-            if isinstance(data, dict) and "items" in data:
-                for item in data["items"]:
-                    if "q" in item:
-                        text += item["q"] + "\n"
-                    if "a" in item:
-                        text += item["a"] + "\n"
-            else:
-                text = json.dumps(data)
+    if mime_type == "application/pdf":
+        from PyPDF2 import PdfReader
+        try:
+            pdf = PdfReader(uploads.as_stream(raw))
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        except Exception:
+            import pytesseract
+            from pdf2image import convert_from_bytes
+            with uploads.mapped(raw) as buf:
+                images = convert_from_bytes(bytes(buf))  # OCR yolu: pdf2image bytes ister
+            for img in images:
+                text += pytesseract.image_to_string(img, lang="tur") + "\n"
 
-        elif filename.endswith(".md") or filename.endswith(".txt"):
-            text = raw.decode("utf-8", errors="ignore")
+    elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+        import docx
+        doc = docx.Document(uploads.as_stream(raw))
+        for p in doc.paragraphs:
+            text += p.text + "\n"
+        for rel in doc.part.rels.values():
+            if "image" in rel.target_ref:
+                import pytesseract
+                from PIL import Image
+                image_data = rel.target_part.blob
+                img = Image.open(io.BytesIO(image_data))
+                text += pytesseract.image_to_string(img, lang="tur") + "\n"
 
-        else:
-            text = raw.decode("utf-8", errors="ignore")
+    elif mime_type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
+        from pptx import Presentation
+        prs = Presentation(uploads.as_stream(raw))
+        for slide in prs.slides:
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    text += shape.text + "\n"
+                if shape.shape_type == 13:  # Picture
+                    import pytesseract
+                    from PIL import Image
+                    image = Image.open(io.BytesIO(shape.image.blob))
+                    text += pytesseract.image_to_string(image, lang="tur") + "\n"
 
-    except Exception as e:
-        text = f"[extract_text_from_file error: {str(e)}]"
+    elif structured.kind(filename):
+        # Tablo/JSON: başlıklı satır grupları ve kayıtlar (bkz. src/structured.py)
+        text = "\n\n".join(chunk for chunk, _ in structured.iter_chunks(filename, raw, CHUNK_SIZE))
+
+    else:  # .md, .txt ve diğerleri düz metin
+        with uploads.mapped(raw) as buf:
+            text = uploads.decode(buf)
+
+    return text
+
+def extract_chunks(filename: str, raw: uploads.Source):
+    """Tablo/JSON ve düz metin dosyaları için (metin, metadata) üreteci; diğerlerinde None.
 
-    return text.strip()
+    Sonuç `index_chunks`'a verilir; dosya okunurken chunk'lar partiler halinde gömülür.
+    Tablo/JSON chunk'ları içerik özetiyle önbelleğe yazılır; aynı dosya tekrar
+    yüklenince önbellekten akıtılır.
+    """
+    if structured.kind(filename):
+        key = _cache_key(filename, raw, "chunks")
+        if key is None:
+            return structured.iter_chunks(filename, raw, CHUNK_SIZE)
+        cached = extract_cache.cache.get_chunks(key)
+        if cached is not None:
+            return cached
+        return extract_cache.cache.store_chunks(key, structured.iter_chunks(filename, raw, CHUNK_SIZE))
+    if filename.lower().endswith((".txt", ".md")):
+        return ((chunk, {}) for chunk in iter_text_chunks(uploads.as_stream(raw)))
+    return None
 
 # -----------------------
 # Indexleme
 # -----------------------
 def index_doc(filename: str, text: str, topic: str = "other") -> int:
-    """Metni chunklara bölerek Chroma koleksiyonuna ekler."""
-    chunks = chunk_text(text)
-    for i, chunk in enumerate(chunks):
-        collection.add(
-            ids=[f"{filename}_{i}"],
-            documents=[chunk],
-            metadatas=[{"doc_id": filename, "chunk": i, "topic": topic}]
-        )
-    return len(chunks)
+    """Metni chunklara bölerek vektör deposuna ekler."""
+    n = index_chunks(filename, ((chunk, {}) for chunk in chunk_text(text)), topic, count_chars=False)
+    metrics.INGEST_CHARS.inc(len(text))
+    return n
+
+
+def index_chunks(filename: str, chunks, topic: str = "other", count_chars: bool = True) -> int:
+    """(metin, metadata) çiftlerini `INDEX_BATCH`'lik partiler halinde gömer ve yazar.
+
+    Her chunk'ın metadata'sına `doc_id`, `chunk` ve `topic` eklenir. Üreteç
+    verildiğinde bellekte en fazla bir parti tutulur.
+    """
+    collection = None
+    total = 0
+    batch = []
+
+    def flush():
+        texts = [text for text, _ in batch]
+        # Embedding'ler seçili backend ile parti parti hesaplanır, parti başına tek `add`
+        with metrics.stage("embedding"):
+            vectors = get_embedding_function()(texts)
+        with metrics.stage("index"), workers.file_lock("index"):
+            collection.add(
+                ids=[f"{filename}_{total - len(batch) + i}" for i in range(len(batch))],
+                documents=texts,
+                embeddings=vectors,
+                metadatas=[{**meta, "doc_id": filename, "chunk": total - len(batch) + i, "topic": topic}
+                           for i, (_, meta) in enumerate(batch)],
+            )
+        metrics.INGEST_CHUNKS.inc(len(batch))
+        if count_chars:
+            metrics.INGEST_CHARS.inc(sum(len(text) for text in texts))
+        batch.clear()
+
+    for text, meta in chunks:
+        if not text.strip():
+            continue
+        if collection is None:
+            collection = get_collection()
+        batch.append((text, meta))
+        total += 1
+        if len(batch) >= INDEX_BATCH:
+            flush()
+    if batch:
+        flush()
+    if total:
+        index_generation.bump()
+    return total
+
+
+def make_where(**filters):
+    """Boş olmayan filtrelerden Chroma `where` sözlüğü (birden fazlaysa `$and`)."""
+    clauses = [{key: value} for key, value in filters.items() if value is not None]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
 
 # -----------------------
 # Arama
 # -----------------------
+_search_flight = singleflight.Group("retrieval")
+
+
 def search(query: str, top_k: int = 5, where: dict = None):
-    """Sorgu ile Chroma koleksiyonunda arama yapar."""
-    results = collection.query(
-        query_texts=[query],
-        n_results=top_k,
-        where=where
-    )
+    """Sorgu ile vektör deposunda arama yapar (aynı eşzamanlı sorgular tek aramayı paylaşır).
+
+    Sağlık yoklaması vektör deposunu kapalı bulduysa beklemeden `health.Unavailable` fırlatır.
+    """
+    health.vector_store.breaker.allow()
+    key = singleflight.make_key(query, top_k, where)
+    return _search_flight.do(key, _search, query, top_k, where)
+
+
+def _search(query: str, top_k: int, where: dict):
+    with metrics.stage("embedding"):
+        query_embeddings = get_embedding_function()([query])
+    with metrics.stage("vector_search"):
+        results = get_collection().query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            where=where
+        )
     return results
 
 # -----------------------
@@ -144,19 +403,26 @@ def search(query: str, top_k: int = 5, where: dict = None):
 # -----------------------
 def delete_doc(doc_id: str):
     try:
-        collection.delete(where={"doc_id": doc_id})
+        with workers.file_lock("index"):
+            get_collection().delete(where={"doc_id": doc_id})
+        index_generation.bump()
         return {"status": "deleted", "doc_id": doc_id}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
 def delete_all():
     try:
-        client.delete_collection("knowledge_bot")
-        global collection
-        collection = client.get_or_create_collection(
-            name="knowledge_bot",
-            embedding_function=sentence_transformer_ef
-        )
+        global _collection
+        from src.vector_store import MmapVectorStore
+
+        with _lock, workers.file_lock("index"):
+            if isinstance(get_collection(), MmapVectorStore):
+                _collection.reset()
+            else:
+                get_client().delete_collection(COLLECTION_NAME)
+                _collection = None
+        index_generation.bump()
+        get_collection()
         return {"status": "all deleted"}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
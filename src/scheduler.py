@@ -0,0 +1,224 @@
+# src/scheduler.py
+"""
+LLM iş zamanlayıcısı: öncelik sınıfları, sınıf başına eşzamanlılık ve sınırlı kuyruk.
+
+Tek Ollama sunucusu `LLM_SLOTS` adet eşzamanlı üretim yuvasıyla modellenir
+(Ollama'nın `OLLAMA_NUM_PARALLEL` değeriyle aynı tutulmalı). Her yuva bir kilit
+dosyasıdır (`flock`), böylece sınır gunicorn worker'ları ve `generator.py` gibi
+ayrı süreçler arasında da geçerlidir. Bir sınıf yalnızca son `concurrency` yuvayı
+kullanabilir: toplu üretim son yuvaya sıkışır, ilk yuvalar sohbet için boş kalır.
+
+    interactive  /chat, /evaluate-answer     tüm yuvalar, kısa bekleme
+    user         /quiz, /questions/generate  tüm yuvalar
+    admin        admin soru üretimi           1 yuva
+    bulk         generator.py                 1 yuva, uzun bekleme
+
+Sınıf, çağrı zincirinin başında `priority(...)` ile seçilir (bağlam yöneticisi ya
+da dekoratör); `llm.generate` yuvayı kendisi alır. Süreç içinde bekleyenler
+öncelik, sonra geliş sırasıyla yuva alır. Kuyruk doluysa `Busy` hemen (429),
+bekleme süresi aşılırsa 503 ile fırlatılır; ikisi de `Retry-After` taşır.
+`LLM_SCHEDULER=0` ile kapatılabilir.
+"""
+import fcntl
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src import metrics
+from src.workers import GENERATION_DIR
+
+SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER", "1") == "1"
+LLM_SLOTS = max(1, int(os.getenv("LLM_SLOTS", "2")))
+LLM_SLOT_DIR = os.getenv("LLM_SLOT_DIR", os.path.join(GENERATION_DIR, "llm-slots"))
+DEFAULT_PRIORITY = "user"
+POLL_INTERVAL = 0.05  # başka süreçlerin bıraktığı yuvalar için yoklama aralığı (sn)
+MAX_RETRY_AFTER = 120
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    name: str
+    rank: int          # küçük olan önce
+    concurrency: int   # kullanabileceği yuva sayısı
+    queue: int         # süreç başına en fazla bekleyen
+    max_wait: float    # saniye; aşılırsa 503
+
+
+def _env_class(name: str, rank: int, concurrency: int, queue: int, max_wait: float) -> PriorityClass:
+    prefix = f"LLM_{name.upper()}_"
+    return PriorityClass(
+        name=name,
+        rank=rank,
+        concurrency=min(LLM_SLOTS, max(1, int(os.getenv(prefix + "CONCURRENCY", concurrency)))),
+        queue=max(0, int(os.getenv(prefix + "QUEUE", queue))),
+        max_wait=float(os.getenv(prefix + "MAX_WAIT", max_wait)),
+    )
+
+
+CLASSES: Dict[str, PriorityClass] = {
+    c.name: c for c in (
+        _env_class("interactive", 0, LLM_SLOTS, 32, 15),
+        _env_class("user", 1, LLM_SLOTS, 16, 30),
+        _env_class("admin", 2, 1, 8, 60),
+        _env_class("bulk", 3, 1, 4, 600),
+    )
+}
+
+
+class Busy(Exception):
+    """Kuyruk dolu (429) ya da yuva beklenirken süre aşıldı (503)."""
+
+    def __init__(self, priority: str, reason: str, retry_after: int):
+        super().__init__(f"LLM scheduler busy ({priority}: {reason})")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = 429 if reason == "queue_full" else 503
+
+
+# -----------------------
+# Öncelik bağlamı
+# -----------------------
+_current: ContextVar[str] = ContextVar("llm_priority", default=DEFAULT_PRIORITY)
+
+
+@contextmanager
+def priority(name: str):
+    """Bu blok içindeki LLM çağrılarının sınıfını belirler; dekoratör olarak da kullanılır."""
+    if name not in CLASSES:
+        raise ValueError(f"unknown LLM priority class: {name}")
+    token = _current.set(name)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_priority() -> str:
+    return _current.get()
+
+
+# -----------------------
+# Zamanlayıcı
+# -----------------------
+class Scheduler:
+    def __init__(self, slots: int = LLM_SLOTS, classes: Optional[Dict[str, PriorityClass]] = None,
+                 directory: str = LLM_SLOT_DIR):
+        self.slots = slots
+        self.classes = classes or CLASSES
+        self.directory = directory
+        self._reset()
+
+    def _reset(self):
+        self._cond = threading.Condition()
+        self._files: Dict[int, object] = {}
+        self._held = set()
+        self._waiting: Dict[int, str] = {}  # ticket -> sınıf
+        self._seq = 0
+        self._service = {name: 5.0 for name in self.classes}  # yuva tutma süresi (EWMA, sn)
+
+    def _allowed(self, cls: PriorityClass):
+        return range(self.slots - min(cls.concurrency, self.slots), self.slots)
+
+    def _try_lock(self, cls: PriorityClass) -> Optional[int]:
+        for i in self._allowed(cls):
+            if i in self._held:
+                continue
+            f = self._files.get(i)
+            if f is None:
+                os.makedirs(self.directory, exist_ok=True)
+                f = self._files[i] = open(os.path.join(self.directory, f"slot-{i}.lock"), "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._held.add(i)
+            return i
+        return None
+
+    def _is_next(self, ticket: int) -> bool:
+        """Süreçteki en öncelikli (eşitse en eski) bekleyen bu mu?"""
+        head = min(self._waiting, key=lambda t: (self.classes[self._waiting[t]].rank, t))
+        return head == ticket
+
+    def retry_after(self, name: str) -> int:
+        cls = self.classes[name]
+        depth = sum(1 for c in self._waiting.values() if c == name)
+        estimate = self._service[name] * (depth + 1) / cls.concurrency
+        return int(min(MAX_RETRY_AFTER, max(1, math.ceil(estimate))))
+
+    def _reject(self, name: str, reason: str):
+        metrics.LLM_SCHEDULER_REJECTIONS.inc(priority=name, reason=reason)
+        return Busy(name, reason, self.retry_after(name))
+
+    @contextmanager
+    def slot(self, name: Optional[str] = None):
+        """Sınıfın kullanabileceği bir Ollama yuvası alır; blok bitince bırakır."""
+        name = name or current_priority()
+        cls = self.classes[name]
+        start = time.monotonic()
+        deadline = start + cls.max_wait
+
+        with self._cond:
+            if sum(1 for c in self._waiting.values() if c == name) >= cls.queue:
+                raise self._reject(name, "queue_full")
+            self._seq += 1
+            ticket = self._seq
+            self._waiting[ticket] = name
+            metrics.LLM_QUEUE_DEPTH.inc(priority=name)
+            try:
+                while True:
+                    index = self._try_lock(cls) if self._is_next(ticket) else None
+                    if index is not None:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(name, "timeout")
+                    self._cond.wait(min(POLL_INTERVAL, remaining))
+            finally:
+                del self._waiting[ticket]
+                metrics.LLM_QUEUE_DEPTH.dec(priority=name)
+                self._cond.notify_all()
+
+        acquired = time.monotonic()
+        metrics.LLM_QUEUE_WAIT.observe(acquired - start, priority=name)
+        metrics.LLM_SLOTS_IN_USE.inc(priority=name)
+        try:
+            yield index
+        finally:
+            with self._cond:
+                fcntl.flock(self._files[index], fcntl.LOCK_UN)
+                self._held.discard(index)
+                self._service[name] = 0.8 * self._service[name] + 0.2 * (time.monotonic() - acquired)
+                self._cond.notify_all()
+            metrics.LLM_SLOTS_IN_USE.dec(priority=name)
+
+    def depth(self, name: str) -> int:
+        with self._cond:
+            return sum(1 for c in self._waiting.values() if c == name)
+
+
+_scheduler = Scheduler()
+
+
+@contextmanager
+def llm_slot():
+    """`llm._generate` bunu kullanır; zamanlayıcı kapalıysa doğrudan geçer."""
+    if not SCHEDULER_ENABLED:
+        yield None
+        return
+    with _scheduler.slot() as index:
+        yield index
+
+
+def _after_fork_in_child():
+    # Üst sürecin kilit dosyası tanıtıcıları (ve flock'ları) paylaşılmasın
+    _scheduler._reset()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
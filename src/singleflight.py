@@ -0,0 +1,88 @@
+# src/singleflight.py
+"""
+Aynı anahtarla eşzamanlı yapılan pahalı çağrıları tek bir yürütmede birleştirir.
+
+Bir anahtar için ilk gelen çağrı (leader) işi yapar; o sürerken aynı anahtarla
+gelen çağrılar yeni iş başlatmaz, leader'ın sonucunu (ya da hatasını) bekleyip
+paylaşır. İş bittiğinde anahtar silinir; sonuç önbelleğe alınmaz.
+
+    llm_flight = Group("llm")
+    data = llm_flight.do(key, _generate, prompt, model=model)
+
+`SINGLEFLIGHT=0` ile kapatılabilir. Sayılar `singleflight_calls_total`
+metriğinde `role=leader|coalesced` etiketiyle tutulur.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from src import metrics
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT", "1") == "1"
+
+
+def make_key(*parts: Any) -> str:
+    """JSON'a çevrilebilen parçalardan kararlı bir anahtar üretir."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable, *args, **kwargs):
+        if not SINGLEFLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            metrics.SINGLEFLIGHT_CALLS.inc(group=self.name, role="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        metrics.SINGLEFLIGHT_CALLS.inc(group=self.name, role="leader")
+        result = error = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]  # bundan sonra yeni bekleyen katılmaz
+                waiters = call.waiters
+            if waiters:
+                call.error = error
+                # Leader sonucu döndükten sonra değiştirebilir; bekleyenler anlık kopyayı paylaşır
+                call.result = copy.deepcopy(result) if error is None else None
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,210 @@
+# src/stats.py
+"""
+Quiz istatistikleri için artımlı (rollup) özet tabloları.
+
+`quiz_attempts` her denemede taranmak yerine özetler `submit_result` içinde,
+denemeyle aynı transaction'da güncellenir:
+  * user_stats        → kullanıcı başına toplamlar
+  * user_topic_stats  → kullanıcı + konu başına toplamlar
+  * topic_stats       → konu başına toplamlar (admin paneli)
+
+Mevcut veriler için tek seferlik doldurma:
+    python -m src.stats backfill [--db quiz.db]
+"""
+import argparse
+import sqlite3
+
+from src.logs import get_logger, setup as setup_logging
+
+DATABASE = "quiz.db"
+log = get_logger(__name__)
+
+ROLLUP_TABLES = ("user_stats", "user_topic_stats", "topic_stats")
+
+# -----------------------
+# Schema
+# -----------------------
+def init_stats_tables(cursor: sqlite3.Cursor):
+    """Rollup tablolarını ve quiz_attempts indekslerini oluşturur.
+
+    Tablolar ilk kez oluşturuluyorsa mevcut denemelerden otomatik doldurulur.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='user_stats'")
+    fresh = cursor.fetchone() is None
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_quizzes INTEGER NOT NULL DEFAULT 0,
+        total_questions INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        last_quiz_date TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_topic_stats (
+        user_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        total_quizzes INTEGER NOT NULL DEFAULT 0,
+        total_questions INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        last_quiz_date TEXT,
+        PRIMARY KEY (user_id, topic)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS topic_stats (
+        topic TEXT PRIMARY KEY,
+        total_quizzes INTEGER NOT NULL DEFAULT 0,
+        total_questions INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        user_count INTEGER NOT NULL DEFAULT 0,
+        last_quiz_date TEXT
+    ) WITHOUT ROWID
+    """)
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_date ON quiz_attempts (user_id, quiz_date)"
+    )
+    # Admin aktivite listesi için keyset sayfalama indeksleri
+    cursor.execute("DROP INDEX IF EXISTS idx_quiz_attempts_topic")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_topic_date ON quiz_attempts (topic, quiz_date)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_date ON quiz_attempts (quiz_date, id)"
+    )
+
+    if fresh:
+        backfill(cursor)
+
+# -----------------------
+# Incremental update
+# -----------------------
+def apply_attempt(cursor: sqlite3.Cursor, user_id: int, topic: str,
+                  total_questions: int, correct_answers: int, quiz_date: str):
+    """Tek bir denemeyi özet tablolara ekler. Çağıran transaction'ı commit eder."""
+    cursor.execute("""
+    INSERT INTO user_stats (user_id, total_quizzes, total_questions, correct_answers, last_quiz_date)
+    VALUES (?, 1, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_quizzes = total_quizzes + 1,
+        total_questions = total_questions + excluded.total_questions,
+        correct_answers = correct_answers + excluded.correct_answers,
+        last_quiz_date = MAX(COALESCE(last_quiz_date, ''), excluded.last_quiz_date)
+    """, (user_id, total_questions, correct_answers, quiz_date))
+
+    # Kullanıcı bu konuda ilk kez mi quiz çözüyor? (topic_stats.user_count için)
+    cursor.execute("""
+    INSERT OR IGNORE INTO user_topic_stats (user_id, topic) VALUES (?, ?)
+    """, (user_id, topic))
+    new_user_for_topic = cursor.rowcount == 1
+
+    cursor.execute("""
+    UPDATE user_topic_stats SET
+        total_quizzes = total_quizzes + 1,
+        total_questions = total_questions + ?,
+        correct_answers = correct_answers + ?,
+        last_quiz_date = MAX(COALESCE(last_quiz_date, ''), ?)
+    WHERE user_id = ? AND topic = ?
+    """, (total_questions, correct_answers, quiz_date, user_id, topic))
+
+    cursor.execute("""
+    INSERT INTO topic_stats (topic, total_quizzes, total_questions, correct_answers, user_count, last_quiz_date)
+    VALUES (?, 1, ?, ?, ?, ?)
+    ON CONFLICT (topic) DO UPDATE SET
+        total_quizzes = total_quizzes + 1,
+        total_questions = total_questions + excluded.total_questions,
+        correct_answers = correct_answers + excluded.correct_answers,
+        user_count = user_count + excluded.user_count,
+        last_quiz_date = MAX(COALESCE(last_quiz_date, ''), excluded.last_quiz_date)
+    """, (topic, total_questions, correct_answers, int(new_user_for_topic), quiz_date))
+
+# -----------------------
+# Reads
+# -----------------------
+def get_user_stats(cursor: sqlite3.Cursor, user_id: int) -> dict:
+    cursor.execute("""
+    SELECT total_quizzes, total_questions, correct_answers, last_quiz_date
+    FROM user_stats WHERE user_id = ?
+    """, (user_id,))
+    row = cursor.fetchone()
+
+    cursor.execute("""
+    SELECT topic, total_questions, correct_answers
+    FROM user_topic_stats WHERE user_id = ?
+    """, (user_id,))
+    topic_stats = {r[0]: {"correct": r[2], "total": r[1]} for r in cursor.fetchall()}
+
+    return {
+        "total_quizzes": row[0] if row else 0,
+        "total_questions": row[1] if row else 0,
+        "correct_answers": row[2] if row else 0,
+        "last_quiz_date": row[3] if row else None,
+        "topic_stats": topic_stats,
+    }
+
+def get_topic_stats(cursor: sqlite3.Cursor) -> list:
+    cursor.execute("""
+    SELECT topic, total_quizzes, total_questions, correct_answers, user_count, last_quiz_date
+    FROM topic_stats ORDER BY topic
+    """)
+    return [
+        {
+            "topic": r[0],
+            "total_quizzes": r[1],
+            "total_questions": r[2],
+            "correct_answers": r[3],
+            "accuracy": round(r[3] / r[2] * 100, 2) if r[2] else 0.0,
+            "user_count": r[4],
+            "last_quiz_date": r[5],
+        }
+        for r in cursor.fetchall()
+    ]
+
+# -----------------------
+# Backfill
+# -----------------------
+def backfill(cursor: sqlite3.Cursor):
+    """Özet tabloları quiz_attempts'ten baştan hesaplar."""
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+
+    cursor.execute("""
+    INSERT INTO user_stats (user_id, total_quizzes, total_questions, correct_answers, last_quiz_date)
+    SELECT user_id, COUNT(*), SUM(total_questions), SUM(correct_answers), MAX(quiz_date)
+    FROM quiz_attempts GROUP BY user_id
+    """)
+    cursor.execute("""
+    INSERT INTO user_topic_stats (user_id, topic, total_quizzes, total_questions, correct_answers, last_quiz_date)
+    SELECT user_id, topic, COUNT(*), SUM(total_questions), SUM(correct_answers), MAX(quiz_date)
+    FROM quiz_attempts GROUP BY user_id, topic
+    """)
+    cursor.execute("""
+    INSERT INTO topic_stats (topic, total_quizzes, total_questions, correct_answers, user_count, last_quiz_date)
+    SELECT topic, COUNT(*), SUM(total_questions), SUM(correct_answers), COUNT(DISTINCT user_id), MAX(quiz_date)
+    FROM quiz_attempts GROUP BY topic
+    """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz istatistik rollup araçları")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--db", default=DATABASE)
+    args = parser.parse_args()
+    setup_logging(fmt="text")
+
+    conn = sqlite3.connect(args.db)
+    with conn:
+        cursor = conn.cursor()
+        init_stats_tables(cursor)
+        backfill(cursor)
+        cursor.execute("SELECT COUNT(*) FROM user_stats")
+        users = cursor.fetchone()[0]
+    conn.close()
+    log.info("Rollup tabloları dolduruldu (%d kullanıcı)", users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# src/structured.py
+"""
+Tablo ve kayıt bazlı içe aktarma (XLSX/XLS, JSON, JSON Lines).
+
+Düz metne çevirip sabit uzunlukta bölmek yerine yapı korunur:
+
+* Tablolar sayfa sayfa, satır satır akıtılır (openpyxl `read_only`); satırlar
+  `size` karakteri aşmayacak şekilde gruplanır ve her chunk sayfa adı + başlık
+  satırıyla başlar. Metadata: `sheet`, `row_start`, `row_end` (Excel satır no).
+* JSON'da her kayıt ayrı chunk olur (`a.b: değer` satırları); kayıtlar sırayla
+  çözülür, belgenin tamamı nesne ağacına çevrilmez. Metadata:
+  `record` (sıra) ve `key` (`id`/`key`/`name` alanı ya da `items[3]` gibi yol).
+
+`iter_chunks` bir üreteçtir; `rag.index_chunks` chunk'ları partiler halinde
+gömer, böylece büyük bir çalışma kitabı belleğe bütün olarak açılmaz.
+"""
+import datetime
+import json
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src import uploads
+
+Chunk = Tuple[str, dict]
+
+TABLE_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+RECORD_EXTENSIONS = (".json", ".jsonl", ".ndjson")
+KEY_FIELDS = ("id", "_id", "key", "name", "title")
+COLUMN_SEPARATOR = " | "
+
+
+def kind(filename: str) -> Optional[str]:
+    """Dosya yapısal olarak işlenecekse "table" ya da "record", değilse None."""
+    name = filename.lower()
+    if name.endswith(TABLE_EXTENSIONS):
+        return "table"
+    if name.endswith(RECORD_EXTENSIONS):
+        return "record"
+    return None
+
+
+def iter_chunks(filename: str, raw: uploads.Source, size: int) -> Iterator[Chunk]:
+    """`raw` bytes ya da ikili dosya nesnesi; dosya baştan sona bir kez okunur."""
+    name = filename.lower()
+    if name.endswith(".xls"):
+        yield from table_chunks(_xls_sheets(raw), size)
+    elif name.endswith(TABLE_EXTENSIONS):
+        yield from table_chunks(_xlsx_sheets(raw), size)
+    elif name.endswith((".jsonl", ".ndjson")):
+        yield from record_chunks(_jsonl_records(raw), size)
+    elif name.endswith(".json"):
+        with uploads.mapped(raw) as buf:
+            text = uploads.decode(buf)
+        yield from record_chunks(_json_records(text), size)
+    else:
+        raise ValueError(f"Not a structured file: {filename}")
+
+
+# -----------------------
+# Tablolar
+# -----------------------
+def _xlsx_sheets(raw: uploads.Source):
+    import openpyxl
+
+    # read_only: satırlar XML'den akıtılır, hücre nesneleri bellekte tutulmaz
+    wb = openpyxl.load_workbook(uploads.as_stream(raw), read_only=True, data_only=True)
+    try:
+        for sheet in wb.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _xls_sheets(raw: uploads.Source):
+    try:
+        import xlrd  # eski .xls (BIFF) yalnızca xlrd ile okunur; opsiyonel bağımlılık
+    except ImportError:
+        raise ValueError(
+            ".xls dosyaları için `pip install xlrd` gerekli (ya da dosyayı .xlsx kaydedin)"
+        )
+
+    with uploads.mapped(raw) as buf:
+        book = xlrd.open_workbook(file_contents=buf, on_demand=True)
+        try:
+            for name in book.sheet_names():
+                sheet = book.sheet_by_name(name)
+                yield name, (sheet.row_values(r) for r in range(sheet.nrows))
+                book.unload_sheet(name)
+        finally:
+            book.release_resources()
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return " ".join(str(value).split())
+
+
+def _row(values: Iterable) -> List[str]:
+    cells = [_cell(v) for v in values]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
+
+
+def table_chunks(sheets, size: int) -> Iterator[Chunk]:
+    """(sayfa adı, satır üreteci) çiftlerinden başlıklı satır grupları üretir."""
+    for title, rows in sheets:
+        header_row, prefix, emitted = None, "", False
+        lines: List[str] = []
+        start = end = 0
+        for number, values in enumerate(rows, start=1):
+            cells = _row(values)
+            if not cells:
+                continue
+            if header_row is None:
+                header = [c or f"col{i + 1}" for i, c in enumerate(cells)]
+                header_row, prefix = number, f"# {title}\n{COLUMN_SEPARATOR.join(header)}\n"
+                continue
+
+            line = COLUMN_SEPARATOR.join(cells)
+            fits = len(prefix) + len(line) <= size
+            queued = len(prefix) + sum(len(text) + 1 for text in lines)
+            if lines and (not fits or queued + len(line) > size):
+                yield prefix + "\n".join(lines), _table_meta(title, start, end)
+                lines, emitted = [], True
+            if not fits:
+                # Tek başına sığmayan satır parçalanır; her parça başlığı yine taşır
+                room = max(1, size - len(prefix))
+                for i in range(0, len(line), room):
+                    yield prefix + line[i:i + room], _table_meta(title, number, number)
+                emitted = True
+                continue
+            if not lines:
+                start = number
+            end = number
+            lines.append(line)
+
+        if lines:
+            yield prefix + "\n".join(lines), _table_meta(title, start, end)
+        elif header_row is not None and not emitted:
+            yield prefix.rstrip(), _table_meta(title, header_row, header_row)  # yalnızca başlık
+
+
+def _table_meta(sheet: str, row_start: int, row_end: int) -> dict:
+    return {"kind": "table", "sheet": sheet, "row_start": row_start, "row_end": row_end}
+
+
+# -----------------------
+# JSON kayıtları
+# -----------------------
+def _record_key(record, fallback: str) -> str:
+    if isinstance(record, dict):
+        for field in KEY_FIELDS:
+            if isinstance(record.get(field), (str, int)) and record[field] != "":
+                return str(record[field])
+    return fallback
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _array_records(decoder: json.JSONDecoder, text: str, pos: int, path: str):
+    """`pos`'taki diziyi eleman eleman çözer; dizinin bittiği konumu döndürür."""
+    pos, i = _skip(text, pos + 1), 0
+    while not text.startswith("]", pos):
+        record, pos = decoder.raw_decode(text, pos)
+        yield _record_key(record, f"{path}[{i}]"), record
+        i += 1
+        pos = _skip(text, pos)
+        if text.startswith(",", pos):
+            pos = _skip(text, pos + 1)
+        elif not text.startswith("]", pos):
+            raise ValueError(f"Bozuk JSON dizisi (konum {pos})")
+    return pos + 1
+
+
+def _json_records(text: str) -> Iterator[Tuple[str, object]]:
+    """(anahtar, kayıt) çiftleri; belge bütün olarak nesne ağacına çevrilmez.
+
+    Kök dizi → her eleman bir kayıt. Kök nesne → nesne dizisi tutan alanların
+    (ör. `items`) her elemanı bir kayıt, kalan alanlar sonda tek kayıt (`$`).
+    Kayıtlar `raw_decode` ile sırayla çözülür; bellekte bir kayıt tutulur.
+    """
+    decoder = json.JSONDecoder()
+    pos = _skip(text, 0)
+    if text.startswith("[", pos):
+        yield from _array_records(decoder, text, pos, "")
+        return
+    if not text.startswith("{", pos):
+        yield "$", decoder.raw_decode(text, pos)[0]
+        return
+
+    rest = {}
+    pos = _skip(text, pos + 1)
+    while not text.startswith("}", pos):
+        key, pos = decoder.raw_decode(text, pos)
+        pos = _skip(text, pos)
+        if not text.startswith(":", pos):
+            raise ValueError(f"Bozuk JSON nesnesi (konum {pos})")
+        pos = _skip(text, pos + 1)
+        if text.startswith("[", pos) and text.startswith("{", _skip(text, pos + 1)):
+            pos = yield from _array_records(decoder, text, pos, key)
+        else:
+            rest[key], pos = decoder.raw_decode(text, pos)
+        pos = _skip(text, pos)
+        if text.startswith(",", pos):
+            pos = _skip(text, pos + 1)
+        elif not text.startswith("}", pos):
+            raise ValueError(f"Bozuk JSON nesnesi (konum {pos})")
+    if rest:
+        yield "$", rest
+
+
+def _jsonl_records(raw: uploads.Source) -> Iterator[Tuple[str, object]]:
+    for number, line in enumerate(uploads.as_stream(raw), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        yield _record_key(record, f"line {number}"), record
+
+
+def _flatten(value, prefix: str = "") -> Iterator[str]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list) and any(isinstance(x, (dict, list)) for x in value):
+        for i, item in enumerate(value):
+            yield from _flatten(item, f"{prefix}[{i}]")
+    elif isinstance(value, list):
+        joined = ", ".join(_cell(x) for x in value)
+        yield f"{prefix}: {joined}" if prefix else joined
+    elif value is not None and value != "":
+        yield f"{prefix}: {_cell(value)}" if prefix else _cell(value)
+
+
+def record_chunks(records: Iterable[Tuple[str, object]], size: int) -> Iterator[Chunk]:
+    for index, (key, record) in enumerate(records):
+        text = "\n".join(_flatten(record))
+        if not text.strip():
+            continue
+        meta = {"kind": "record", "record": index, "key": key}
+        if len(text) <= size:
+            yield text, meta
+            continue
+        # Büyük kayıt: satır sınırlarında bölünür, parçalar aynı kayıt metadata'sını taşır
+        part: List[str] = []
+        for line in text.split("\n"):
+            for i in range(0, len(line), size):
+                piece = line[i:i + size]
+                if part and sum(len(p) + 1 for p in part) + len(piece) > size:
+                    yield "\n".join(part), meta
+                    part = []
+                part.append(piece)
+        if part:
+            yield "\n".join(part), meta
@@ -0,0 +1,242 @@
+# src/tracing.py
+"""
+Span tabanlı basit istek izleme (tracing).
+
+Her HTTP isteği bir trace id alır (gelen `X-Trace-Id` başlığı varsa o kullanılır).
+İstek içindeki aşamalar iç içe span'ler olarak kaydedilir ve JSONL formatında
+yerel bir dosyaya arka plan thread'i ile yazılır:
+
+    {"trace_id": "...", "span_id": "...", "parent_id": "...", "name": "llm",
+     "start": 1700000000.123, "duration_ms": 812.4, "status": "ok", "attrs": {...}}
+
+Ayarlar (ortam değişkenleri):
+    TRACE_ENABLED=1                      izlemeyi aç/kapat
+    TRACE_FILE=data/traces/traces.jsonl  çıktı dosyası
+    TRACE_SAMPLE_RATE=0.01               kaydedilecek trace oranı (tamamı için 1.0)
+    TRACE_MAX_MB=64                      dosya bu boyutu aşınca döner (traces.jsonl.1, .2, ...)
+    TRACE_BACKUPS=3                      saklanan eski dosya sayısı
+
+Örneklenmeyen isteklerde de trace id üretilir (loglarda ve `X-Trace-Id`'de
+görünür); yalnızca span'ler dosyaya yazılmaz. Disk kullanımı en fazla
+`TRACE_MAX_MB * (TRACE_BACKUPS + 1)` kadardır; döndürme worker'lar arası
+kilit altında yapılır, başka worker'ın döndürdüğü dosyayı tutan yazıcı yenisini açar.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Optional
+
+from src import workers
+
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+TRACE_FILE = os.getenv("TRACE_FILE", "data/traces/traces.jsonl")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_MAX_BYTES = int(float(os.getenv("TRACE_MAX_MB", "64")) * 1024 * 1024)
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "3"))
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "start", "duration_ms",
+                 "status", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attrs: dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self.sampled = sampled
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+# -----------------------
+# Exporter
+# -----------------------
+class FileExporter:
+    """Span'leri bir kuyruk üzerinden arka planda JSONL dosyasına yazar (boyuta göre döner)."""
+
+    def __init__(self, path: str, max_queue: int = 10000, max_bytes: int = TRACE_MAX_BYTES,
+                 backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, span: Span):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1  # istek yolunu asla bloklama
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                # Kuyrukta bekleyenleri de aynı yazmada topla
+                while len(batch) < 512:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                f = self._write(f, [s for s in batch if s])
+                if None in batch:
+                    return
+        finally:
+            f.close()
+
+    def _write(self, f, batch: List[dict]):
+        """Gerekirse dosyayı döndürür, partiyi yazar; yazılan (belki yeni) dosyayı döner."""
+        f = self._rotate_if_needed(f)
+        f.write("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in batch))
+        f.flush()
+        return f
+
+    def _rotate_if_needed(self, f):
+        if self.max_bytes <= 0:
+            return f
+        st = os.fstat(f.fileno())
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current == st.st_ino and st.st_size < self.max_bytes:
+            return f
+        with workers.file_lock("traces", os.path.dirname(self.path) or "."):
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            # Dosya hâlâ bizimkiyse döndür; başka worker döndürdüyse yalnızca yenisini aç
+            if current == st.st_ino and os.path.getsize(self.path) >= self.max_bytes:
+                if self.backups <= 0:
+                    os.remove(self.path)
+                else:
+                    for i in range(self.backups - 1, 0, -1):
+                        if os.path.exists(f"{self.path}.{i}"):
+                            os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+                    os.replace(self.path, f"{self.path}.1")
+            elif current == st.st_ino:
+                return f
+        f.close()
+        return open(self.path, "a", encoding="utf-8")
+
+    def shutdown(self, timeout: float = 2.0):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _after_fork_in_child(self):
+        # Yazıcı thread çocuğa geçmez; ilk export'ta yeniden başlatılır
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+exporter = FileExporter(TRACE_FILE)
+os.register_at_fork(after_in_child=lambda: exporter._after_fork_in_child())
+
+
+# -----------------------
+# API
+# -----------------------
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str] = None, **attrs):
+    """Yeni bir span açar; üst span varsa onun trace'ine bağlanır."""
+    parent = _current_span.get()
+    if parent is not None and trace_id is None:
+        sp = Span(name, parent.trace_id, parent.span_id, parent.sampled, attrs)
+    else:
+        sampled = TRACE_ENABLED and random.random() < TRACE_SAMPLE_RATE
+        sp = Span(name, trace_id or new_trace_id(), None, sampled, attrs)
+
+    token = _current_span.set(sp)
+    start = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status = "error"
+        sp.attrs.setdefault("error", f"{type(e).__name__}: {e}"[:300])
+        raise
+    finally:
+        sp.duration_ms = (time.perf_counter() - start) * 1000
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Span farklı bir context'te kapandı (ör. streaming generator)
+            _current_span.set(parent)
+        if sp.sampled:
+            exporter.export(sp)
+
+
+def traced(name: Optional[str] = None):
+    """Fonksiyonu bir span ile saran dekoratör."""
+
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
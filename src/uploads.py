@@ -0,0 +1,132 @@
+# src/uploads.py
+"""
+Dosya yüklemeleri: boyut sınırı, diske taşan tampon ve kopyasız okuma.
+
+* `UploadLimitMiddleware` `/index` gibi yükleme yollarında gövdeyi okumadan önce
+  `Content-Length`'i kontrol eder; başlık yoksa ya da yanlışsa gelen parçaları
+  sayar ve `MAX_UPLOAD_MB` aşılınca 413 döner. Böylece sınırı aşan bir dosya
+  diske de yazılmaz.
+* Starlette multipart dosyaları `SpooledTemporaryFile`'a parça parça yazar;
+  `UPLOAD_SPOOL_MB`'den büyük dosyalar belleğe değil geçici dizine (`TMPDIR`)
+  gider. Endpoint dosyayı `file.read()` ile belleğe almaz.
+* Ayrıştırıcılar `as_stream` (dosya nesnesi) ya da `mapped` (salt okunur mmap)
+  ile okur; `bytes` verilirse aynı arabirim kopyasız `BytesIO`/`memoryview`
+  üzerinden çalışır.
+"""
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Union
+
+from fastapi import HTTPException
+from starlette.formparsers import MultiPartParser
+from starlette.responses import JSONResponse
+
+from src import metrics
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+UPLOAD_SPOOL_BYTES = int(float(os.getenv("UPLOAD_SPOOL_MB", "1")) * 1024 * 1024)
+UPLOAD_PATHS = ("/index",)
+
+# Bu boyutun üstündeki yüklemeler bellekte değil geçici dosyada tutulur
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_BYTES
+
+Source = Union[bytes, BinaryIO]
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"Dosya çok büyük (en fazla {limit // (1024 * 1024)} MB)."
+
+
+class UploadLimitMiddleware:
+    """Yükleme yollarında gövde boyutunu sınırlar (saf ASGI; gövdeyi tamponlamaz)."""
+
+    def __init__(self, app, paths=UPLOAD_PATHS, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.paths = tuple(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            # Erken ret: gövde hiç okunmaz
+            metrics.UPLOADS_REJECTED.inc(reason="content_length")
+            response = JSONResponse({"detail": _too_large_detail(self.max_bytes)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI gövde ayrıştırırken HTTPException'ı olduğu gibi yükseltir → 413
+                    metrics.UPLOADS_REJECTED.inc(reason="streamed")
+                    raise HTTPException(status_code=413, detail=_too_large_detail(self.max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# -----------------------
+# Okuma yardımcıları
+# -----------------------
+def size_of(source: Source) -> int:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+
+def as_stream(source: Source) -> BinaryIO:
+    """Başa sarılmış ikili dosya nesnesi; `bytes` için kopyasız `BytesIO`."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+@contextmanager
+def mapped(source: Source):
+    """İçeriği bytes benzeri salt okunur bir arabellek olarak verir.
+
+    Diskteki dosyalar `mmap` ile eşlenir (sayfalar gerektikçe okunur, süreç
+    belleğine kopyalanmaz); `bytes` için `memoryview` döner.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield memoryview(source)
+        return
+    if size_of(source) == 0:
+        yield memoryview(b"")
+        return
+    source.seek(0)
+    try:
+        # SpooledTemporaryFile'da fileno() bellekteki küçük dosyayı da diske taşır
+        fd = source.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        # Diskte olmayan dosya nesnesi (ör. BytesIO)
+        with memoryview(source.getbuffer() if isinstance(source, io.BytesIO) else source.read()) as view:
+            yield view
+        return
+    buf = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    try:
+        yield buf
+    finally:
+        buf.close()
+
+
+def decode(buf, errors: str = "ignore") -> str:
+    """Arabelleği ara `bytes` kopyası oluşturmadan UTF-8 metne çevirir."""
+    return str(buf, "utf-8", errors)
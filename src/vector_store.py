@@ -0,0 +1,340 @@
+# src/vector_store.py
+"""
+Süreç içi, memory-mapped vektör deposu (`VECTOR_STORE=mmap`).
+
+Chroma koleksiyonunun `rag.py` tarafından kullanılan alt kümesini (add, query,
+delete, get, count) uygular. Dosyalar:
+
+    data/vectors/vectors.f16   normalize edilmiş embedding'ler, float16, satır satır
+    data/vectors/docs.bin      chunk metinleri (UTF-8, art arda)
+    data/vectors/meta.jsonl    sidecar: satır → id, metadata, metin ofseti; silme kayıtları
+
+Tüm dosyalar yalnızca sona eklenir; `meta.jsonl` satırı yazıldığında kayıt
+görünür olur. Bir kaydın vektör satırı, kendinden önceki kayıt sayısıdır; bu
+yüzden yazmadan önce (kilit altında) yarıda kalmış bir eklemenin izleri
+temizlenir: sidecar'ın karşılamadığı vektör satırları ve yarım son satır kesilir. Okuyucular dosyaları `mmap` ile açar, böylece birden çok worker
+aynı sayfaları işletim sistemi önbelleğinden paylaşır. Her sorguda sidecar'ın
+boyutu ve inode'u kontrol edilir; başka bir worker'ın eklediği kayıtlar
+artımlı okunur.
+
+Sorgular kosinüs benzerliği ile, satır blokları halinde vektörize NumPy
+çarpımı ve `argpartition` top-k ile yanıtlanır; `topic`, `doc_id`, `kind` ve
+`sheet` eşitlik filtreleri (Chroma'daki gibi `$and` ile birleştirilebilir)
+maske olarak uygulanır.
+
+Araçlar:
+    python -m src.vector_store import-chroma   # mevcut Chroma koleksiyonunu kopyala
+    python -m src.vector_store compact         # silinen satırları temizle
+"""
+import argparse
+import fcntl
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+VECTOR_DIR = os.getenv("VECTOR_DIR", "data/vectors")
+QUERY_BLOCK_ROWS = 16384
+FILTER_KEYS = ("topic", "doc_id", "kind", "sheet")
+
+
+class MmapVectorStore:
+    def __init__(self, path: str = VECTOR_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f16")
+        self._docs_path = os.path.join(path, "docs.bin")
+        self._meta_path = os.path.join(path, "meta.jsonl")
+        self._lock_path = os.path.join(path, ".lock")
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._reset_state()
+
+    # -------- durum --------
+    def _reset_state(self):
+        self.dim: Optional[int] = None
+        self._meta_offset = 0
+        self._meta_inode = None
+        self._ids: List[str] = []
+        self._metas: List[dict] = []
+        self._doc_spans: List[tuple] = []
+        self._alive: List[bool] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._codes = {key: {} for key in FILTER_KEYS}
+        self._code_lists = {key: [] for key in FILTER_KEYS}
+        self._arrays = None  # (alive, {key: codes}) — gerektiğinde yeniden kurulur
+        self._matrix = None
+        self._docs_map = None
+
+    @contextmanager
+    def _file_lock(self):
+        """Worker'lar arası yazma kilidi (aynı thread içinde iç içe alınabilir)."""
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self._lock_path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Sidecar'daki yeni kayıtları uygular; dosya küçüldüyse (reset) baştan yükler."""
+        try:
+            st = os.stat(self._meta_path)
+            size, inode = st.st_size, st.st_ino
+        except FileNotFoundError:
+            size, inode = 0, None
+        if inode != self._meta_inode or size < self._meta_offset:
+            self._reset_state()
+            self._meta_inode = inode
+        if size == self._meta_offset:
+            return
+        with open(self._meta_path, "rb") as f:
+            f.seek(self._meta_offset)
+            data = f.read(size - self._meta_offset)
+        end = data.rfind(b"\n") + 1  # yarım yazılmış son satırı atla
+        for line in data[:end].splitlines():
+            self._apply(json.loads(line))
+        self._meta_offset += end
+        self._arrays = None
+        self._matrix = None
+        self._docs_map = None
+
+    def _repair(self):
+        """Yazma kilidi altında, `_refresh`'ten sonra: yarıda kalmış eklemeyi geri alır.
+
+        Vektörler sidecar'dan önce yazıldığı için arada kesilen bir `add` sahipsiz
+        satırlar bırakır; bunlar kalırsa sonraki kayıtlar yanlış vektörlerle eşleşir.
+        Okuyucular yalnızca sidecar'ın gösterdiği satırları eşlediği için kesme güvenlidir.
+        """
+        rows_bytes = len(self._ids) * (self.dim or 0) * np.dtype(np.float16).itemsize
+        for path, size in ((self._vectors_path, rows_bytes), (self._meta_path, self._meta_offset)):
+            try:
+                if os.path.getsize(path) > size:
+                    os.truncate(path, size)
+            except FileNotFoundError:
+                pass
+
+    def _apply(self, record: dict):
+        if "dim" in record:
+            self.dim = record["dim"]
+        elif "delete" in record:
+            for row in record["delete"]:
+                self._alive[row] = False
+                self._row_by_id.pop(self._ids[row], None)
+        else:
+            row = len(self._ids)
+            self._ids.append(record["id"])
+            self._metas.append(record["meta"])
+            self._doc_spans.append((record["off"], record["len"]))
+            self._alive.append(True)
+            self._row_by_id[record["id"]] = row
+            for key in FILTER_KEYS:
+                value = record["meta"].get(key)
+                codes = self._codes[key]
+                self._code_lists[key].append(codes.setdefault(value, len(codes)))
+
+    def _views(self):
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self._alive, dtype=bool),
+                {key: np.array(self._code_lists[key], dtype=np.int32) for key in FILTER_KEYS},
+            )
+        rows = len(self._ids)
+        if self._matrix is None and rows and self.dim:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+        if self._docs_map is None and rows:
+            with open(self._docs_path, "rb") as f:
+                self._docs_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._arrays
+
+    def _document(self, row: int) -> str:
+        off, length = self._doc_spans[row]
+        return self._docs_map[off:off + length].decode("utf-8")
+
+    # -------- Chroma uyumlu API --------
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return sum(self._alive)
+
+    def add(self, ids: List[str], documents: List[str], embeddings, metadatas: List[dict]):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        with self._file_lock():
+            self._refresh()
+            self._repair()
+            if self.dim is None:
+                self._append_meta([{"dim": int(vectors.shape[1])}])
+                self.dim = int(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} != store dimension {self.dim}")
+
+            # Chroma gibi: var olan id'ler tekrar eklenmez
+            fresh = [i for i, id_ in enumerate(ids) if id_ not in self._row_by_id]
+            if not fresh:
+                return
+            with open(self._docs_path, "ab") as f:
+                offset = f.tell()
+                records, blobs = [], []
+                for i in fresh:
+                    blob = documents[i].encode("utf-8")
+                    records.append({"id": ids[i], "meta": metadatas[i], "off": offset, "len": len(blob)})
+                    blobs.append(blob)
+                    offset += len(blob)
+                f.write(b"".join(blobs))
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors[fresh].astype(np.float16).tobytes())
+            self._append_meta(records)  # kayıtları görünür yapan adım
+            self._refresh()
+
+    def _append_meta(self, records: List[dict]):
+        with open(self._meta_path, "ab") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _mask(self, where: Optional[dict]):
+        alive, codes = self._views()
+        mask = alive.copy()
+        clauses = (where or {}).get("$and") or [{k: v} for k, v in (where or {}).items()]
+        for key, value in (item for clause in clauses for item in clause.items()):
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unsupported filter {key!r}; supported: {FILTER_KEYS}")
+            code = self._codes[key].get(value)
+            if code is None:
+                return np.zeros_like(mask)
+            mask &= codes[key] == code
+        return mask
+
+    def query(self, query_embeddings, n_results: int = 5, where: Optional[dict] = None, **_) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            self._refresh()
+            candidates = np.flatnonzero(self._mask(where)) if self._ids else np.array([], dtype=np.int64)
+            for q in queries:
+                rows, scores = self._top_k(q, candidates, n_results)
+                out["ids"].append([self._ids[r] for r in rows])
+                out["documents"].append([self._document(r) for r in rows])
+                out["metadatas"].append([self._metas[r] for r in rows])
+                out["distances"].append([float(1 - s) for s in scores])
+        return out
+
+    def _top_k(self, q: np.ndarray, candidates: np.ndarray, k: int):
+        if not len(candidates):
+            return [], []
+        scores = np.empty(len(candidates), dtype=np.float32)
+        # float16 → float32 dönüşümü blok blok yapılır; tüm matris kopyalanmaz
+        for start in range(0, len(candidates), QUERY_BLOCK_ROWS):
+            block = candidates[start:start + QUERY_BLOCK_ROWS]
+            scores[start:start + len(block)] = self._matrix[block].astype(np.float32) @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top].tolist(), scores[top].tolist()
+
+    def get(self, where: Optional[dict] = None, **_) -> dict:
+        with self._lock:
+            self._refresh()
+            rows = np.flatnonzero(self._mask(where)).tolist() if self._ids else []
+            return {
+                "ids": [self._ids[r] for r in rows],
+                "documents": [self._document(r) for r in rows],
+                "metadatas": [self._metas[r] for r in rows],
+            }
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None):
+        with self._file_lock():
+            self._refresh()
+            self._repair()
+            if ids is not None:
+                rows = [self._row_by_id[i] for i in ids if i in self._row_by_id]
+            else:
+                rows = np.flatnonzero(self._mask(where)).tolist() if self._ids else []
+            if rows:
+                self._append_meta([{"delete": rows}])
+                self._refresh()
+
+    def reset(self):
+        """Tüm kayıtları siler (`rag.delete_all`).
+
+        Dosyalar yerinde kesilmek yerine yenileriyle değiştirilir; diğer worker'lar
+        sidecar'ın inode'u değiştiği için baştan yükler, eski mmap'ler geçerli kalır.
+        """
+        with self._file_lock():
+            for p in (self._meta_path, self._vectors_path, self._docs_path):
+                with open(p + ".tmp", "wb"):
+                    pass
+                os.replace(p + ".tmp", p)
+            self._reset_state()
+
+    def compact(self) -> int:
+        """Silinmiş satırları dosyalardan temizler; kalan satır sayısını döner."""
+        with self._file_lock():
+            self._refresh()
+            self._views()
+            keep = [r for r, alive in enumerate(self._alive) if alive]
+            ids = [self._ids[r] for r in keep]
+            documents = [self._document(r) for r in keep]
+            metadatas = [self._metas[r] for r in keep]
+            vectors = np.asarray(self._matrix[keep], dtype=np.float32) if keep else None
+            self.reset()
+            if keep:
+                self.add(ids, documents, vectors, metadatas)
+            return len(keep)
+
+
+# -----------------------
+# Migration
+# -----------------------
+def import_chroma(store: MmapVectorStore, batch_size: int = 1000) -> int:
+    """Mevcut Chroma koleksiyonundaki kayıtları (embedding'leriyle) depoya kopyalar."""
+    from src import rag
+
+    collection = rag.get_chroma_collection()
+    total, offset = collection.count(), 0
+    while offset < total:
+        batch = collection.get(include=["documents", "metadatas", "embeddings"],
+                               limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        store.add(batch["ids"], batch["documents"], batch["embeddings"], batch["metadatas"])
+        offset += len(batch["ids"])
+    return offset
+
+
+def main():
+    from src.logs import get_logger, setup as setup_logging
+
+    parser = argparse.ArgumentParser(description="Memory-mapped vektör deposu araçları")
+    parser.add_argument("command", choices=["import-chroma", "compact"])
+    parser.add_argument("--dir", default=VECTOR_DIR)
+    args = parser.parse_args()
+    setup_logging(fmt="text")
+    log = get_logger(__name__)
+
+    store = MmapVectorStore(args.dir)
+    if args.command == "import-chroma":
+        log.info("%d kayıt Chroma'dan aktarıldı", import_chroma(store))
+    else:
+        log.info("Sıkıştırma tamamlandı (%d kayıt)", store.compact())
+
+
+if __name__ == "__main__":
+    main()
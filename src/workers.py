@@ -0,0 +1,127 @@
+# src/workers.py
+"""
+Pre-fork çok worker'lı çalışma desteği.
+
+    gunicorn -c gunicorn.conf.py src.app:app     (make run-workers)
+
+* `preload()` embedding modelini master süreçte, fork'tan önce yükler; worker'lar
+  ağırlıkları copy-on-write paylaşır. Chroma istemcisi gibi süreçe özel
+  nesneler her modülün `os.register_at_fork` kancasıyla çocukta sıfırlanır.
+* `Generation` dosya tabanlı bir sürüm sayacıdır: bir worker indeksi ya da bir
+  kullanıcıyı değiştirdiğinde sayacı artırır, diğerleri sonraki istekte değişikliği
+  görüp kendi önbelleklerini yeniler. Aynı sayaçlar HTTP ETag'lerinde de
+  kullanılır (bkz. src/http_cache.py).
+"""
+import fcntl
+import gc
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+GENERATION_DIR = os.getenv("GENERATION_DIR", "data/generations")
+
+
+@contextmanager
+def file_lock(name: str, directory: str = GENERATION_DIR):
+    """Süreçler arası özel kilit (`flock`); ör. Chroma yazmalarını sıraya sokar."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{name}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Generation:
+    """Worker'lar arası geçersizleştirme sayacı.
+
+    `bump()` sayacı dosyaya atomik olarak (`os.replace`) yazar. `check()` her
+    çağrıda yalnızca bir `stat` yapar; dosya değiştiyse kayıtlı geri çağrıları
+    çalıştırır ve True döner. Sayacı artıran süreç kendi değişikliğini zaten
+    uyguladığı için geri çağrılar onda tekrar çalışmaz.
+    """
+
+    def __init__(self, name: str, directory: str = GENERATION_DIR):
+        self.name = name
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.gen")
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._seen = self._token()
+        self._current = (None, 0)  # (token, value) — current() dosyayı yalnızca değişince okur
+
+    def on_change(self, callback: Callable[[], None]):
+        self._callbacks.append(callback)
+        return callback
+
+    def value(self) -> int:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def current(self) -> int:
+        """Güncel sayaç değeri (ör. ETag için); dosya değişmediyse yalnızca `stat` yapar."""
+        token = self._token()
+        cached_token, value = self._current
+        if token != cached_token:
+            value = self.value()
+            self._current = (token, value)
+        return value
+
+    def bump(self) -> int:
+        with file_lock(self.name, self.directory):
+            value = self.value() + 1
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(value))
+            os.replace(tmp, self.path)
+            with self._lock:
+                self._seen = self._token()
+        return value
+
+    def check(self) -> bool:
+        token = self._token()
+        with self._lock:
+            if token == self._seen:
+                return False
+            self._seen = token
+        for callback in self._callbacks:
+            callback()
+        return True
+
+    def _token(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def preload():
+    """Master süreçte, worker'lar fork edilmeden önce çağrılır (gunicorn `when_ready`).
+
+    torch backend'lerinde model ağırlıkları yüklenir ama çalıştırılmaz: OpenMP
+    thread havuzu fork'tan sonra çocukta ilk kullanımda kurulur. onnxruntime
+    oturumları thread havuzunu oluşturulurken başlattığı için fork'a dayanmaz;
+    onnx backend'lerinde model her worker'da ayrı yüklenir.
+    """
+    from src import embeddings, rag
+    from src.logs import get_logger
+
+    log = get_logger(__name__)
+    cpu = os.cpu_count() or 1
+    if "EMBED_THREADS" not in os.environ:
+        embeddings.EMBED_THREADS = max(1, cpu // max(1, WEB_CONCURRENCY))
+    if embeddings.EMBED_BACKEND in ("torch", "int8"):
+        rag.get_embedding_function()
+        log.info("embedding model preloaded", extra={"backend": embeddings.EMBED_BACKEND,
+                                                     "threads": embeddings.EMBED_THREADS})
+    # Yüklenen nesneleri GC taramasının dışına al: refcount/GC yazmaları
+    # paylaşılan sayfaları kopyalatmasın.
+    gc.collect()
+    gc.freeze()
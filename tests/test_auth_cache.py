@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import src.auth as auth
+
+
+def _make_user(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "DATABASE", str(tmp_path / "quiz.db"))
+    auth.init_users_db()
+    conn = auth.get_db()
+    conn.execute(
+        "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+        ("alice", "alice@example.com", "x"),
+    )
+    conn.commit()
+    conn.close()
+    return auth.create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+
+
+def test_principal_cached_until_user_invalidated(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "principal_cache", auth.PrincipalCache(ttl=60))
+    token = _make_user(tmp_path, monkeypatch)
+
+    first = auth.get_current_user(token)
+    assert first["username"] == "alice" and first["is_admin"] is False
+
+    conn = auth.get_db()
+    conn.execute("UPDATE users SET is_admin = 1 WHERE username = 'alice'")
+    conn.commit()
+    conn.close()
+
+    assert auth.get_current_user(token)["is_admin"] is False  # önbellekten
+    auth.invalidate_user("alice")
+    assert auth.get_current_user(token)["is_admin"] is True
+    assert auth.principal_cache.stats()["hits"] == 1
+
+
+def test_principal_cache_bounded():
+    cache = auth.PrincipalCache(ttl=60, max_size=2)
+    for i in range(3):
+        cache.put(f"t{i}", {"id": i, "username": f"u{i}"})
+    assert cache.get("t0") is None
+    assert cache.get("t2")["id"] == 2
+
+
+def test_signup_does_not_flush_principal_caches(tmp_path, monkeypatch):
+    import asyncio
+
+    from src import workers
+
+    generation = workers.Generation("principals", str(tmp_path / "gen"))
+    monkeypatch.setattr(auth, "principal_cache", auth.PrincipalCache(ttl=60, generation=generation))
+    token = _make_user(tmp_path, monkeypatch)
+    auth.get_current_user(token)
+
+    asyncio.run(auth.register(auth.UserRegister(username="bob", email="bob@example.com", password="secret")))
+    # Yeni kullanıcı önbellekte olamaz; diğer worker'ların önbelleği boşaltılmaz
+    assert generation.value() == 0
+    assert auth.principal_cache.get(token)["username"] == "alice"
@@ -0,0 +1,21 @@
+from src import context_pack, rag
+
+
+def test_pack_merges_overlapping_chunks_within_budget():
+    words = " ".join(f"kelime{i}" for i in range(600))
+    chunks = rag.chunk_text(words)
+    results = {
+        # Alaka sırası: 1, 0, 1 (tekrar), başka dokümandan kısa bir pasaj
+        "documents": [[chunks[1], chunks[0], chunks[1], "Ayrı doküman içeriği."]],
+        "metadatas": [[{"doc_id": "a"}, {"doc_id": "a"}, {"doc_id": "a"}, {"doc_id": "b"}]],
+    }
+
+    packed = context_pack.pack(results, "llama3:instruct", use="question", budget=10_000)
+    assert packed.passages[0] == words[: len(chunks[0]) + len(chunks[1]) - rag.CHUNK_OVERLAP].strip()
+    assert packed.passages[1] == "Ayrı doküman içeriği."
+    assert packed.saved_tokens > 0 and not packed.truncated
+
+    packed = context_pack.pack(results, "llama3:instruct", use="question", budget=200)
+    assert packed.truncated
+    assert packed.tokens <= 200
+    assert words.startswith(packed.passages[0]) and len(packed.passages) == 1
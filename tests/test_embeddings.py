@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.embeddings import OnnxBackend
+
+
+class _Tokenizer:
+    def encode_batch(self, texts):
+        return [SimpleNamespace(ids=[1, 2, 3], attention_mask=[1, 1, 0 if len(t) < 5 else 1])
+                for t in texts]
+
+
+class _Session:
+    def run(self, outputs, feeds):
+        ids = feeds["input_ids"]
+        rng = np.random.default_rng(0)
+        return [rng.normal(3.0, 2.0, size=(*ids.shape, 8)).astype(np.float32)]
+
+
+def test_onnx_vectors_are_unit_length():
+    # torch/int8 (SentenceTransformer + Normalize) ile aynı: L2 uzaklıkları karşılaştırılabilir
+    backend = object.__new__(OnnxBackend)
+    backend.tokenizer, backend.session = _Tokenizer(), _Session()
+    backend.input_names = {"input_ids"}
+    backend.batch_size = 2
+    vectors = np.asarray(backend(["kısa", "daha uzun metin", "üçüncü"]))
+    assert vectors.shape == (3, 8)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
@@ -0,0 +1,62 @@
+import io
+import json
+import os
+
+import pytest
+
+from src.extract_cache import ExtractionCache
+
+
+def test_text_roundtrip_and_eviction(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_bytes=10 ** 6)
+    key = cache.key(b"%PDF handbook", "text-v1.pdf")
+    # Anahtar içerikten gelir: aynı baytlar dosya nesnesi olarak da aynı anahtarı verir
+    assert key == cache.key(io.BytesIO(b"%PDF handbook"), "text-v1.pdf")
+    assert key != cache.key(b"%PDF handbook", "text-v2.pdf")
+
+    assert cache.get_text(key) is None
+    cache.put_text(key, "çıkarılan metin")
+    assert cache.get_text(key) == "çıkarılan metin"
+
+    first = cache.key(b"a", "text-v1.pdf")
+    cache.put_text(first, "x" * 1000)
+    os.utime(cache._path(first), (1, 1))  # en uzun süredir okunmayan
+    cache.max_bytes = os.path.getsize(cache._path(key))
+    assert cache.evict() == 1
+    assert cache.get_text(first) is None and cache.get_text(key) == "çıkarılan metin"
+
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["stores"], s["evictions"], s["size"]) == (2, 2, 2, 1, 1)
+
+
+def test_chunks_are_published_only_when_fully_consumed(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    chunks = [("a | b", {"kind": "table", "sheet": "S", "row_start": 2, "row_end": 2})]
+    key = cache.key(b"data", "chunks-v1.xlsx-1200")
+
+    def failing():
+        yield from chunks
+        raise ValueError("bozuk dosya")
+
+    with pytest.raises(ValueError):
+        list(cache.store_chunks(key, failing()))
+    assert cache.get_chunks(key) is None and os.listdir(tmp_path) == []
+
+    assert list(cache.store_chunks(key, iter(chunks))) == chunks
+    assert list(cache.get_chunks(key)) == chunks
+
+
+def test_repeat_upload_skips_parsing(tmp_path, monkeypatch):
+    from src import extract_cache, rag
+
+    monkeypatch.setattr(extract_cache, "cache", ExtractionCache(str(tmp_path)))
+    raw = json.dumps([{"id": 1, "q": "iade"}]).encode()
+    first = list(rag.extract_chunks("faq.json", raw))
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("ayrıştırıcı çalışmamalı")
+
+    monkeypatch.setattr(rag.structured, "iter_chunks", no_parse)
+    assert list(rag.extract_chunks("kopya.json", io.BytesIO(raw))) == first
+    assert rag.extract_text_from_file("notes.txt", b"plain") == "plain"  # düz metin önbelleğe girmez
+    assert extract_cache.cache.stats()["size"] == 1
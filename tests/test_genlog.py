@@ -0,0 +1,49 @@
+import os
+import time
+
+from src import genlog
+
+
+def test_size_rotation_compression_and_reader(tmp_path):
+    sink = genlog.GenerationLog(str(tmp_path), batch_size=10, flush_interval=0, max_bytes=200, compress=True)
+    for i in range(50):
+        sink.write({"i": i, "topic": "support_flow" if i % 2 else "security_policy", "stem": "x" * 20})
+    sink.close()
+
+    deadline = time.time() + 5
+    while any(name.endswith(".json") for name in os.listdir(tmp_path)) and time.time() < deadline:
+        time.sleep(0.01)
+
+    segments = genlog.list_segments(str(tmp_path))
+    assert len(segments) > 1
+    assert all(path.endswith(".json.gz") for _, _, path in segments)
+
+    records = list(genlog.iter_records(str(tmp_path)))
+    assert [r["i"] for r in records] == list(range(50))
+    assert len(list(genlog.iter_records(str(tmp_path), topic="support_flow"))) == 25
+
+
+
+def _wait_compressed(path):
+    deadline = time.time() + 5
+    while any(not name.endswith((".gz", ".lock")) for name in os.listdir(path)) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_two_writers_share_segments_without_losing_records(tmp_path):
+    # İki worker'ın yazıcıları: aynı dizin, aynı gün segmentleri
+    first, second = (genlog.GenerationLog(str(tmp_path), batch_size=5, flush_interval=0, max_bytes=2000,
+                                          compress=True) for _ in range(2))
+    for i in range(100):
+        (first, second)[i % 2].write({"i": i, "stem": "x" * 20})
+
+    # Bir worker kapanırken ortak segmenti sıkıştırır; diğeri yazmaya devam eder
+    first.close()
+    _wait_compressed(tmp_path)
+    for i in range(100, 150):
+        second.write({"i": i, "stem": "x" * 20})
+    second.close()
+    _wait_compressed(tmp_path)
+
+    records = list(genlog.iter_records(str(tmp_path)))
+    assert sorted(r["i"] for r in records) == list(range(150))
@@ -0,0 +1,85 @@
+from src import grading, llm, metrics, rag
+
+
+def test_tiers_and_verdict_cache(monkeypatch):
+    # Benzerlikler sabit vektörlerle belirlenir: yakın → embedding, sınırda → LLM hakemi
+    vectors = {"beklenen": [1.0, 0.0], "yakın": [0.99, 0.14], "sınırda": [0.87, 0.49]}
+    monkeypatch.setattr(rag, "_embedder", lambda texts: [vectors[t] for t in texts])
+    calls = []
+
+    def fake_generate(prompt, **kwargs):
+        calls.append(prompt)
+        return {"response": '{"score": 4, "feedback": "Kısmen doğru."}'}
+
+    monkeypatch.setattr(llm, "generate", fake_generate)
+    monkeypatch.setattr(grading, "verdict_cache", grading.VerdictCache())
+
+    def grade(answer):
+        return grading.grade(grading.EvaluateAnswerRequest(
+            question="Soru?", expected="beklenen", user_answer=answer))
+
+    assert grade("Beklenen!")["tier"] == "exact"
+    near = grade("yakın")
+    assert (near["tier"], near["score"], near["is_correct"]) == ("embedding", 5, True)
+    judged = grade("sınırda")
+    assert (judged["tier"], judged["score"], judged["feedback"]) == ("llm", 4, "Kısmen doğru.")
+    assert grade("sınırda")["tier"] == "cache"
+    assert len(calls) == 1
+    assert metrics.GRADING_REQUESTS.value(tier="llm") >= 1
+
+
+def test_grade_quiz_checks_choices_and_batches_open_ended(tmp_path, monkeypatch):
+    from src import question_store
+
+    monkeypatch.setattr(question_store, "DB_PATH", str(tmp_path / "questions.db"))
+    question_store.init_db()
+    mcq = question_store.save_question({"type": "mcq", "topic": "t", "level": "beginner", "stem": "S1",
+                                        "choices": ["A) Kayıt", "B) Arşiv"], "answer": "A", "answer_index": 0})
+    tf = question_store.save_question({"type": "truefalse", "topic": "t", "level": "beginner",
+                                       "stem": "S2", "answer": False})
+    oe = question_store.save_question({"type": "openended", "topic": "t", "level": "beginner",
+                                       "stem": "S3", "expected": "beklenen"})
+
+    batches = []
+
+    def embed(texts):
+        batches.append(list(texts))
+        return [[1.0, 0.0] if t in ("beklenen", "yakın") else [0.0, 1.0] for t in texts]
+
+    monkeypatch.setattr(rag, "_embedder", embed)
+    monkeypatch.setattr(grading, "verdict_cache", grading.VerdictCache())
+    answers = [grading.QuizAnswer(question_id=q, user_answer=a) for q, a in [
+        (mcq, "Kayıt"), (mcq, "B"), (tf, "yanlış"), (oe, "yakın"), (oe, "alakasız"), (999, "x"),
+    ]]
+
+    results = grading.grade_quiz(answers)
+    assert [r["is_correct"] for r in results] == [True, False, True, True, False, False]
+    assert results[-1]["tier"] == "ungraded"
+    assert len(batches) == 1  # açık uçlu cevaplar tek embedding çağrısında
+
+
+def test_client_reference_cannot_poison_stored_question(tmp_path, monkeypatch):
+    from src import question_store
+
+    monkeypatch.setattr(question_store, "DB_PATH", str(tmp_path / "questions.db"))
+    question_store.init_db()
+    qid = question_store.save_question({"type": "openended", "topic": "t", "level": "beginner",
+                                        "stem": "S", "expected": "gerçek"})
+    monkeypatch.setattr(rag, "_embedder", lambda texts: [[1.0, 0.0] if t == "gerçek" else [0.0, 1.0]
+                                                         for t in texts])
+    monkeypatch.setattr(grading, "verdict_cache", grading.VerdictCache())
+
+    # İstemci depodaki soruya kendi "doğru cevabını" gönderir: yok sayılır
+    forged = grading.grade(grading.EvaluateAnswerRequest(
+        question="S", question_id=qid, expected="yanlış cevap", user_answer="yanlış cevap"))
+    assert not forged["is_correct"]
+
+    result = grading.grade_quiz([grading.QuizAnswer(question_id=qid, user_answer="yanlış cevap")])[0]
+    assert (result["is_correct"], result["correct_answer"]) == (False, "gerçek")
+
+    # Depoda olmayan id: anahtar referansı içerir, farklı referanslar birbirini etkilemez
+    first = grading.grade(grading.EvaluateAnswerRequest(
+        question="S", question_id=999, expected="x", user_answer="x"))
+    other = grading.grade(grading.EvaluateAnswerRequest(
+        question="S", question_id=999, expected="gerçek", user_answer="x"))
+    assert first["is_correct"] and other["tier"] != "cache"
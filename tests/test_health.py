@@ -1,3 +1,5 @@
+import time
+
 from fastapi.testclient import TestClient
 from src.app import app
 
@@ -8,3 +10,55 @@ def test_health_ok():
     body = r.json()
     assert body["status"] == "ok"
     assert body["service"] == "knowledge-bot"
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    from src import health
+
+    breaker = health.Breaker("test", failures=2, cooldown=0.05)
+    breaker.failure()
+    breaker.allow()  # tek hata devreyi açmaz
+    breaker.failure()
+    assert breaker.state == health.OPEN
+    try:
+        breaker.allow()
+        assert False, "açık devre çağrıya izin vermemeli"
+    except health.Unavailable as e:
+        assert e.retry_after >= 1
+
+    time.sleep(0.06)
+    breaker.allow()  # half-open: tek deneme
+    try:
+        breaker.allow()
+        assert False, "half-open ikinci çağrıya izin vermemeli"
+    except health.Unavailable:
+        pass
+    breaker.success()
+    assert breaker.state == health.CLOSED
+
+
+def test_chat_health_reads_cached_status():
+    from src import health
+
+    backend = health.Backend("ollama", lambda: {"models": ["llama3:instruct"]})
+    backend.check()
+    original, health.ollama = health.ollama, backend
+    try:
+        body = TestClient(app).get("/chat/health").json()
+    finally:
+        health.ollama = original
+    assert body["ollama"] == "running"
+    assert body["models"] == ["llama3:instruct"]
+
+
+def test_admin_retrieval_surfaces_open_vector_store_circuit(monkeypatch):
+    import pytest
+
+    from src import admin, health
+
+    breaker = health.Breaker("vector_store", failures=1, cooldown=60)
+    breaker.failure()
+    monkeypatch.setattr(health.vector_store, "breaker", breaker)
+    # "Doküman yok" (404) yerine Unavailable → 503 + Retry-After
+    with pytest.raises(health.Unavailable):
+        admin.retrieve_context("product_basics")
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+from src import rag
+from src.app import app
+
+
+class _Collection:
+    def get(self):
+        return {"metadatas": [{"topic": "support_flow"}, {"topic": "support_flow"}]}
+
+
+def test_topics_error_is_not_revalidated(monkeypatch):
+    def broken():
+        raise RuntimeError("vektör deposu açılamadı")
+
+    client = TestClient(app)
+    monkeypatch.setattr(rag, "get_collection", broken)
+    error = client.get("/topics")
+    assert error.status_code == 500
+
+    # İstemci hata yanıtını önbelleğe alsa bile sonraki koşullu GET 304 değil, güncel veriyi alır
+    monkeypatch.setattr(rag, "get_collection", lambda: _Collection())
+    revalidate = {"If-None-Match": error.headers["etag"]} if "etag" in error.headers else {}
+    ok = client.get("/topics", headers=revalidate)
+    assert ok.status_code == 200 and ok.json() == {"topics": {"support_flow": 2}}
+    assert client.get("/topics", headers={"If-None-Match": ok.headers["etag"]}).status_code == 304
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from src import scheduler
+from src.scheduler import PriorityClass, Scheduler
+
+
+def _classes(queue=4, max_wait=5.0):
+    return {
+        "interactive": PriorityClass("interactive", 0, 2, queue, max_wait),
+        "bulk": PriorityClass("bulk", 1, 1, queue, max_wait),
+    }
+
+
+def _hold(sched, name, started, release):
+    with sched.slot(name):
+        started.set()
+        release.wait(5)
+
+
+def test_bulk_is_confined_and_interactive_goes_first(tmp_path):
+    sched = Scheduler(slots=2, classes=_classes(), directory=str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(sched, "bulk", started, release))
+    holder.start()
+    started.wait(5)
+
+    # Toplu iş son yuvayı tutarken sohbet boştaki ilk yuvayı bekletmeden alır
+    with sched.slot("interactive") as index:
+        assert index == 0
+
+    # İkinci toplu iş sohbete ayrılan yuvaya geçemez
+    short = Scheduler(slots=2, classes=_classes(max_wait=0.1), directory=str(tmp_path))
+    with pytest.raises(scheduler.Busy):
+        with short.slot("bulk"):
+            pass
+
+    release.set()
+    holder.join()
+
+
+def test_priority_order_within_process(tmp_path):
+    sched = Scheduler(slots=1, classes=_classes(), directory=str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(sched, "bulk", started, release))
+    holder.start()
+    started.wait(5)
+
+    order = []
+
+    def run(name):
+        with sched.slot(name):
+            order.append(name)
+
+    bulk = threading.Thread(target=run, args=("bulk",))
+    bulk.start()
+    while sched.depth("bulk") < 1:
+        time.sleep(0.01)
+    chat = threading.Thread(target=run, args=("interactive",))
+    chat.start()
+    while sched.depth("interactive") < 1:
+        time.sleep(0.01)
+
+    release.set()
+    for t in (holder, bulk, chat):
+        t.join()
+    assert order == ["interactive", "bulk"]
+
+
+def test_saturated_queue_and_timeout_are_rejected(tmp_path):
+    sched = Scheduler(slots=1, classes=_classes(queue=0, max_wait=0.1), directory=str(tmp_path))
+    with pytest.raises(scheduler.Busy) as exc:
+        with sched.slot("bulk"):
+            pass
+    assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+
+    sched = Scheduler(slots=1, classes=_classes(max_wait=0.1), directory=str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(sched, "bulk", started, release))
+    holder.start()
+    started.wait(5)
+    try:
+        with pytest.raises(scheduler.Busy) as exc:
+            with sched.slot("interactive"):
+                pass
+        assert exc.value.status_code == 503
+    finally:
+        release.set()
+        holder.join()
+
+
+def test_llm_calls_coalesce_only_within_a_priority_class(monkeypatch):
+    from src import llm
+
+    release, calls = threading.Event(), []
+
+    def fake_generate(prompt, model, options, stream, timeout, **extra):
+        calls.append(scheduler.current_priority())
+        release.wait(5)
+        return {"response": "ok"}
+
+    monkeypatch.setattr(llm, "_generate", fake_generate)
+
+    def run(name):
+        with scheduler.priority(name):
+            llm.generate("aynı prompt")
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("bulk", "bulk", "interactive")]
+    for t in threads:
+        t.start()
+    while len(calls) < 2:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert sorted(calls) == ["bulk", "interactive"]
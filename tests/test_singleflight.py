@@ -0,0 +1,31 @@
+import threading
+import time
+
+from src import metrics, singleflight
+
+
+def test_concurrent_calls_share_one_execution():
+    group = singleflight.Group("test")
+    release = threading.Event()
+    calls = []
+
+    def work(x):
+        calls.append(x)
+        release.wait(5)
+        return {"value": x}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("k", work, 1))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while metrics.SINGLEFLIGHT_CALLS.value(group="test", role="coalesced") < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == [{"value": 1}] * 5
+    assert len({id(r) for r in results}) == 5  # her çağıran kendi kopyasını alır
+    assert group.in_flight() == 0
+    assert group.do("k", work, 2) == {"value": 2}  # sonuç önbelleğe alınmaz
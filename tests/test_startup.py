@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = (
+    "chromadb", "sentence_transformers", "torch", "PyPDF2", "docx", "pptx", "PIL",
+    "pytesseract", "pdf2image", "openpyxl",
+)
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "3.0"))
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import src.app
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in sys.argv[1:] if m in sys.modules]}))
+"""
+
+
+def _slowest_imports(stderr: str, n: int = 15) -> str:
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return "\n".join(f"{us / 1000:9.1f} ms {name}" for us, name in rows[:n])
+
+
+def test_app_import_is_lazy_and_fast():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT, *HEAVY_MODULES],
+        cwd=ROOT, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    profile = _slowest_imports(proc.stderr)
+
+    assert not result["loaded"], f"src.app eagerly imports: {result['loaded']}\n{profile}"
+    assert result["seconds"] < IMPORT_BUDGET_S, f"import src.app took {result['seconds']:.2f}s\n{profile}"
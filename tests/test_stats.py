@@ -0,0 +1,46 @@
+import sqlite3
+
+from src import stats
+
+ATTEMPTS = [
+    (1, "support_flow", 5, 3, "2025-01-01 10:00:00"),
+    (1, "support_flow", 5, 5, "2025-01-02 10:00:00"),
+    (1, "security_policy", 4, 1, "2025-01-03 10:00:00"),
+    (2, "support_flow", 10, 7, "2025-01-02 12:00:00"),
+]
+
+
+def _snapshot(cursor):
+    return {
+        t: sorted(cursor.execute(f"SELECT * FROM {t}").fetchall()) for t in stats.ROLLUP_TABLES
+    }
+
+
+def test_incremental_rollups_match_backfill():
+    conn = sqlite3.connect(":memory:")
+    c = conn.cursor()
+    c.execute("""
+    CREATE TABLE quiz_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, quiz_date TEXT, topic TEXT,
+        total_questions INTEGER, correct_answers INTEGER
+    )
+    """)
+    stats.init_stats_tables(c)
+    for user_id, topic, total, correct, date in ATTEMPTS:
+        c.execute(
+            "INSERT INTO quiz_attempts (user_id, quiz_date, topic, total_questions, correct_answers)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (user_id, date, topic, total, correct),
+        )
+        stats.apply_attempt(c, user_id, topic, total, correct, date)
+
+    incremental = _snapshot(c)
+    stats.backfill(c)
+    assert _snapshot(c) == incremental
+
+    user = stats.get_user_stats(c, 1)
+    assert user["total_quizzes"] == 3
+    assert user["last_quiz_date"] == "2025-01-03 10:00:00"
+    assert user["topic_stats"]["support_flow"] == {"correct": 8, "total": 10}
+    support = next(t for t in stats.get_topic_stats(c) if t["topic"] == "support_flow")
+    assert support["user_count"] == 2
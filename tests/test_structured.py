@@ -0,0 +1,27 @@
+import json
+
+from src import structured
+
+
+def test_table_chunks_repeat_header_and_track_rows():
+    rows = [("Ürün", "Fiyat", None), (None, None, None)] + [(f"ürün {i}", float(i), None) for i in range(40)]
+    chunks = list(structured.table_chunks([("Fiyatlar", iter(rows))], size=120))
+
+    assert len(chunks) > 1
+    for text, meta in chunks:
+        assert text.startswith("# Fiyatlar\nÜrün | Fiyat\n")
+        assert len(text) <= 120
+        assert meta["kind"] == "table" and meta["sheet"] == "Fiyatlar"
+    assert chunks[0][1]["row_start"] == 3  # başlık 1. satır, 2. satır boş
+    assert chunks[-1][1]["row_end"] == 42
+    assert "ürün 1 | 1\n" in chunks[0][0]
+
+
+def test_json_is_split_per_record_with_keys():
+    data = {"title": "SSS", "items": [{"id": "q1", "q": "Soru?", "a": "Cevap", "meta": {"lang": "tr"}},
+                                      {"q": "İkinci", "a": "Evet"}]}
+    chunks = list(structured.iter_chunks("sss.json", json.dumps(data).encode(), size=1200))
+
+    assert [meta["key"] for _, meta in chunks] == ["q1", "items[1]", "$"]
+    assert chunks[0][0] == "id: q1\nq: Soru?\na: Cevap\nmeta.lang: tr"
+    assert chunks[2][0] == "title: SSS"
@@ -0,0 +1,32 @@
+import json
+import os
+
+from src import tracing
+
+
+def _spans(n, start=0):
+    return [{"trace_id": f"t{i}", "name": "x" * 50} for i in range(start, start + n)]
+
+
+def test_exporter_rotates_by_size_and_keeps_backups(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    # İki worker'ın yazıcıları aynı dosyaya yazar
+    exporters = [tracing.FileExporter(path, max_bytes=1000, backups=2) for _ in range(2)]
+    files = [open(path, "a", encoding="utf-8") for _ in exporters]
+    for i in range(40):
+        k = i % 2
+        files[k] = exporters[k]._write(files[k], _spans(5, start=i * 5))
+    for f in files:
+        f.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["traces.jsonl", "traces.jsonl.1", "traces.jsonl.2", "traces.lock"]
+    # Her dosya en fazla sınır + bir parti kadar büyür; en yeni kayıtlar kaybolmaz
+    lines = []
+    for name in ("traces.jsonl.2", "traces.jsonl.1", "traces.jsonl"):
+        size = os.path.getsize(tmp_path / name)
+        assert size < 1000 + 2 * 5 * 80
+        with open(tmp_path / name, encoding="utf-8") as f:
+            lines += [json.loads(line)["trace_id"] for line in f]
+    assert lines[-1] == "t199" and len(set(lines)) == len(lines)
+
@@ -0,0 +1,41 @@
+import io
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from src import uploads
+
+
+def _app(limit: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(uploads.UploadLimitMiddleware, paths=("/upload",), max_bytes=limit)
+
+    @app.post("/upload")
+    def upload(file: UploadFile = File(...)):
+        with uploads.mapped(file.file) as buf:
+            return {"size": uploads.size_of(file.file), "head": uploads.decode(buf[:5])}
+
+    return app
+
+
+def test_upload_limit_rejects_before_and_while_reading():
+    client = TestClient(_app(limit=64 * 1024))
+
+    ok = client.post("/upload", files={"file": ("a.txt", b"hello world")})
+    assert ok.json() == {"size": 11, "head": "hello"}
+
+    too_big = client.post("/upload", files={"file": ("b.txt", b"x" * (128 * 1024))})
+    assert too_big.status_code == 413
+
+    # Content-Length olmadan akıtılan gövde de sınırda kesilir
+    chunks = (b"y" * 16384 for _ in range(16))
+    streamed = client.post("/upload", content=chunks,
+                           headers={"content-type": "multipart/form-data; boundary=x"})
+    assert streamed.status_code == 413
+
+
+def test_stream_and_mapped_accept_bytes_and_files():
+    for source in (b"abc", io.BytesIO(b"abc")):
+        assert uploads.as_stream(source).read() == b"abc"
+        with uploads.mapped(source) as buf:
+            assert uploads.decode(buf) == "abc"
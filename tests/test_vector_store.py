@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.vector_store import MmapVectorStore
+
+
+def test_query_filters_delete_and_shared_reader(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(40, 16)).astype(np.float32)
+    writer = MmapVectorStore(str(tmp_path))
+    writer.add(
+        ids=[f"doc{i % 4}.txt_{i}" for i in range(40)],
+        documents=[f"chunk {i}" for i in range(40)],
+        embeddings=vectors,
+        metadatas=[{"doc_id": f"doc{i % 4}.txt", "chunk": i, "topic": "a" if i % 2 else "b"} for i in range(40)],
+    )
+
+    res = writer.query(query_embeddings=vectors[[7]], n_results=3)
+    assert res["ids"][0][0] == "doc3.txt_7"
+    assert res["distances"][0][0] < 1e-3
+    assert res["distances"][0] == sorted(res["distances"][0])
+
+    res = writer.query(query_embeddings=vectors[[7]], n_results=5, where={"topic": "b"})
+    assert all(m["topic"] == "b" for m in res["metadatas"][0])
+
+    # Ayrı bir örnek (başka worker) aynı dosyaları okur ve silmeyi görür
+    reader = MmapVectorStore(str(tmp_path))
+    writer.delete(where={"doc_id": "doc3.txt"})
+    assert reader.count() == 30
+    res = reader.query(query_embeddings=vectors[[7]], n_results=40)
+    assert "doc3.txt_7" not in res["ids"][0]
+    assert len(res["ids"][0]) == 30
+
+    assert writer.compact() == 30
+    assert reader.get(where={"doc_id": "doc1.txt"})["documents"][:2] == ["chunk 1", "chunk 5"]
+    writer.reset()
+    assert reader.count() == 0
+
+
+def test_interrupted_add_does_not_shift_later_rows(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(6, 8)).astype(np.float32)
+    store = MmapVectorStore(str(tmp_path))
+    store.add(ids=["a"], documents=["A"], embeddings=vectors[[0]], metadatas=[{"topic": "t"}])
+
+    # Vektörler yazıldı, sidecar yazılamadan çöktü (yarım satır da kaldı)
+    def crash(records):
+        with open(store._meta_path, "ab") as f:
+            f.write(b'{"id": "b", "me')
+        raise OSError("disk dolu")
+
+    monkeypatch.setattr(store, "_append_meta", crash)
+    try:
+        store.add(ids=["b", "c"], documents=["B", "C"], embeddings=vectors[[1, 2]],
+                  metadatas=[{"topic": "t"}] * 2)
+    except OSError:
+        pass
+    monkeypatch.undo()
+
+    store.add(ids=["d"], documents=["D"], embeddings=vectors[[3]], metadatas=[{"topic": "t"}])
+    reader = MmapVectorStore(str(tmp_path))
+    for s in (store, reader):
+        assert s.count() == 2
+        res = s.query(query_embeddings=vectors[[3]], n_results=1)
+        assert (res["ids"][0][0], res["documents"][0][0]) == ("d", "D")
+        assert res["distances"][0][0] < 1e-3
@@ -247,11 +247,37 @@ export async function generateQuestion(topic: string, level = "beginner", qtype
   return res.json()
 }
 
+export interface Page<T> {
+  items: T[]
+  next_cursor: string | null
+}
+
+// Keyset sayfalı bir listeyi next_cursor bitene kadar takip eder
+async function fetchAllPages<T>(path: string, init: RequestInit | undefined, errorMessage: string): Promise<T[]> {
+  const items: T[] = []
+  let cursor: string | null = null
+
+  do {
+    const params = new URLSearchParams({ limit: "500" })
+    if (cursor) params.append("cursor", cursor)
+
+    const res = await fetch(`${API_BASE_URL}${path}?${params}`, init)
+    if (!res.ok) {
+      const error = await res.json().catch(() => ({ detail: errorMessage }))
+      throw new Error(error.detail || errorMessage)
+    }
+
+    const page: Page<T> = await res.json()
+    items.push(...page.items)
+    cursor = page.next_cursor
+  } while (cursor)
+
+  return items
+}
+
 // Get all questions (for debugging)
 export async function getAllQuestions(): Promise<Question[]> {
-  const res = await fetch(`${API_BASE_URL}/questions/all`)
-  if (!res.ok) throw new Error("Failed to fetch questions")
-  return res.json()
+  return fetchAllPages<Question>("/questions/all", undefined, "Failed to fetch questions")
 }
 
 // Search in documents
@@ -450,18 +476,15 @@ export async function createFirstAdmin(username: string, email: string, password
 
 // Get all user activity (Admin only)
 export async function getUserActivity(token: string): Promise<QuizAttempt[]> {
-  const res = await fetch(`${API_BASE_URL}/admin/user-activity`, {
-    headers: {
-      Authorization: `Bearer ${token}`,
+  return fetchAllPages<QuizAttempt>(
+    "/admin/user-activity",
+    {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
     },
-  })
-
-  if (!res.ok) {
-    const error = await res.json().catch(() => ({ detail: "Kullanıcı aktivitesi yüklenemedi" }))
-    throw new Error(error.detail || "Kullanıcı aktivitesi yüklenemedi")
-  }
-
-  return res.json()
+    "Kullanıcı aktivitesi yüklenemedi",
+  )
 }
 
 // Evaluate answer for open-ended and scenario questions